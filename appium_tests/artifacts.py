@@ -0,0 +1,190 @@
+"""
+Screenshots and page sources saved for debugging, written in the background.
+
+capture() fetches the screenshot and page source from the driver and hands
+them to a writer thread; decoding, compressing and writing to disk happen off
+the scenario's critical path. By default the runner only captures failed
+scenarios (see configure() and wanted()).
+
+Artifacts of a run go to their own directory under the artifacts root:
+
+    <root>/<YYYYmmdd-HHMMSS>-<pid>/
+        objects/ab/abcdef....png       screenshots (PNG is already compressed)
+        objects/12/123456....xml.gz    page sources, gzipped
+        index.jsonl                    one line per capture: name, kind, path, bytes
+
+Objects are named by the SHA-256 of their content, so the same screen
+captured twice is stored once. Once the run directory reaches its size cap,
+further captures are dropped with a warning.
+"""
+import atexit
+import base64
+import gzip
+import hashlib
+import json
+import os
+import queue
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+MODES = ("failure", "always", "never")
+DEFAULT_ROOT = "artifacts"
+DEFAULT_MAX_MB = 200.0
+
+KINDS = ("screenshot", "page_source")
+_EXTENSIONS = {"screenshot": ".png", "page_source": ".xml.gz"}
+
+# Set through configure()
+_root = DEFAULT_ROOT
+_mode = "failure"
+_max_bytes = int(DEFAULT_MAX_MB * 1024 * 1024)
+_store: Optional["ArtifactStore"] = None
+_store_lock = threading.Lock()
+
+
+def configure(root: Optional[str] = None, mode: Optional[str] = None, max_mb: Optional[float] = None):
+    """Change where artifacts go, when they are captured and the size cap of a run."""
+    global _root, _mode, _max_bytes
+    if mode is not None:
+        if mode not in MODES:
+            raise ValueError(f"Unknown artifact mode {mode!r}, expected one of {', '.join(MODES)}")
+        _mode = mode
+    if root is not None:
+        _root = root
+    if max_mb is not None:
+        _max_bytes = int(max_mb * 1024 * 1024)
+
+
+def wanted(success: bool) -> bool:
+    """Whether a scenario with this outcome should have its screen captured."""
+    return _mode == "always" or (_mode == "failure" and not success)
+
+
+class ArtifactStore:
+    """A run directory of content-addressed artifacts, filled by a writer thread."""
+
+    def __init__(self, run_dir: str, max_bytes: int = _max_bytes):
+        self.run_dir = run_dir
+        self.max_bytes = max_bytes
+        self.stored_bytes = 0
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._paths: Dict[str, str] = {}
+        self._queue: "queue.Queue[Optional[Tuple[str, str, str, str]]]" = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="artifact-writer", daemon=True)
+        os.makedirs(os.path.join(run_dir, "objects"), exist_ok=True)
+        self._index = open(os.path.join(run_dir, "index.jsonl"), 'a', encoding='utf-8')
+        self._writer.start()
+
+    def add(self, name: str, kind: str, payload: str) -> Optional[str]:
+        """
+        Queue an artifact for writing and return its path, or None if the size cap is reached.
+
+        `payload` is the base64 PNG for screenshots and the XML for page sources,
+        as the driver returns them; hashing it here is cheap, decoding and
+        compressing is left to the writer.
+        """
+        digest = hashlib.sha256(payload.encode('utf-8')).hexdigest()
+        path = os.path.join(self.run_dir, "objects", digest[:2], digest + _EXTENSIONS[kind])
+        with self._lock:
+            duplicate = digest in self._paths
+            if not duplicate:
+                # Raw size as the upper bound; the writer corrects it after compressing
+                size = len(payload) * 3 // 4 if kind == "screenshot" else len(payload)
+                if self.stored_bytes + size > self.max_bytes:
+                    self.dropped += 1
+                    if self.dropped == 1:
+                        print(f"⚠️ Artifact size cap of {self.max_bytes / (1024 * 1024):g} MB reached in "
+                              f"{self.run_dir}; further captures are dropped")
+                    return None
+                self.stored_bytes += size
+                self._paths[digest] = path
+        self._queue.put((name, kind, path, "" if duplicate else payload))
+        return path
+
+    def _write_loop(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                self._write(*item)
+            except Exception as e:
+                print(f"Error writing artifact: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _write(self, name: str, kind: str, path: str, payload: str):
+        size = None
+        if payload:
+            data = base64.b64decode(payload) if kind == "screenshot" else gzip.compress(payload.encode('utf-8'))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            size = len(data)
+            estimate = len(payload) * 3 // 4 if kind == "screenshot" else len(payload)
+            with self._lock:
+                self.stored_bytes -= estimate - size
+        entry = {"name": name, "kind": kind, "path": os.path.relpath(path, self.run_dir),
+                 "bytes": size, "duplicate": size is None,
+                 "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+        self._index.write(json.dumps(entry) + '\n')
+        self._index.flush()
+
+    def flush(self):
+        """Wait until everything queued so far is on disk."""
+        self._queue.join()
+
+    def close(self):
+        """Write what is queued and stop the writer thread."""
+        if not self._writer.is_alive():
+            return
+        self._queue.put(None)
+        self._writer.join()
+        self._index.close()
+
+
+def store() -> ArtifactStore:
+    """The artifact store of this run, created on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            run_dir = os.path.join(_root, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{os.getpid()}")
+            _store = ArtifactStore(run_dir, _max_bytes)
+        return _store
+
+
+def save(name: str, payloads: Dict[str, str]) -> List[str]:
+    """Queue already fetched payloads by kind; returns the paths of the stored artifacts."""
+    target = store()
+    paths = [target.add(name, kind, payload) for kind, payload in payloads.items() if payload]
+    paths = [p for p in paths if p]
+    if paths:
+        print(f"🪵 Saved {', '.join(k.replace('_', ' ') for k in payloads)} of {name} to {target.run_dir}")
+    return paths
+
+
+def capture(driver, name: str, kinds: Tuple[str, ...] = KINDS) -> List[str]:
+    """Fetch the screenshot and/or page source from the driver and save them in the background."""
+    payloads = {}
+    for kind in kinds:
+        try:
+            payloads[kind] = driver.get_screenshot_as_base64() if kind == "screenshot" else driver.page_source
+        except Exception as e:
+            print(f"Could not capture {kind.replace('_', ' ')}: {e}")
+    return save(name, payloads)
+
+
+def close():
+    """Finish writing this run's artifacts."""
+    global _store
+    with _store_lock:
+        if _store is not None:
+            _store.close()
+            _store = None
+
+
+atexit.register(close)
@@ -0,0 +1,529 @@
+"""
+Asyncio execution core: many Appium sessions driven from one thread.
+
+The Selenium client blocks its thread for every round-trip to the Appium
+server, so run_parallel() needs a thread per device that mostly waits on
+sockets. Here each session is a coroutine with its own keep-alive HTTP
+connection, and every wait yields to the event loop, so one process can
+coordinate a dozen emulators.
+
+Scenarios run the same flows as the synchronous runner (see ops.py): the
+reset and login of navigation.py and the step plans of steps.py, with their
+messages and verdicts, carried out by SessionOps. They produce the same
+result records (results_stream.make_result). Wait, text-entry and trace
+recorders are context variables, so every task keeps its own.
+
+    python test_runner.py -j test_cases.json --async -w 4 -d emulator-5554,emulator-5556,...
+"""
+import asyncio
+import base64
+import json
+import ssl
+import time
+import traceback
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from urllib.parse import unquote, urlsplit
+
+from selenium.webdriver.common.by import By
+from selenium.common.exceptions import (NoSuchElementException, StaleElementReferenceException,
+                                        WebDriverException)
+
+import artifacts
+import connection
+import driver_factory
+import form_fill
+import locators
+import navigation
+import ops
+import results_stream
+import screen_state
+import steps
+import tracing
+import waits
+from page_snapshot import PageSnapshot
+from screen_state import Screen
+
+ELEMENT_KEY = "element-6066-11e4-a52e-4f735466cecf"
+# Capabilities defined by W3C; everything else needs the appium: prefix
+W3C_CAPABILITIES = {"platformName", "browserName", "browserVersion", "acceptInsecureCerts", "pageLoadStrategy",
+                    "proxy", "setWindowRect", "timeouts", "unhandledPromptBehavior"}
+# Requests that can be sent again after a read error without repeating an action
+IDEMPOTENT_METHODS = {"GET", "HEAD", "PUT", "DELETE", "OPTIONS"}
+
+
+class ServerClosedConnection(ConnectionResetError):
+    """The server closed the connection without answering, as it does with idle keep-alive connections."""
+
+
+class KeepAliveConnection:
+    """
+    One persistent HTTP/1.1 connection to the Appium server, used by a single session.
+
+    Like connection.PooledConnection, it uses connection.TIMEOUT per request
+    and retries up to connection.RETRIES times with exponential backoff:
+    failed connects and idle connections the server closed are always
+    retried, other read errors only for idempotent methods, so a click is
+    never sent twice. https URLs use TLS, and credentials in the URL (as
+    device clouds hand them out) are sent as basic authentication.
+    """
+
+    def __init__(self, url: str, timeout: Optional[float] = None, ssl_context: Optional[ssl.SSLContext] = None):
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https"):
+            raise ValueError(f"Unsupported Appium server URL {url!r}: use http:// or https://")
+        self.host = parts.hostname or "127.0.0.1"
+        self.ssl = (ssl_context or ssl.create_default_context()) if parts.scheme == "https" else None
+        self.port = parts.port or (443 if self.ssl else 80)
+        self.authorization = None
+        if parts.username is not None:
+            credentials = f"{unquote(parts.username)}:{unquote(parts.password or '')}"
+            self.authorization = f"Basic {base64.b64encode(credentials.encode()).decode()}"
+        self.prefix = parts.path.rstrip("/")
+        self.timeout = connection.TIMEOUT if timeout is None else timeout
+        self.requests = 0
+        self.connects = 0
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+
+    async def _connect(self):
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port, ssl=self.ssl)
+        self.connects += 1
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+        self._reader = self._writer = None
+
+    async def request(self, method: str, path: str, body: Optional[Dict[str, Any]] = None) -> Tuple[int, Any]:
+        """Send a request and return (status, decoded JSON body)."""
+        data = json.dumps(body).encode() if body is not None else b""
+        head = (f"{method} {self.prefix}{path} HTTP/1.1\r\n"
+                f"Host: {self.host}:{self.port}\r\n"
+                "Accept: application/json\r\n"
+                "Content-Type: application/json;charset=UTF-8\r\n"
+                f"Content-Length: {len(data)}\r\n"
+                + (f"Authorization: {self.authorization}\r\n" if self.authorization else "")
+                + "Connection: keep-alive\r\n\r\n").encode()
+
+        for attempt in range(connection.RETRIES + 1):
+            if attempt:
+                await asyncio.sleep(connection.BACKOFF * 2 ** (attempt - 1))
+            reused = self._writer is not None
+            sent = False
+            try:
+                if not reused:
+                    await self._connect()
+                self._writer.write(head + data)
+                sent = True
+                await self._writer.drain()
+                status, headers, payload = await asyncio.wait_for(self._read_response(), self.timeout)
+                break
+            except asyncio.TimeoutError:
+                # A late answer would be read as the reply to the next request
+                await self.close()
+                raise
+            except ssl.SSLCertVerificationError:
+                await self.close()
+                raise
+            except (OSError, asyncio.IncompleteReadError) as e:
+                await self.close()
+                # The request never reached the server if the connect failed or
+                # the server had already closed the idle connection
+                unanswered = not sent or (reused and isinstance(e, ServerClosedConnection))
+                if attempt == connection.RETRIES or not (unanswered or method in IDEMPOTENT_METHODS):
+                    raise
+        self.requests += 1
+        if headers.get("connection", "").lower() == "close":
+            await self.close()
+        return status, json.loads(payload) if payload else None
+
+    async def _read_response(self) -> Tuple[int, Dict[str, str], bytes]:
+        status_line = await self._reader.readline()
+        if not status_line:
+            raise ServerClosedConnection("Connection closed by the server")
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = (await self._reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await self._reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    await self._reader.readline()
+                    break
+                chunks.append(await self._reader.readexactly(size))
+                await self._reader.readline()
+            return status, headers, b"".join(chunks)
+        return status, headers, await self._reader.readexactly(int(headers.get("content-length", 0)))
+
+
+class AsyncElement:
+    """A handle to an element in an AsyncSession."""
+
+    def __init__(self, session: "AsyncSession", element_id: str):
+        self.session = session
+        self.id = element_id
+
+    async def click(self):
+        await self.session.command("POST", f"/element/{self.id}/click", {}, "clickElement")
+
+    async def clear(self):
+        await self.session.command("POST", f"/element/{self.id}/clear", {}, "clearElement")
+
+    async def send_keys(self, text: str):
+        await self.session.command("POST", f"/element/{self.id}/value", {"text": text, "value": list(text)},
+                                   "sendKeysToElement")
+
+    async def text(self) -> str:
+        return await self.session.command("GET", f"/element/{self.id}/text", None, "getElementText")
+
+
+class AsyncSession:
+    """A WebDriver session spoken to over its own keep-alive connection."""
+
+    def __init__(self, server_url: str, lane: str):
+        self.connection = KeepAliveConnection(server_url)
+        self.lane = lane
+        self.session_id: Optional[str] = None
+        self.capabilities: Dict[str, Any] = {}
+        # Text entry and scroll strategies the server rejected
+        self.unsupported: Set[str] = set()
+
+    async def start(self, capabilities: Dict[str, Any]):
+        caps = {k if k in W3C_CAPABILITIES or ":" in k else f"appium:{k}": v for k, v in capabilities.items()}
+        value = await self._send("POST", "/session", {"capabilities": {"alwaysMatch": caps, "firstMatch": [{}]}},
+                                 "newSession")
+        self.session_id = value["sessionId"]
+        self.capabilities = value.get("capabilities") or capabilities
+
+    async def quit(self):
+        try:
+            if self.session_id:
+                await self.command("DELETE", "", None, "quit")
+        finally:
+            self.session_id = None
+            await self.connection.close()
+
+    async def command(self, method: str, path: str, body: Optional[Dict[str, Any]], name: str) -> Any:
+        return await self._send(method, f"/session/{self.session_id}{path}", body, name)
+
+    async def _send(self, method: str, path: str, body: Optional[Dict[str, Any]], name: str) -> Any:
+        tracer = tracing.current_tracer()
+        if tracer is not None:
+            tracer.command(name)
+        status, payload = await self.connection.request(method, path, body)
+        value = payload.get("value") if isinstance(payload, dict) else None
+        if status >= 400 or (isinstance(value, dict) and "error" in value):
+            error = value.get("error", "") if isinstance(value, dict) else ""
+            message = value.get("message", "") if isinstance(value, dict) else str(payload)
+            if error == "no such element":
+                raise NoSuchElementException(message)
+            if error == "stale element reference":
+                raise StaleElementReferenceException(message)
+            raise WebDriverException(f"{error or status}: {message}")
+        return value
+
+    async def find_elements(self, by: str, value: str) -> List[AsyncElement]:
+        found = await self.command("POST", "/elements", {"using": by, "value": value}, "findElements")
+        return [AsyncElement(self, element[ELEMENT_KEY]) for element in found]
+
+    async def page_source(self) -> str:
+        return await self.command("GET", "/source", None, "getPageSource")
+
+    async def snapshot(self) -> PageSnapshot:
+        return PageSnapshot(await self.page_source())
+
+    async def execute_script(self, script: str, args: Optional[Dict[str, Any]] = None) -> Any:
+        return await self.command("POST", "/execute/sync", {"script": script, "args": [args or {}]},
+                                  "w3cExecuteScript")
+
+    async def execute_driver(self, script: str) -> Any:
+        """Run a WebdriverIO script through Appium's execute-driver plugin."""
+        return await self.command("POST", "/appium/execute_driver", {"script": script, "type": "webdriverio"},
+                                  "executeDriverScript")
+
+    async def swipe(self, start_x: int, start_y: int, end_x: int, end_y: int, duration: int = 0):
+        """Touch swipe as a W3C action sequence, like the Appium client's swipe()."""
+        actions = [{
+            "type": "pointer", "id": "finger", "parameters": {"pointerType": "touch"},
+            "actions": [
+                {"type": "pointerMove", "duration": 0, "x": start_x, "y": start_y},
+                {"type": "pointerDown", "button": 0},
+                {"type": "pointerMove", "duration": duration, "x": end_x, "y": end_y},
+                {"type": "pointerUp", "button": 0},
+            ],
+        }]
+        await self.command("POST", "/actions", {"actions": actions}, "w3cActions")
+
+    async def screenshot_base64(self) -> str:
+        return await self.command("GET", "/screenshot", None, "screenshot")
+
+
+async def wait_until(session: AsyncSession, condition: Callable[[AsyncSession], Awaitable[Any]], step: str,
+                     timeout: Optional[float] = None, poll_interval: Optional[float] = None):
+    """
+    Await `condition(session)` until it returns a truthy value or the timeout expires.
+
+    The coroutine counterpart of waits.wait_until: other sessions run while
+    this one sleeps between polls. Returns the value, or None on timeout.
+    """
+    timeout = waits.timeout_for(step, timeout)
+    poll_interval = waits.DEFAULT_POLL_INTERVAL if poll_interval is None else poll_interval
+
+    started = time.monotonic()
+    result = None
+    while True:
+        try:
+            result = await condition(session)
+        except NoSuchElementException:
+            result = None
+        if result or time.monotonic() - started >= timeout:
+            break
+        await asyncio.sleep(poll_interval)
+
+    waits.record(step, time.monotonic() - started, bool(result), timeout)
+    return result or None
+
+
+async def wait_for_any_xpath(session: AsyncSession, xpaths: List[str], step: str,
+                             timeout: Optional[float] = None) -> Optional[str]:
+    async def any_present(s):
+        for xpath in xpaths:
+            if await s.find_elements(By.XPATH, xpath):
+                return xpath
+        return False
+
+    return await wait_until(session, any_present, step, timeout=timeout)
+
+
+# (screen, field) -> index of the strategy that last found the field
+_winning_strategy: Dict[Tuple[str, str], int] = {}
+
+
+async def find(session: AsyncSession, screen: str, field: str, timeout: float = 5, step: Optional[str] = None,
+               **params) -> Optional[AsyncElement]:
+    """Find a field on a screen, trying the last winning strategy first; None if it is missing."""
+    candidates = list(enumerate(locators.strategies(screen, field, **params)))
+    winner = _winning_strategy.get((screen, field))
+    if winner is not None and winner < len(candidates):
+        candidates.sort(key=lambda candidate: candidate[0] != winner)
+
+    async def first_match(s):
+        for index, (by, value) in candidates:
+            found = await s.find_elements(by, value)
+            if found:
+                _winning_strategy[(screen, field)] = index
+                return found[0]
+        return False
+
+    try:
+        return await wait_until(session, first_match, step or f"{screen}.{field}", timeout=timeout)
+    except WebDriverException:
+        return None
+
+
+async def find_group(session: AsyncSession, screen: str, fields: List[str], timeout: float = 5,
+                     step: Optional[str] = None) -> List[Optional[AsyncElement]]:
+    """Find several fields with one XPath union, like locators.find_group."""
+    candidates = [locators.strategies(screen, field) for field in fields]
+    if len(fields) > 1 and all(len(c) == 1 and c[0][0] == By.XPATH for c in candidates):
+        union = " | ".join(c[0][1] for c in candidates)
+
+        async def all_present(s):
+            found = await s.find_elements(By.XPATH, union)
+            return found if len(found) == len(fields) else False
+
+        found = await wait_until(session, all_present, step or f"{screen}.{'+'.join(fields)}", timeout=timeout)
+        if found:
+            return found
+        # Something is missing; a single attempt per field tells which one
+        return [await find(session, screen, field, timeout=0) for field in fields]
+    return [await find(session, screen, field, timeout=timeout, step=step) for field in fields]
+
+
+class SessionOps:
+    """The ops of ops.py on an AsyncSession, so flows run on the event loop."""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def snapshot(self) -> PageSnapshot:
+        return await self.session.snapshot()
+
+    async def find(self, screen: str, field: str, timeout: float = 5, step: Optional[str] = None, **params):
+        return await find(self.session, screen, field, timeout=timeout, step=step, **params)
+
+    async def find_group(self, screen: str, fields: List[str], timeout: float = 5, step: Optional[str] = None):
+        return await find_group(self.session, screen, fields, timeout=timeout, step=step)
+
+    async def find_elements(self, by: str, value: str) -> List[AsyncElement]:
+        return await self.session.find_elements(by, value)
+
+    async def text(self, element: AsyncElement) -> str:
+        return await element.text()
+
+    async def click(self, element: AsyncElement):
+        await element.click()
+
+    async def clear(self, element: AsyncElement):
+        await element.clear()
+
+    async def send_keys(self, element: AsyncElement, text: str):
+        await element.send_keys(text)
+
+    async def execute(self, script: str, args: Optional[Dict[str, Any]] = None) -> Any:
+        return await self.session.execute_script(script, args)
+
+    async def execute_driver(self, script: str) -> Any:
+        return await self.session.execute_driver(script)
+
+    async def swipe(self, start_x: int, start_y: int, end_x: int, end_y: int, duration: int = 0):
+        await self.session.swipe(start_x, start_y, end_x, end_y, duration)
+
+    async def invalidate(self):
+        pass  # every find asks the server again; no handles are cached
+
+    async def wait_for_xpaths(self, xpaths: List[str], step: str, timeout: Optional[float] = None) -> Optional[str]:
+        return await wait_for_any_xpath(self.session, xpaths, step, timeout=timeout)
+
+    async def wait_for_screen(self, screens, step: str,
+                              timeout: Optional[float] = None) -> Optional[screen_state.ScreenState]:
+        screens = (screens,) if isinstance(screens, Screen) else tuple(screens)
+
+        async def shown(s):
+            state = screen_state.classify(await s.snapshot())
+            return state if state.screen in screens else False
+
+        return await wait_until(self.session, shown, step, timeout=timeout)
+
+    async def unsupported(self) -> Set[str]:
+        return self.session.unsupported
+
+
+async def capture_artifacts(session: AsyncSession, result: Dict[str, Any]) -> Dict[str, Any]:
+    """Save the screen of a failed scenario to the result, like test_runner.capture_artifacts."""
+    if artifacts.wanted(result['success']):
+        payloads = {}
+        for kind, fetch in (("screenshot", session.screenshot_base64), ("page_source", session.page_source)):
+            try:
+                payloads[kind] = await fetch()
+            except Exception as e:
+                print(f"Could not capture {kind.replace('_', ' ')}: {e}")
+        paths = artifacts.save(result['scenario_id'], payloads)
+        if paths:
+            result["artifacts"] = paths
+    return result
+
+
+async def run_scenario(session: AsyncSession, test_case: Dict[str, Any], scenario: Dict[str, Any],
+                       run_options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Reset the app, log in and run a single scenario, returning its result record."""
+    run_options = run_options or {}
+    waits.start_recording(driver_factory.device_id(session.capabilities))
+    form_fill.start_recording()
+    tracing.start_trace(scenario['scenario_id'], lane=session.lane)
+    backend = SessionOps(session)
+
+    with tracing.span("reset"):
+        reset_path = await ops.run_async(navigation.reset_flow(run_options.get("full_reset", False)), backend)
+    if not reset_path:
+        return await capture_artifacts(session, results_stream.make_result(test_case, scenario, False,
+                                                                           "Failed to reset app"))
+    print(f"[{session.lane}] App reset via: {reset_path}")
+
+    with tracing.span("login"):
+        logged_in = await ops.run_async(navigation.login_flow(), backend)
+    if not logged_in:
+        result = results_stream.make_result(test_case, scenario, False, "Failed to login")
+        result["reset_path"] = reset_path
+        return await capture_artifacts(session, result)
+
+    print(f"[{session.lane}] Running Scenario: {scenario['scenario_id']} - {scenario['description']}")
+    with tracing.span("scenario"):
+        plan = run_options.get("plans", {}).get(scenario['scenario_id'])
+        try:
+            success, message = await ops.run_async(steps.plan_flow(plan or steps.compile_plan(scenario), scenario),
+                                                   backend)
+        except Exception as e:
+            print(f"General error in test scenario: {e}")
+            traceback.print_exc()
+            success, message = False, f"Test failed with general exception: {e}"
+
+    if success:
+        print(f"\n✅ Scenario {scenario['scenario_id']} PASSED: {message}")
+    else:
+        print(f"\n❌ Scenario {scenario['scenario_id']} FAILED: {message}")
+
+    result = results_stream.make_result(test_case, scenario, success, message)
+    result["reset_path"] = reset_path
+    return await capture_artifacts(session, result)
+
+
+async def run_sessions(test_cases: List[Dict[str, Any]], devices: List[Dict[str, Any]],
+                       run_options: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """
+    Run all scenarios on one session per device, all in the current event loop.
+
+    Sessions pull scenarios from a shared queue, like run_parallel(), and the
+    results come back in test case file order.
+    """
+    work: asyncio.Queue = asyncio.Queue()
+    ordered = []
+    for test_case in test_cases:
+        for scenario in test_case['scenarios']:
+            work.put_nowait((len(ordered), test_case, scenario))
+            ordered.append((test_case, scenario))
+    results: List[Optional[Dict[str, Any]]] = [None] * len(ordered)
+
+    async def worker(worker_id: int, device: Dict[str, Any]):
+        session = AsyncSession(driver_factory.SERVER_URL, f"session {worker_id}")
+        try:
+            await session.start(driver_factory.capabilities(device["udid"], device["system_port"]))
+        except Exception as e:
+            print(f"❌ [session {worker_id}] Could not start session on {device['udid']}: {e}")
+            await session.connection.close()
+            return
+
+        print(f"[session {worker_id}] Session started on {device['udid']}")
+        try:
+            while not work.empty():
+                index, test_case, scenario = work.get_nowait()
+                print(f"[session {worker_id}] Picked up scenario {scenario['scenario_id']}")
+                try:
+                    results[index] = await run_scenario(session, test_case, scenario, run_options)
+                except Exception as e:
+                    traceback.print_exc()
+                    results[index] = results_stream.make_result(test_case, scenario, False, f"Worker error: {e}")
+                results_stream.report_result(results[index], run_options)
+        finally:
+            try:
+                await session.quit()
+            except Exception as e:
+                print(f"[session {worker_id}] Error ending session: {e}")
+            print(f"[session {worker_id}] {session.connection.requests} requests over "
+                  f"{session.connection.connects} connection(s)")
+
+    # Each task runs in a copy of the current context, so recorders stay per session
+    await asyncio.gather(*(worker(i + 1, device) for i, device in enumerate(devices)))
+
+    for index, (test_case, scenario) in enumerate(ordered):
+        if results[index] is None:
+            results[index] = results_stream.make_result(test_case, scenario, False,
+                                                        "Not run: no worker session available")
+    return results
+
+
+def run(test_cases: List[Dict[str, Any]], devices: List[Dict[str, Any]],
+        run_options: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """Run the scenarios with the asyncio core and return their results."""
+    return asyncio.run(run_sessions(test_cases, devices, run_options))
@@ -0,0 +1,343 @@
+"""
+Benchmark the test runner against the fake Appium server.
+
+Runs the scenarios from a test case file, optionally repeated up to a
+synthetic scenario count, and measures where the time goes:
+
+- throughput in scenarios per minute
+- p50 / p95 / p99 latency of every traced step and of whole scenarios
+- WebDriver round-trips per scenario, in total and per command
+- time spent in fixed sleeps, in condition-driven waits and in everything else
+
+Results are written as JSON so runs of different runner versions can be compared:
+
+    python benchmark.py -j test_cases.json --scenarios 2000 --workers 4 --latency 0.01 -o bench.json
+    python benchmark.py -j test_cases.json --baseline bench.json
+"""
+import argparse
+import contextlib
+import json
+import math
+import os
+import queue
+import random
+import sys
+import tempfile
+import threading
+import time
+import traceback
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import artifacts
+import connection
+import driver_factory
+import results_stream
+import steps
+import test_runner
+import waits
+from fake_appium_server import FakeAppiumServer
+
+
+# Module whose polling sleeps are part of a wait, and already counted as wait time
+_WAIT_MODULE = "selenium.webdriver.support.wait"
+
+
+class SleepMeter:
+    """
+    Accounts for time.sleep calls, per thread, in every module.
+
+    install() replaces time.sleep itself, so fixed sleeps anywhere in the
+    harness or its libraries are counted. The polling sleeps of WebDriverWait
+    are left out, because the wait records already include them.
+    """
+
+    def __init__(self):
+        self._sleep = time.sleep
+        self._local = threading.local()
+
+    def install(self):
+        time.sleep = self.sleep
+
+    def uninstall(self):
+        time.sleep = self._sleep
+
+    def sleep(self, seconds: float):
+        if sys._getframe(1).f_globals.get("__name__") != _WAIT_MODULE:
+            self._local.total = self.total() + seconds
+        self._sleep(seconds)
+
+    def reset(self):
+        self._local.total = 0.0
+
+    def total(self) -> float:
+        return getattr(self._local, "total", 0.0)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile; 0.0 for an empty list."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(len(ordered) * pct / 100))
+    return round(ordered[rank - 1], 4)
+
+
+def latency_summary(values: List[float]) -> Dict[str, Any]:
+    return {
+        "count": len(values),
+        "mean": round(sum(values) / len(values), 4) if values else 0.0,
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": round(max(values), 4) if values else 0.0,
+    }
+
+
+def synthetic_work(test_cases: List[Dict[str, Any]], count: int, seed: int) -> List[tuple]:
+    """
+    Build (test_case, scenario) pairs for the benchmark.
+
+    With count <= 0 every scenario runs once in file order. Otherwise the file's
+    scenarios are repeated with numbered ids until `count` is reached and the
+    order is shuffled with `seed`, so repeated runs use the same sequence.
+    """
+    base = [(tc, sc) for tc in test_cases for sc in tc['scenarios']]
+    if count <= 0 or not base:
+        return base
+
+    work = []
+    for n in range(count):
+        test_case, scenario = base[n % len(base)]
+        copy = dict(scenario, scenario_id=f"{scenario['scenario_id']}#{n // len(base) + 1}")
+        work.append((test_case, copy))
+    random.Random(seed).shuffle(work)
+    return work
+
+
+def run_benchmark(server: FakeAppiumServer, work: List[tuple], workers: int,
+                  run_options: Dict[str, Any], sleep_meter: SleepMeter) -> List[Dict[str, Any]]:
+    """Run the work on `workers` sessions and return one measurement per scenario."""
+    pending = queue.Queue()
+    for index, item in enumerate(work):
+        pending.put((index, item))
+    samples: List[Optional[Dict[str, Any]]] = [None] * len(work)
+
+    def worker(worker_id: int):
+        try:
+            driver = test_runner.create_driver(f"fake-{worker_id}", 8200 + worker_id)
+        except Exception as e:
+            print(f"❌ [worker {worker_id}] Could not start session: {e}")
+            return
+        session = server.sessions[driver.session_id]
+        try:
+            while True:
+                try:
+                    index, (test_case, scenario) = pending.get_nowait()
+                except queue.Empty:
+                    break
+                before = Counter(session.command_counts)
+                sleep_meter.reset()
+                started = time.perf_counter()
+                try:
+                    result = test_runner.run_scenario(driver, test_case, scenario, run_options)
+                except Exception as e:
+                    traceback.print_exc()
+                    result = results_stream.make_result(test_case, scenario, False, f"Worker error: {e}")
+                elapsed = time.perf_counter() - started
+                commands = Counter(session.command_counts)
+                commands.subtract(before)
+                samples[index] = {
+                    "scenario_id": scenario['scenario_id'],
+                    "success": result['success'],
+                    "seconds": elapsed,
+                    "sleep_seconds": sleep_meter.total(),
+                    "wait_seconds": result.get('wait_seconds', 0.0),
+                    "steps": result.get('steps', []),
+                    "commands": {name: n for name, n in commands.items() if n},
+                }
+        finally:
+            driver_factory.release_driver(driver)
+
+    threads = [threading.Thread(target=worker, args=(i + 1,), daemon=True) for i in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return [s for s in samples if s is not None]
+
+
+def summarize(samples: List[Dict[str, Any]], wall_seconds: float) -> Dict[str, Any]:
+    """Aggregate per-scenario measurements into the benchmark report."""
+    step_seconds: Dict[str, List[float]] = {}
+    all_steps = []
+    for sample in samples:
+        names = [span['name'] for span in sample['steps']]
+        for span in sample['steps']:
+            step_seconds.setdefault(span['name'], []).append(span['seconds'])
+            # Only innermost spans count towards the overall figure, so no time is counted twice
+            if not any(name.startswith(span['name'] + '/') for name in names):
+                all_steps.append(span['seconds'])
+
+    round_trips = [sum(s['commands'].values()) for s in samples]
+    by_command: Counter = Counter()
+    for sample in samples:
+        by_command.update(sample['commands'])
+
+    total = sum(s['seconds'] for s in samples)
+    sleep = sum(s['sleep_seconds'] for s in samples)
+    wait = sum(s['wait_seconds'] for s in samples)
+    work = max(total - sleep - wait, 0.0)
+    n = len(samples) or 1
+
+    return {
+        "scenarios": len(samples),
+        "passed": sum(1 for s in samples if s['success']),
+        "wall_seconds": round(wall_seconds, 3),
+        "scenarios_per_minute": round(len(samples) / wall_seconds * 60, 2) if wall_seconds else 0.0,
+        "scenario_latency": latency_summary([s['seconds'] for s in samples]),
+        "step_latency": {
+            "all": latency_summary(all_steps),
+            "by_step": {step: latency_summary(values) for step, values in sorted(step_seconds.items())},
+        },
+        "round_trips": {
+            "per_scenario": latency_summary(round_trips),
+            "seconds_per_round_trip": round(total / sum(round_trips), 5) if sum(round_trips) else 0.0,
+            "by_command_per_scenario": {name: round(count / n, 2) for name, count in by_command.most_common()},
+        },
+        "time_split": {
+            "sleep_seconds": round(sleep, 3),
+            "wait_seconds": round(wait, 3),
+            "work_seconds": round(work, 3),
+            "sleep_fraction": round(sleep / total, 4) if total else 0.0,
+            "wait_fraction": round(wait / total, 4) if total else 0.0,
+            "work_fraction": round(work / total, 4) if total else 0.0,
+        },
+    }
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any]):
+    """Print how the headline numbers moved relative to a previous report."""
+    rows = [
+        ("scenarios/min", report['scenarios_per_minute'], baseline['scenarios_per_minute']),
+        ("scenario p95 (s)", report['scenario_latency']['p95'], baseline['scenario_latency']['p95']),
+        ("step p95 (s)", report['step_latency']['all']['p95'], baseline['step_latency']['all']['p95']),
+        ("round-trips/scenario", report['round_trips']['per_scenario']['mean'],
+         baseline['round_trips']['per_scenario']['mean']),
+    ]
+    print(f"\nCompared with {baseline.get('label') or 'baseline'}:")
+    for name, now, before in rows:
+        change = f"{(now - before) / before * 100:+.1f}%" if before else "n/a"
+        print(f"  {name:<22} {before:>10} -> {now:<10} ({change})")
+
+
+def parse_command_latency(spec: str) -> Dict[str, float]:
+    latency = {}
+    for entry in filter(None, spec.split(',')):
+        name, _, seconds = entry.partition('=')
+        latency[name.strip()] = float(seconds)
+    return latency
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the test runner against the fake Appium server')
+    parser.add_argument('--json', '-j', default='test_cases.json', help='Path to JSON file with test cases')
+    parser.add_argument('--output', '-o', default='benchmark_results.json', help='Path to output JSON report')
+    parser.add_argument('--scenarios', '-n', type=int, default=0,
+                        help='Repeat the file\'s scenarios up to this many (default: each once)')
+    parser.add_argument('--workers', '-w', type=int, default=1, help='Number of parallel sessions')
+    parser.add_argument('--seed', type=int, default=1, help='Seed for the synthetic scenario order')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds the server adds to every command')
+    parser.add_argument('--command-latency', default='',
+                        help='Extra latency per command, e.g. "source=0.3,element_click=0.1"')
+    parser.add_argument('--transition-delay', type=float, default=0.0,
+                        help='Seconds the login success page stays up before the survey')
+    parser.add_argument('--full-reset', action='store_true', help='Restart the app between scenarios')
+    parser.add_argument('--fast-fail', action='store_true',
+                        help='Stop negative scenarios at the first expected error after pressing Send')
+    parser.add_argument('--label', help='Name of the runner version being measured')
+    parser.add_argument('--baseline', help='Previous report to compare against')
+    parser.add_argument('--verbose', '-v', action='store_true', help='Show the runner\'s own output')
+    args = parser.parse_args()
+
+    test_data = test_runner.load_test_cases(args.json)
+    work = synthetic_work(test_data['test_cases'], args.scenarios, args.seed)
+    print(f"Benchmarking {len(work)} scenarios on {args.workers} worker(s)")
+
+    plans = {scenario['scenario_id']: steps.compile_plan(scenario, args.fast_fail) for _, scenario in work}
+    run_options = {"full_reset": args.full_reset, "plans": plans}
+
+    sleep_meter = SleepMeter()
+    sleep_meter.install()
+    server = FakeAppiumServer(latency=args.latency, command_latency=parse_command_latency(args.command_latency),
+                              transition_delay=args.transition_delay).start()
+    driver_factory.configure(server_url=server.url)
+    connection.configure(pool_size=max(connection.POOL_SIZE, args.workers))
+
+    # Keep failure artifacts and anything else written to the working directory out of the way
+    cwd = os.getcwd()
+    try:
+        output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(open(os.devnull, 'w'))
+        with tempfile.TemporaryDirectory() as scratch, output:
+            os.chdir(scratch)
+            artifacts.configure(root=os.path.join(scratch, "artifacts"))
+            started = time.perf_counter()
+            samples = run_benchmark(server, work, args.workers, run_options, sleep_meter)
+            wall_seconds = time.perf_counter() - started
+            artifacts.close()
+            os.chdir(cwd)
+    finally:
+        os.chdir(cwd)
+        driver_factory.pool.close(keep_sessions=False)
+        http = connection.stats()
+        connection.shutdown()
+        server.stop()
+        sleep_meter.uninstall()
+
+    report = {
+        "label": args.label,
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "config": {
+            "test_cases": args.json,
+            "workers": args.workers,
+            "seed": args.seed,
+            "latency": args.latency,
+            "command_latency": parse_command_latency(args.command_latency),
+            "transition_delay": args.transition_delay,
+            "full_reset": args.full_reset,
+            "fast_fail": args.fast_fail,
+            "wait_timeout": waits.DEFAULT_TIMEOUT,
+            "poll_interval": waits.DEFAULT_POLL_INTERVAL,
+        },
+    }
+    report.update(summarize(samples, wall_seconds))
+    report["http"] = http
+
+    split = report['time_split']
+    print(f"✅ {report['passed']}/{report['scenarios']} scenarios passed in {report['wall_seconds']}s "
+          f"({report['scenarios_per_minute']} scenarios/min)")
+    print(f"Step latency p50/p95/p99: {report['step_latency']['all']['p50']}s / "
+          f"{report['step_latency']['all']['p95']}s / {report['step_latency']['all']['p99']}s")
+    print(f"Round-trips per scenario: {report['round_trips']['per_scenario']['mean']}")
+    print(f"HTTP connections: {report['http']['connections']} for {report['http']['requests']} requests")
+    print(f"Time split: sleep {split['sleep_fraction']:.1%}, wait {split['wait_fraction']:.1%}, "
+          f"work {split['work_fraction']:.1%}")
+
+    if args.baseline:
+        try:
+            with open(args.baseline) as f:
+                compare(report, json.load(f))
+        except Exception as e:
+            print(f"Error reading baseline: {e}")
+
+    try:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nBenchmark report saved to {args.output}")
+    except Exception as e:
+        print(f"Error saving report: {e}")
+
+
+if __name__ == "__main__":
+    main()
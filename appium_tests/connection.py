@@ -0,0 +1,186 @@
+"""
+Shared, pooled HTTP command executor for Appium sessions.
+
+webdriver.Remote("http://...") gives every driver its own default client:
+no retries, the socket's default timeout and a pool sized for one session.
+create_remote() instead hands all drivers for the same server one
+PooledConnection, whose urllib3 pool keeps a connection per parallel session
+alive, enables TCP keep-alive so idle connections to a device cloud survive
+NATs and load balancers, and retries connection resets with exponential
+backoff. Read errors are only retried for idempotent methods, so a click is
+never sent twice.
+
+Every connection opened and every request sent is counted, so the runner
+can report how many requests reused an open connection.
+
+Settings come from configure(), or from the environment: APPIUM_POOL_SIZE,
+APPIUM_HTTP_TIMEOUT, APPIUM_HTTP_RETRIES, APPIUM_HTTP_BACKOFF and
+APPIUM_TCP_KEEPALIVE (0 to disable).
+"""
+import os
+import socket
+import threading
+from typing import Any, Dict, Optional
+
+from appium import webdriver
+from appium.webdriver.appium_connection import AppiumConnection
+from appium.webdriver.client_config import AppiumClientConfig
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+POOL_SIZE = int(os.environ.get("APPIUM_POOL_SIZE", 8))
+TIMEOUT = float(os.environ.get("APPIUM_HTTP_TIMEOUT", 120))
+RETRIES = int(os.environ.get("APPIUM_HTTP_RETRIES", 3))
+BACKOFF = float(os.environ.get("APPIUM_HTTP_BACKOFF", 0.5))
+TCP_KEEPALIVE = os.environ.get("APPIUM_TCP_KEEPALIVE", "1") != "0"
+
+_executors: Dict[str, "PooledConnection"] = {}
+_executors_lock = threading.Lock()
+
+
+def configure(pool_size: Optional[int] = None, timeout: Optional[float] = None, retries: Optional[int] = None,
+              backoff: Optional[float] = None, tcp_keepalive: Optional[bool] = None):
+    """Override the settings for executors created from now on."""
+    global POOL_SIZE, TIMEOUT, RETRIES, BACKOFF, TCP_KEEPALIVE
+    if pool_size is not None:
+        POOL_SIZE = pool_size
+    if timeout is not None:
+        TIMEOUT = timeout
+    if retries is not None:
+        RETRIES = retries
+    if backoff is not None:
+        BACKOFF = backoff
+    if tcp_keepalive is not None:
+        TCP_KEEPALIVE = tcp_keepalive
+
+
+class PoolStats:
+    """Connections opened, requests sent and retries made by one executor."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connections = 0
+        self.requests = 0
+        self.retries = 0
+
+    def count(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    @property
+    def reused(self) -> int:
+        """Requests sent over a connection that was already open."""
+        return max(self.requests - self.connections, 0)
+
+    def as_dict(self) -> Dict[str, int]:
+        return {"connections": self.connections, "requests": self.requests,
+                "reused": self.reused, "retries": self.retries}
+
+
+class _CountingRetry(Retry):
+    """Retry that counts every retry it allows in the executor's stats."""
+
+    stats: Optional[PoolStats] = None
+
+    def new(self, **kw):
+        retry = super().new(**kw)
+        retry.stats = self.stats
+        return retry
+
+    def increment(self, *args, **kwargs):
+        retry = super().increment(*args, **kwargs)
+        if self.stats is not None:
+            self.stats.count("retries")
+        return retry
+
+
+def _counting_pools(stats: PoolStats) -> Dict[str, type]:
+    """urllib3 pool classes whose connections report to `stats`."""
+    def connection_class(base):
+        def connect(self):
+            base.connect(self)
+            stats.count("connections")
+
+        def request(self, *args, **kwargs):
+            result = base.request(self, *args, **kwargs)
+            stats.count("requests")
+            return result
+
+        return type(f"Counting{base.__name__}", (base,), {"connect": connect, "request": request})
+
+    return {
+        "http": type("CountingHTTPConnectionPool", (HTTPConnectionPool,),
+                     {"ConnectionCls": connection_class(HTTPConnection)}),
+        "https": type("CountingHTTPSConnectionPool", (HTTPSConnectionPool,),
+                      {"ConnectionCls": connection_class(HTTPSConnection)}),
+    }
+
+
+class PooledConnection(AppiumConnection):
+    """An AppiumConnection meant to be shared by all drivers talking to one server."""
+
+    def __init__(self, url: str):
+        self.stats = PoolStats()
+        retry = _CountingRetry(total=RETRIES, connect=RETRIES, read=RETRIES, status=0, other=0, redirect=0,
+                               backoff_factor=BACKOFF, raise_on_status=False)
+        retry.stats = self.stats
+        socket_options = list(HTTPConnection.default_socket_options)
+        if TCP_KEEPALIVE:
+            socket_options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+        pool_args = {
+            "maxsize": POOL_SIZE,
+            # Never wait for a free connection: urllib3 empties its pools at interpreter exit, before
+            # atexit handlers quit the pooled sessions. Extra connections are closed after use.
+            "block": False,
+            "retries": retry,
+            "socket_options": socket_options,
+        }
+        # RemoteConnection reads the pool arguments from this nested key
+        config = AppiumClientConfig(url, keep_alive=True, timeout=TIMEOUT,
+                                    init_args_for_pool_manager={"init_args_for_pool_manager": pool_args})
+        super().__init__(client_config=config)
+
+    def _get_connection_manager(self):
+        manager = super()._get_connection_manager()
+        manager.pool_classes_by_scheme = _counting_pools(self.stats)
+        return manager
+
+    def close(self):
+        """Keep the pool open; other drivers share it. See shutdown()."""
+
+    def shutdown(self):
+        """Close every pooled connection."""
+        super().close()
+
+
+def executor(url: str) -> PooledConnection:
+    """Return the shared executor for a server URL, creating it on first use."""
+    with _executors_lock:
+        if url not in _executors:
+            _executors[url] = PooledConnection(url)
+        return _executors[url]
+
+
+def create_remote(url: str, options: Any):
+    """webdriver.Remote on the shared pooled executor for `url`."""
+    return webdriver.Remote(command_executor=executor(url), options=options)
+
+
+def stats() -> Dict[str, int]:
+    """Counters summed over all executors."""
+    total = PoolStats()
+    with _executors_lock:
+        for connection in _executors.values():
+            total.connections += connection.stats.connections
+            total.requests += connection.stats.requests
+            total.retries += connection.stats.retries
+    return total.as_dict()
+
+
+def shutdown():
+    """Close all shared executors."""
+    with _executors_lock:
+        for connection in _executors.values():
+            connection.shutdown()
+        _executors.clear()
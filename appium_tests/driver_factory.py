@@ -0,0 +1,306 @@
+"""
+One place to build Appium drivers, and a pool of warm sessions to reuse.
+
+Capabilities are layered, later layers winning:
+  1. DEFAULT_CAPABILITIES below
+  2. a JSON file: --caps-file, or the APPIUM_CAPS_FILE environment variable
+  3. environment variables: APPIUM_PLATFORM_VERSION, APPIUM_DEVICE_NAME,
+     APPIUM_UDID, APPIUM_APP_PACKAGE, APPIUM_APP_ACTIVITY
+  4. --cap NAME=VALUE on the command line (VALUE is parsed as JSON if it can be)
+  5. what the caller passes, e.g. the udid and systemPort of a parallel worker
+
+Creating a UiAutomator2 session takes 10-30 s, so get_driver() hands out a
+warm session with the same capabilities when one is idle in the pool, and
+release_driver() puts it back instead of quitting it. Idle sessions are
+checked with one cheap command before reuse. With --keep-sessions
+(APPIUM_KEEP_SESSIONS=1) sessions are left running when the process exits and
+their ids are saved, so the next run attaches to them instead of starting new
+ones; newCommandTimeout makes Appium end sessions nobody comes back for.
+
+A reused session keeps the app where the previous user left it; the runner
+resets the app before every scenario anyway.
+"""
+import atexit
+import json
+import os
+import tempfile
+import threading
+from typing import Any, Dict, List, Optional
+
+from appium import webdriver
+from appium.options.android import UiAutomator2Options
+from appium.webdriver.mobilecommand import MobileCommand
+
+import connection
+
+SERVER_URL = os.environ.get("APPIUM_SERVER_URL", "http://127.0.0.1:4723")
+
+DEFAULT_CAPABILITIES: Dict[str, Any] = {
+    "platformName": "Android",
+    "platformVersion": "16",
+    "deviceName": "emulator-5554",
+    "appPackage": "com.example.my_auth_app",
+    "appActivity": "com.example.my_auth_app.MainActivity",
+    "automationName": "UiAutomator2",
+    "noReset": True,
+    # Seconds without commands before Appium ends a session left in the pool
+    "newCommandTimeout": 600,
+}
+
+ENV_CAPABILITIES = {
+    "APPIUM_PLATFORM_VERSION": "platformVersion",
+    "APPIUM_DEVICE_NAME": "deviceName",
+    "APPIUM_UDID": "udid",
+    "APPIUM_APP_PACKAGE": "appPackage",
+    "APPIUM_APP_ACTIVITY": "appActivity",
+}
+
+SESSIONS_FILE = os.environ.get("APPIUM_SESSIONS_FILE",
+                               os.path.join(tempfile.gettempdir(), "appium_test_sessions.json"))
+
+# Set from the command line through configure()
+_caps_file: Optional[str] = os.environ.get("APPIUM_CAPS_FILE")
+_cli_capabilities: Dict[str, Any] = {}
+_keep_sessions = os.environ.get("APPIUM_KEEP_SESSIONS", "0") == "1"
+
+
+def add_arguments(parser):
+    """Add the driver options shared by all scripts to an argparse parser."""
+    parser.add_argument('--server-url', help=f'Appium server URL (default: {SERVER_URL})')
+    parser.add_argument('--caps-file', help='JSON file with capabilities overriding the defaults')
+    parser.add_argument('--cap', action='append', default=[], metavar='NAME=VALUE',
+                        help='Capability override, e.g. --cap platformVersion=14 (repeatable)')
+    parser.add_argument('--keep-sessions', action='store_true',
+                        help='Leave sessions running at exit and reuse them in the next run')
+
+
+def parse_cap(text: str) -> Dict[str, Any]:
+    """Parse NAME=VALUE, reading VALUE as JSON when possible (numbers, true/false)."""
+    name, sep, value = text.partition("=")
+    if not sep or not name.strip():
+        raise ValueError(f"Capability must look like NAME=VALUE: {text}")
+    try:
+        return {name.strip(): json.loads(value)}
+    except json.JSONDecodeError:
+        return {name.strip(): value}
+
+
+def configure(args=None, server_url: Optional[str] = None, caps_file: Optional[str] = None,
+              caps: Optional[Dict[str, Any]] = None, keep_sessions: Optional[bool] = None):
+    """Apply options parsed with add_arguments(), or the given values."""
+    global SERVER_URL, _caps_file, _keep_sessions
+    if args is not None:
+        server_url = server_url or args.server_url
+        caps_file = caps_file or args.caps_file
+        caps = dict(caps or {})
+        for text in args.cap:
+            caps.update(parse_cap(text))
+        keep_sessions = keep_sessions or args.keep_sessions or None
+    if server_url:
+        SERVER_URL = server_url
+    if caps_file:
+        _caps_file = caps_file
+    if caps:
+        _cli_capabilities.update(caps)
+    if keep_sessions is not None:
+        _keep_sessions = keep_sessions
+
+
+def capabilities(udid: Optional[str] = None, system_port: Optional[int] = None,
+                 overrides: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Desired capabilities from all layers, optionally bound to a specific device."""
+    caps = dict(DEFAULT_CAPABILITIES)
+    if _caps_file:
+        with open(_caps_file) as f:
+            caps.update(json.load(f))
+    for variable, name in ENV_CAPABILITIES.items():
+        if os.environ.get(variable):
+            caps[name] = os.environ[variable]
+    caps.update(_cli_capabilities)
+    # Each parallel session needs its own device and UiAutomator2 server port
+    if udid:
+        caps["udid"] = udid
+        caps["deviceName"] = udid
+    if system_port:
+        caps["systemPort"] = system_port
+    caps.update(overrides or {})
+    return caps
+
+
+def device_id(caps: Dict[str, Any]) -> str:
+    """The device a session runs on, from its capabilities, for per-device statistics."""
+    for name in ("udid", "appium:udid", "deviceName", "appium:deviceName"):
+        if caps.get(name):
+            return str(caps[name])
+    return "default"
+
+
+def _key(server_url: str, caps: Dict[str, Any]) -> str:
+    return json.dumps({"server": server_url, "caps": caps}, sort_keys=True)
+
+
+class _AttachedRemote(webdriver.Remote):
+    """A driver for a session that already exists on the server."""
+
+    def __init__(self, command_executor, session_id: str, options):
+        self._attach_to = session_id
+        super().__init__(command_executor=command_executor, options=options)
+
+    def start_session(self, capabilities, browser_profile=None):
+        self.command_executor.add_command(MobileCommand.GET_CAPABILITIES, 'GET', '/session/$sessionId')
+        self.session_id = self._attach_to
+        # Fails with InvalidSessionIdException if the session has ended
+        self.caps = self.execute(MobileCommand.GET_CAPABILITIES)['value'] or {}
+
+
+class SessionPool:
+    """Warm drivers keyed by server URL and capabilities."""
+
+    def __init__(self, sessions_file: str = SESSIONS_FILE):
+        self.sessions_file = sessions_file
+        self._lock = threading.Lock()
+        self._idle: Dict[str, List[Any]] = {}
+        self._keys: Dict[Any, str] = {}
+        self.created = 0
+        self.reused = 0
+
+    def acquire(self, caps: Dict[str, Any], server_url: Optional[str] = None):
+        """Return a working driver for the capabilities, reusing a warm session if possible."""
+        server_url = server_url or SERVER_URL
+        key = _key(server_url, caps)
+        while True:
+            with self._lock:
+                idle = self._idle.get(key)
+                driver = idle.pop() if idle else None
+            if driver is None:
+                break
+            if self._alive(driver):
+                self.reused += 1
+                return driver
+            self._discard(driver)
+
+        options = UiAutomator2Options().load_capabilities(caps)
+        executor = connection.executor(server_url)
+        session_ids = self._claim_saved(key)
+        driver = None
+        while session_ids and driver is None:
+            session_id = session_ids.pop(0)
+            try:
+                driver = _AttachedRemote(executor, session_id, options)
+            except Exception:
+                continue
+            print(f"♻️ Reusing Appium session {session_id}")
+            self.reused += 1
+        # Sessions not needed now stay saved for the next acquire or run
+        if session_ids:
+            self._unclaim_saved(key, session_ids)
+        if driver is None:
+            driver = connection.create_remote(server_url, options)
+            self.created += 1
+        with self._lock:
+            self._keys[driver] = key
+        return driver
+
+    def release(self, driver, healthy: bool = True):
+        """Return a driver to the pool; an unhealthy one is quit instead."""
+        with self._lock:
+            key = self._keys.get(driver)
+            if key is not None and healthy:
+                self._idle.setdefault(key, []).append(driver)
+                return
+        self._discard(driver)
+
+    def close(self, keep_sessions: Optional[bool] = None):
+        """Quit every session, or with keep_sessions save them for the next run."""
+        keep_sessions = _keep_sessions if keep_sessions is None else keep_sessions
+        with self._lock:
+            drivers = list(self._keys.items())
+            self._keys.clear()
+            self._idle.clear()
+        if not drivers:
+            return
+        if keep_sessions:
+            self._save(drivers)
+            return
+        for driver, _ in drivers:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+    @staticmethod
+    def _alive(driver) -> bool:
+        try:
+            driver.execute(MobileCommand.GET_CAPABILITIES)
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, driver):
+        with self._lock:
+            self._keys.pop(driver, None)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def _read_saved(self) -> Dict[str, List[str]]:
+        try:
+            with open(self.sessions_file) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_saved(self, saved: Dict[str, List[str]]):
+        tmp_path = f"{self.sessions_file}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({k: v for k, v in saved.items() if v}, f)
+        os.replace(tmp_path, self.sessions_file)
+
+    def _claim_saved(self, key: str) -> List[str]:
+        """Take the saved session ids for a key out of the file, so no other run attaches to them."""
+        with self._lock:
+            saved = self._read_saved()
+            session_ids = saved.pop(key, [])
+            if session_ids:
+                try:
+                    self._write_saved(saved)
+                except OSError as e:
+                    print(f"Could not update {self.sessions_file}: {e}")
+        return session_ids
+
+    def _unclaim_saved(self, key: str, session_ids: List[str]):
+        """Put claimed but unused session ids back into the file."""
+        with self._lock:
+            saved = self._read_saved()
+            saved[key] = saved.get(key, []) + [s for s in session_ids if s not in saved.get(key, [])]
+            try:
+                self._write_saved(saved)
+            except OSError as e:
+                print(f"Could not update {self.sessions_file}: {e}")
+
+    def _save(self, drivers):
+        saved = self._read_saved()
+        for driver, key in drivers:
+            if driver.session_id and driver.session_id not in saved.get(key, []):
+                saved.setdefault(key, []).append(driver.session_id)
+        try:
+            self._write_saved(saved)
+            print(f"Kept {len(drivers)} Appium session(s) for the next run")
+        except OSError as e:
+            print(f"Could not save sessions to {self.sessions_file}: {e}")
+
+
+pool = SessionPool()
+atexit.register(pool.close)
+
+
+def get_driver(udid: Optional[str] = None, system_port: Optional[int] = None,
+               overrides: Optional[Dict[str, Any]] = None, server_url: Optional[str] = None):
+    """A driver from the shared pool for the configured capabilities."""
+    return pool.acquire(capabilities(udid, system_port, overrides), server_url)
+
+
+def release_driver(driver, healthy: bool = True):
+    """Give a driver from get_driver() back to the shared pool."""
+    pool.release(driver, healthy)
@@ -0,0 +1,749 @@
+"""
+In-process stand-in for an Appium server running the survey app.
+
+Serves just enough of the W3C WebDriver / Appium protocol for the scripts in
+this directory: sessions, element lookup by XPath and accessibility id,
+click / clear / send_keys, page source, screenshots, W3C swipe actions,
+`mobile: scrollGesture` and the app lifecycle commands. Screens are rendered
+as UiAutomator2-style page source mirroring lib/screens/login_screen.dart and
+lib/screens/survey_page.dart, and the survey validators (shared with
+survey_oracle.py) produce the same messages the app shows.
+
+Every command can be given artificial latency so the runner's own overhead
+can be measured and the worker count scaled without an emulator:
+
+    python fake_appium_server.py --port 4723 --latency 0.05
+
+or, from Python:
+
+    with FakeAppiumServer(latency=0.05) as server:
+        driver = webdriver.Remote(server.url, options=options)
+"""
+import argparse
+import base64
+import json
+import re
+import socket
+import struct
+import threading
+import time
+import uuid
+import zlib
+import xml.etree.ElementTree as ET
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+import survey_oracle
+from page_snapshot import PageSnapshot
+
+APP_PACKAGE = "com.example.my_auth_app"
+ELEMENT_KEY = "element-6066-11e4-a52e-4f735466cecf"
+
+# Device geometry used for bounds and swipe handling (a 1080x2400 phone)
+SCREEN_WIDTH = 1080
+SCREEN_HEIGHT = 2400
+SCROLL_TOP = 350            # status bar + app bar
+VIEWPORT_HEIGHT = SCREEN_HEIGHT - SCROLL_TOP
+
+EDUCATION_LEVELS = survey_oracle.EDUCATION_LEVELS
+GENDER_OPTIONS = survey_oracle.GENDER_OPTIONS
+AI_MODELS = survey_oracle.AI_MODELS
+
+# login_screen.dart: accounts accepted by the email/phone sign in
+TEST_ACCOUNTS = {
+    "john@example.com": "pass123",
+    "5315060138": "pass456",
+    "test@gmail.com": "test123",
+}
+EMAIL_REGEX = re.compile(r"[\w\-.]+@([\w-]+\.)+[\w-]{2,4}")
+PHONE_REGEX = re.compile(r"\d{10,11}")
+
+SNACKBAR_SECONDS = 4.0
+
+
+def _png_1x1() -> bytes:
+    """A valid one-pixel PNG, returned for every screenshot."""
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xffffffff)
+    header = struct.pack(">IIBBBBB", 1, 1, 8, 2, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header)
+            + chunk(b"IDAT", zlib.compress(b"\x00\xff\xff\xff")) + chunk(b"IEND", b""))
+
+
+SCREENSHOT_B64 = base64.b64encode(_png_1x1()).decode("ascii")
+
+
+# ---------------------------------------------------------------------------
+# App model
+# ---------------------------------------------------------------------------
+
+class FakeApp:
+    """State of the survey app on one fake device."""
+
+    def __init__(self, transition_delay: float = 0.0):
+        self.transition_delay = transition_delay
+        self.running = True
+        self.generation = 0
+        self._launch()
+
+    # -- lifecycle ---------------------------------------------------------
+
+    def _navigate(self, screen: str):
+        self.screen = screen
+        self.generation += 1
+        self.scroll_offset = 0
+        self.focused: Optional[str] = None
+
+    def _launch(self):
+        self.login = {"email": "", "password": ""}
+        self.login_error: Optional[str] = None
+        self.snackbar: Optional[Tuple[str, float]] = None
+        self.transition_until = 0.0
+        self._reset_survey()
+        self._navigate("login")
+
+    def _reset_survey(self):
+        self.survey = {"name": "", "day": "", "month": "", "year": "", "city": "", "use_case": ""}
+        self.education = ""
+        self.gender = ""
+        self.models = {m: False for m in AI_MODELS}
+        self.defects: Dict[str, str] = {}
+        self.dropdown_open = False
+        self.field_errors: Dict[str, str] = {}
+
+    def terminate(self):
+        self.running = False
+        self.generation += 1
+
+    def activate(self):
+        if not self.running:
+            self.running = True
+            self._launch()
+
+    def open_deep_link(self, url: str):
+        """MainActivity is singleTop; Flutter pushes the link's route ("/" is the login screen)."""
+        if not url.startswith("myauthapp://"):
+            return
+        if not self.running:
+            self.running = True
+        self._launch()
+
+    def current_screen(self) -> str:
+        if self.screen == "login_success" and time.monotonic() >= self.transition_until:
+            self._reset_survey()
+            self._navigate("survey")
+        return self.screen
+
+    def _show_snackbar(self, text: str):
+        self.snackbar = (text, time.monotonic() + SNACKBAR_SECONDS)
+
+    # -- actions -----------------------------------------------------------
+
+    def click(self, key: str):
+        self.focused = key
+        if key == "login/sign_in":
+            self._sign_in()
+        elif key == "login/test_login":
+            self._enter_login_success()
+        elif key in ("survey/logout", "survey/logout/button"):
+            self._launch()
+        elif key == "survey/education":
+            self.dropdown_open = True
+        elif key.startswith("survey/education_option/"):
+            self.education = key.rsplit("/", 1)[1]
+            self.dropdown_open = False
+        elif key.startswith("survey/gender/"):
+            self.gender = key.rsplit("/", 1)[1]
+        elif key.startswith("survey/model/"):
+            model = key.rsplit("/", 1)[1]
+            self.models[model] = not self.models[model]
+            if not self.models[model]:
+                self.defects.pop(model, None)
+            else:
+                self.defects.setdefault(model, "")
+        elif key == "survey/send":
+            self._submit()
+
+    def set_text(self, key: str, text: str):
+        key = key.replace("/wrapper", "")
+        if key.startswith("login/") and key[len("login/"):] in self.login:
+            self.login[key[len("login/"):]] = text
+        elif key.startswith("survey/defect/"):
+            model = key.rsplit("/", 1)[1]
+            if self.models.get(model):
+                self.defects[model] = text
+        elif key.startswith("survey/") and key[len("survey/"):] in self.survey:
+            self.survey[key[len("survey/"):]] = text
+        else:
+            raise ValueError(f"Element {key} does not accept text")
+
+    def scroll(self, delta: int) -> bool:
+        """Scroll the survey by `delta` pixels; returns whether it can scroll further that way."""
+        if self.current_screen() != "survey":
+            return False
+        max_offset = max(0, self._content_height() - VIEWPORT_HEIGHT)
+        self.scroll_offset = min(max(0, self.scroll_offset + delta), max_offset)
+        return self.scroll_offset < max_offset if delta > 0 else self.scroll_offset > 0
+
+    def _enter_login_success(self):
+        self._navigate("login_success")
+        self.transition_until = time.monotonic() + self.transition_delay
+
+    def _sign_in(self):
+        """The Sign in button's onPressed in login_screen.dart."""
+        identifier = self.login["email"].strip()
+        password = self.login["password"]
+        normalized = identifier if "@" in identifier else identifier.replace(" ", "")
+        if not identifier or not password:
+            self.login_error = "Please enter both email/phone and password."
+        elif not EMAIL_REGEX.fullmatch(normalized) and not PHONE_REGEX.fullmatch(normalized):
+            self.login_error = "Invalid format for email or phone number."
+        elif TEST_ACCOUNTS.get(normalized) == password:
+            self._show_snackbar("Login successful!")
+            self._enter_login_success()
+            return
+        else:
+            self.login_error = "Invalid email/phone or password"
+        self._show_snackbar(self.login_error)
+
+    def _submit(self):
+        """_submitSurvey in survey_page.dart."""
+        outcome = survey_oracle.submit(self._form())
+        if outcome.snackbar != survey_oracle.INVALID_BIRTH_DATE:
+            # validate() only runs once the birth date parses
+            self.field_errors = outcome.field_errors
+        if outcome.submitted:
+            # Saved to Firestore; the app signs out and returns to the login screen
+            self._launch()
+        self._show_snackbar(outcome.snackbar)
+
+    def _form(self) -> Dict[str, Any]:
+        """The survey's state in the shape survey_oracle.submit() takes."""
+        models = {m: self.defects.get(m, "") for m, on in self.models.items() if on}
+        return dict(self.survey, education=self.education, gender=self.gender, models=models)
+
+    # -- rendering ---------------------------------------------------------
+
+    def _date_error_visible(self) -> bool:
+        return survey_oracle.date_error_visible(self.survey)
+
+    def _survey_rows(self) -> List[Dict[str, Any]]:
+        """The survey's scrollable content as rows of (parent, height, nodes), top to bottom."""
+        rows = []
+
+        def add(height: int, nodes: List[Dict[str, Any]], parent: str = "scroll"):
+            rows.append({"height": height, "nodes": nodes, "parent": parent})
+
+        def error_row(field: str):
+            if field in self.field_errors:
+                add(50, [_node("android.widget.TextView", f"survey/{field}/error", text=self.field_errors[field])])
+
+        s = self.survey
+        add(244, [_edit_text("survey/name", "Name-Surname *", s["name"])])
+        error_row("name")
+        add(60, [_node("android.widget.TextView", "survey/birth_date_label", text="Birth Date *")])
+        add(244, [
+            _node("android.widget.EditText", f"survey/{part}/wrapper", children=[
+                _edit_text(f"survey/{part}", label, s[part])])
+            for part, label in (("day", "Day"), ("month", "Month"), ("year", "Year"))
+        ])
+        for part in ("day", "month", "year"):
+            error_row(part)
+        if self._date_error_visible():
+            add(50, [_node("android.widget.TextView", "survey/date_error", text="Please enter a valid date")])
+        add(244, [_node("android.widget.Button", "survey/education", content_desc="Education Level *",
+                        text=self.education, clickable="true")])
+        add(244, [_node("android.widget.EditText", "survey/city/wrapper", children=[
+            _edit_text("survey/city", "City *", s["city"])])])
+        error_row("city")
+        add(60, [_node("android.widget.TextView", "survey/gender_label", text="Gender *")])
+        for option in GENDER_OPTIONS:
+            add(150, [_node("android.widget.RadioButton", f"survey/gender/{option}", content_desc=option,
+                            checkable="true", checked=_bool(self.gender == option), clickable="true")])
+        add(104, [_node("android.widget.TextView", "survey/ai_label", text="AI Models You've Tried *")], parent="ai")
+        for model in AI_MODELS:
+            add(150, [_node("android.widget.CheckBox", f"survey/model/{model}", content_desc=model,
+                            checkable="true", checked=_bool(self.models[model]), clickable="true")], parent="ai")
+            if self.models[model]:
+                add(250, [_node("android.widget.EditText", f"survey/defect/{model}/wrapper", children=[
+                    _edit_text(f"survey/defect/{model}", f"Defects/Cons of {model} *", self.defects.get(model, ""))])],
+                    parent="ai")
+        add(394, [_node("android.widget.EditText", "survey/use_case/wrapper", children=[
+            _edit_text("survey/use_case", "Beneficial Use Case of AI in Daily Life *", s["use_case"])])])
+        error_row("use_case")
+        add(240, [_node("android.widget.Button", "survey/send", content_desc="Send", clickable="true")])
+        return rows
+
+    def _content_height(self) -> int:
+        return sum(row["height"] for row in self._survey_rows())
+
+    def render(self) -> Tuple[ET.Element, Dict[str, ET.Element]]:
+        """Build the page source tree and a key -> element map for the visible elements."""
+        hierarchy = ET.Element("hierarchy", {"index": "0", "class": "hierarchy", "rotation": "0",
+                                             "width": str(SCREEN_WIDTH), "height": str(SCREEN_HEIGHT)})
+        elements: Dict[str, ET.Element] = {}
+        if not self.running:
+            _build(hierarchy, _node("android.widget.FrameLayout", "launcher", package="com.android.launcher"), elements, 0)
+            return hierarchy, elements
+
+        frame = _build(hierarchy, _node("android.widget.FrameLayout", "app/root"), elements, 0)
+        screen = self.current_screen()
+        if screen == "login":
+            self._render_login(frame, elements)
+        elif screen == "login_success":
+            for key, text in (("success/title", "Login Successful!"), ("success/subtitle", "Redirecting to survey...")):
+                _build(frame, _node("android.widget.TextView", key, text=text), elements, 900)
+        else:
+            self._render_survey(frame, elements)
+
+        if self.snackbar and time.monotonic() < self.snackbar[1]:
+            _build(frame, _node("android.widget.TextView", "app/snackbar", text=self.snackbar[0]), elements, 2250)
+        return hierarchy, elements
+
+    def _render_login(self, frame: ET.Element, elements: Dict[str, ET.Element]):
+        nodes = [
+            _node("android.widget.TextView", "login/title", text="Welcome Back"),
+            _node("android.widget.TextView", "login/subtitle", text="Please sign in to continue"),
+            _node("android.widget.Button", "login/test_login", content_desc="Login as Test User", clickable="true"),
+            _node("android.widget.Button", "login/google", content_desc="Continue with Google", clickable="true"),
+            _node("android.widget.Button", "login/spotify", content_desc="Continue with Spotify", clickable="true"),
+            _node("android.widget.TextView", "login/email_label", text="Email or Phone Number"),
+            _edit_text("login/email", "Enter your email or phone number", self.login["email"]),
+            _node("android.widget.TextView", "login/password_label", text="Password"),
+            _edit_text("login/password", "Enter your password", "•" * len(self.login["password"]), password="true"),
+        ]
+        if self.login_error:
+            nodes.append(_node("android.widget.TextView", "login/error", text=self.login_error))
+        nodes.append(_node("android.widget.Button", "login/sign_in", content_desc="Sign in", clickable="true"))
+        for i, node in enumerate(nodes):
+            _build(frame, node, elements, 300 + i * 170)
+
+    def _render_survey(self, frame: ET.Element, elements: Dict[str, ET.Element]):
+        _build(frame, _node("android.view.View", "survey/header", content_desc="AI Survey"), elements, 150)
+        logout = _node("android.view.View", "survey/logout", content_desc="Logout Button", children=[
+            _node("android.widget.Button", "survey/logout/button", content_desc="Logout", clickable="true")])
+        _build(frame, logout, elements, 150)
+
+        scroll = _build(frame, _node("android.widget.ScrollView", "survey/scroll", scrollable="true"),
+                        elements, SCROLL_TOP, VIEWPORT_HEIGHT)
+        ai_section = None
+        top = 0
+        for row in self._survey_rows():
+            y = SCROLL_TOP + top - self.scroll_offset
+            top += row["height"]
+            # Flutter only exposes rows that intersect the viewport
+            if y + row["height"] <= SCROLL_TOP or y >= SCREEN_HEIGHT:
+                continue
+            parent = scroll
+            if row["parent"] == "ai":
+                if ai_section is None:
+                    ai_section = _build(scroll, _node("android.view.View", "survey/ai_section",
+                                                      content_desc="AI Models Section"), elements, y, row["height"])
+                parent = ai_section
+            for node in row["nodes"]:
+                _build(parent, node, elements, y, row["height"])
+
+        if self.dropdown_open:
+            for i, level in enumerate(EDUCATION_LEVELS):
+                _build(frame, _node("android.widget.Button", f"survey/education_option/{level}", content_desc=level,
+                                    clickable="true"), elements, 700 + i * 150)
+
+
+def _bool(value: bool) -> str:
+    return "true" if value else "false"
+
+
+def _node(tag: str, key: str, children: Optional[List[Dict[str, Any]]] = None, **attrs) -> Dict[str, Any]:
+    return {"tag": tag, "key": key, "attrs": attrs, "children": children or []}
+
+
+def _edit_text(key: str, hint: str, value: str, **attrs) -> Dict[str, Any]:
+    return _node("android.widget.EditText", key, hint=hint, text=value, focusable="true", clickable="true", **attrs)
+
+
+def _build(parent: ET.Element, node: Dict[str, Any], elements: Dict[str, ET.Element],
+           y: int, height: int = 150) -> ET.Element:
+    """Append a node (and its children) to the tree with UiAutomator2-style attributes."""
+    attrs = {
+        "index": str(len(parent)),
+        "package": APP_PACKAGE,
+        "class": node["tag"],
+        "text": "",
+        "content-desc": "",
+        "checkable": "false",
+        "checked": "false",
+        "clickable": "false",
+        "enabled": "true",
+        "focusable": "false",
+        "focused": "false",
+        "password": "false",
+        "scrollable": "false",
+        "selected": "false",
+        "displayed": "true",
+        "bounds": f"[0,{max(y, 0)}][{SCREEN_WIDTH},{min(y + height, SCREEN_HEIGHT)}]",
+    }
+    for name, value in node["attrs"].items():
+        attrs[name.replace("_", "-")] = value
+    element = ET.SubElement(parent, node["tag"], attrs)
+    elements[node["key"]] = element
+    for child in node["children"]:
+        _build(element, child, elements, y, height)
+    return element
+
+
+# ---------------------------------------------------------------------------
+# WebDriver protocol
+# ---------------------------------------------------------------------------
+
+class WebDriverError(Exception):
+    """A W3C error response."""
+
+    def __init__(self, status: int, error: str, message: str):
+        super().__init__(message)
+        self.status = status
+        self.error = error
+        self.message = message
+
+
+class FakeSession:
+    """One WebDriver session bound to its own fake device."""
+
+    def __init__(self, capabilities: Dict[str, Any], transition_delay: float):
+        self.id = uuid.uuid4().hex
+        self.capabilities = capabilities
+        self.app = FakeApp(transition_delay)
+        self.lock = threading.Lock()
+        self.command_counts: Counter = Counter()
+
+    def _snapshot(self) -> Tuple[PageSnapshot, Dict[str, ET.Element]]:
+        root, elements = self.app.render()
+        return PageSnapshot.from_root(root), elements
+
+    def _element_id(self, key: str) -> str:
+        # Keys contain "/" and spaces, so they are hex-encoded to stay URL-safe
+        return f"{self.app.generation}-{key.encode('utf-8').hex()}"
+
+    def _resolve(self, element_id: str) -> Tuple[str, ET.Element]:
+        """Map an element id back to its key, failing if the element went stale."""
+        generation, _, encoded = element_id.partition("-")
+        try:
+            key = bytes.fromhex(encoded).decode("utf-8")
+        except ValueError:
+            raise WebDriverError(404, "no such element", f"Unknown element id {element_id}")
+        _, elements = self.app.render()
+        if generation != str(self.app.generation) or key not in elements:
+            raise WebDriverError(404, "stale element reference", f"Element {element_id} is no longer attached")
+        return key, elements[key]
+
+    def find(self, using: str, value: str) -> List[str]:
+        snapshot, elements = self._snapshot()
+        keys = {id(element): key for key, element in elements.items()}
+        if using == "xpath":
+            try:
+                found = snapshot.xpath(value)
+            except SyntaxError:
+                raise WebDriverError(400, "invalid selector", f"Unsupported XPath: {value}")
+        elif using == "accessibility id":
+            found = [e for e in snapshot.elements() if e.get("content-desc") == value]
+        elif using == "class name":
+            found = list(snapshot.elements(value))
+        elif using == "id":
+            found = [e for e in snapshot.elements() if e.get("resource-id") == value]
+        else:
+            raise WebDriverError(400, "invalid selector", f"Locator strategy {using} is not supported")
+        return [self._element_id(keys[id(e)]) for e in found if id(e) in keys]
+
+    def attribute(self, element_id: str, name: str) -> Optional[str]:
+        _, element = self._resolve(element_id)
+        return element.get(name)
+
+    def click(self, element_id: str):
+        key, _ = self._resolve(element_id)
+        self.app.click(key)
+
+    def set_text(self, element_id: str, text: str):
+        key, _ = self._resolve(element_id)
+        try:
+            self.app.set_text(key, text)
+        except ValueError as e:
+            raise WebDriverError(400, "invalid element state", str(e))
+
+    def clear(self, element_id: str):
+        self.set_text(element_id, "")
+
+    def perform_actions(self, actions: List[Dict[str, Any]]):
+        """Treat a touch pointer sequence as a swipe and scroll by its vertical distance."""
+        for source in actions:
+            moves = [a for a in source.get("actions", []) if a.get("type") == "pointerMove"]
+            if len(moves) >= 2:
+                self.app.scroll(int(moves[0].get("y", 0)) - int(moves[-1].get("y", 0)))
+
+    def execute(self, script: str, args: List[Any]) -> Any:
+        params = args[0] if args and isinstance(args[0], dict) else {}
+        if script == "mobile: terminateApp":
+            self.app.terminate()
+            return True
+        if script == "mobile: activateApp":
+            self.app.activate()
+            return None
+        if script == "mobile: deepLink":
+            self.app.open_deep_link(params.get("url", ""))
+            return None
+        if script == "mobile: scrollGesture":
+            distance = int(float(params.get("height", VIEWPORT_HEIGHT)) * float(params.get("percent", 1.0)))
+            direction = str(params.get("direction", "down")).lower()
+            if direction not in ("up", "down"):
+                raise WebDriverError(400, "invalid argument", f"Unsupported scroll direction {direction}")
+            return self.app.scroll(distance if direction == "down" else -distance)
+        if script == "mobile: replaceElementValue":
+            self.set_text(params.get("elementId", ""), params.get("text", ""))
+            return None
+        if script == "mobile: getCurrentPackage":
+            return APP_PACKAGE if self.app.running else "com.android.launcher"
+        if script == "mobile: getCurrentActivity":
+            return ".MainActivity" if self.app.running else ".Launcher"
+        raise WebDriverError(405, "unknown method", f"Script {script} is not supported by the fake server")
+
+
+class FakeAppiumServer:
+    """
+    A threaded HTTP server speaking enough WebDriver for the runner.
+
+    latency:          seconds added to every command
+    command_latency:  extra seconds per command name (e.g. {"source": 0.3})
+    transition_delay: seconds the "Login Successful!" page stays up (2 s in the app)
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0,
+                 command_latency: Optional[Dict[str, float]] = None, transition_delay: float = 0.0):
+        self.latency = latency
+        self.command_latency = command_latency or {}
+        self.transition_delay = transition_delay
+        self.sessions: Dict[str, FakeSession] = {}
+        self.httpd = ThreadingHTTPServer((host, port), _make_handler(self))
+        self.httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeAppiumServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "FakeAppiumServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _delay(self, command: str):
+        delay = self.latency + self.command_latency.get(command, 0.0)
+        if delay:
+            time.sleep(delay)
+
+    def dispatch(self, method: str, path: str, body: Dict[str, Any]) -> Any:
+        """Route one request; returns the "value" of the response."""
+        parts = [p for p in path.split("/") if p]
+        if parts[:1] == ["wd"] and parts[1:2] == ["hub"]:
+            parts = parts[2:]
+
+        if parts == ["status"]:
+            self._delay("status")
+            return {"ready": True, "message": "Fake Appium server"}
+        if parts == ["session"] and method == "POST":
+            self._delay("new_session")
+            caps = dict(body.get("capabilities", {}).get("alwaysMatch", {}))
+            for first in body.get("capabilities", {}).get("firstMatch", [{}])[:1]:
+                caps.update(first)
+            session = FakeSession(caps, self.transition_delay)
+            self.sessions[session.id] = session
+            return {"sessionId": session.id, "capabilities": caps}
+        if len(parts) < 2 or parts[0] != "session":
+            raise WebDriverError(404, "unknown command", f"Unknown command: {method} {path}")
+
+        session = self.sessions.get(parts[1])
+        if session is None:
+            raise WebDriverError(404, "invalid session id", f"No session {parts[1]}")
+        rest = parts[2:]
+        command = _command_name(method, rest)
+        self._delay(command)
+
+        with session.lock:
+            session.command_counts[command] += 1
+            return _session_command(self, session, method, rest, body)
+
+
+def _command_name(method: str, rest: List[str]) -> str:
+    if not rest:
+        return "delete_session" if method == "DELETE" else "get_session"
+    if rest[0] == "element" and len(rest) >= 3:
+        return f"element_{rest[2]}"
+    if rest[0] == "execute":
+        return "execute"
+    return "_".join(rest).replace("/", "_")
+
+
+def _session_command(server: FakeAppiumServer, session: FakeSession, method: str,
+                     rest: List[str], body: Dict[str, Any]) -> Any:
+    if not rest and method == "DELETE":
+        server.sessions.pop(session.id, None)
+        return None
+    if not rest:
+        return session.capabilities
+    head = rest[0]
+
+    if head == "timeouts":
+        return None
+    if head == "source":
+        root, _ = session.app.render()
+        return ET.tostring(root, encoding="unicode")
+    if head == "screenshot":
+        return SCREENSHOT_B64
+    if head == "contexts":
+        return ["NATIVE_APP"]
+    if head == "context":
+        return "NATIVE_APP" if method == "GET" else None
+    if head == "window" and rest[-1] in ("rect", "size"):
+        return {"x": 0, "y": 0, "width": SCREEN_WIDTH, "height": SCREEN_HEIGHT}
+    if head == "actions":
+        if method == "POST":
+            session.perform_actions(body.get("actions", []))
+        return None
+    if head == "execute":
+        return session.execute(body.get("script", ""), body.get("args", []))
+
+    if head == "appium" and rest[1:2] == ["device"]:
+        action = rest[2] if len(rest) > 2 else ""
+        if action == "terminate_app":
+            session.app.terminate()
+            return True
+        if action == "activate_app":
+            session.app.activate()
+            return None
+        if action == "current_activity":
+            return session.execute("mobile: getCurrentActivity", [])
+        if action == "current_package":
+            return session.execute("mobile: getCurrentPackage", [])
+
+    if head in ("element", "elements") and len(rest) == 1:
+        found = session.find(body.get("using", ""), body.get("value", ""))
+        if head == "elements":
+            return [{ELEMENT_KEY: element_id} for element_id in found]
+        if not found:
+            raise WebDriverError(404, "no such element",
+                                 f"An element could not be located using {body.get('using')}={body.get('value')}")
+        return {ELEMENT_KEY: found[0]}
+
+    if head == "element" and len(rest) >= 3:
+        element_id, action = rest[1], rest[2]
+        if action == "click":
+            session.click(element_id)
+            return None
+        if action == "clear":
+            session.clear(element_id)
+            return None
+        if action == "value":
+            text = body.get("text")
+            if text is None:
+                text = "".join(body.get("value", []))
+            session.set_text(element_id, text)
+            return None
+        if action == "attribute" and len(rest) == 4:
+            return session.attribute(element_id, rest[3])
+        if action == "text":
+            return session.attribute(element_id, "text") or ""
+        if action == "displayed":
+            return session.attribute(element_id, "displayed") == "true"
+        if action == "enabled":
+            return session.attribute(element_id, "enabled") == "true"
+        if action == "selected":
+            return session.attribute(element_id, "checked") == "true"
+        if action == "name":
+            return session.attribute(element_id, "class")
+        if action == "rect":
+            bounds = re.findall(r"\d+", session.attribute(element_id, "bounds") or "0000")
+            x1, y1, x2, y2 = (int(b) for b in bounds[:4])
+            return {"x": x1, "y": y1, "width": x2 - x1, "height": y2 - y1}
+
+    raise WebDriverError(404, "unknown command", f"Unknown command: {method} /{'/'.join(rest)}")
+
+
+def _make_handler(server: FakeAppiumServer):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def setup(self):
+            super().setup()
+            # Headers and body go out in separate writes; without this, Nagle's
+            # algorithm and delayed ACKs add ~40 ms to every keep-alive request
+            self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        def _handle(self, method: str):
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length) if length else b""
+            try:
+                body = json.loads(raw) if raw else {}
+                status, payload = 200, {"value": server.dispatch(method, self.path, body)}
+            except WebDriverError as e:
+                status, payload = e.status, {"value": {"error": e.error, "message": e.message, "stacktrace": ""}}
+            except Exception as e:
+                status, payload = 500, {"value": {"error": "unknown error", "message": str(e), "stacktrace": ""}}
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            self._handle("GET")
+
+        def do_POST(self):
+            self._handle("POST")
+
+        def do_DELETE(self):
+            self._handle("DELETE")
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a fake Appium server for the survey app')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=4723)
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every command')
+    parser.add_argument('--command-latency', default='',
+                        help='Extra latency per command, e.g. "source=0.3,element_click=0.1"')
+    parser.add_argument('--transition-delay', type=float, default=0.0,
+                        help='Seconds the login success page stays up before the survey (2 in the app)')
+    args = parser.parse_args()
+
+    command_latency = {}
+    for entry in filter(None, args.command_latency.split(',')):
+        name, _, seconds = entry.partition('=')
+        command_latency[name.strip()] = float(seconds)
+
+    server = FakeAppiumServer(args.host, args.port, args.latency, command_latency, args.transition_delay)
+    print(f"Fake Appium server listening on {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Flake detection: attempt records, a per-scenario flake history and quarantine.
+
+The runner retries a failed scenario on a fresh session up to `--retries`
+times and records every attempt in the result. A run of a scenario counts as
+flaky when its attempts disagree, or when its outcome differs from the
+previous run with the same fingerprint (same app build, harness and
+scenario), which catches flakes in runs without retries.
+
+The history is a JSON file {scenario_id: [{"time", "key", "attempts"}, ...]},
+keeping the most recent MAX_RUNS runs per scenario. A scenario is quarantined
+when the lower bound of the Wilson interval of its flake rate is above the
+threshold, so one unlucky run out of a few does not quarantine anything.
+Quarantined scenarios run last, are not retried and their failures are
+reported separately instead of failing the run.
+
+    python flake.py test_results_flakes.json
+"""
+import argparse
+import json
+import math
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set
+
+DEFAULT_RETRIES = 2
+DEFAULT_THRESHOLD = 0.1
+# z for a one-sided 95% bound
+CONFIDENCE_Z = 1.645
+MAX_RUNS = 50
+
+
+def add_attempt(result: Dict[str, Any], earlier: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Record a result as the next attempt after `earlier`, the scenario's previous result in this run."""
+    attempts = list(earlier.get('attempts', [])) if earlier else []
+    attempts.append({k: result[k] for k in ('success', 'message', 'timestamp')})
+    result['attempts'] = attempts
+    if len({a['success'] for a in attempts}) > 1:
+        result['flaky'] = True
+    return result
+
+
+def wilson_lower(flaky: int, runs: int, z: float = CONFIDENCE_Z) -> float:
+    """Lower bound of the Wilson score interval for flaky/runs."""
+    if runs == 0:
+        return 0.0
+    p = flaky / runs
+    centre = p + z * z / (2 * runs)
+    margin = z * math.sqrt(p * (1 - p) / runs + z * z / (4 * runs * runs))
+    return max((centre - margin) / (1 + z * z / runs), 0.0)
+
+
+def flaky_runs(runs: List[Dict[str, Any]]) -> int:
+    """How many runs had disagreeing attempts or flipped against the previous run of the same fingerprint."""
+    flaky = 0
+    last_outcome: Dict[str, bool] = {}
+    for run in runs:
+        attempts = run['attempts']
+        key = run.get('key')
+        if len(set(attempts)) > 1 or (key and key in last_outcome and last_outcome[key] != attempts[-1]):
+            flaky += 1
+        if key:
+            last_outcome[key] = attempts[-1]
+    return flaky
+
+
+class FlakeHistory:
+    """Attempts of every scenario across runs, and the flake rates derived from them."""
+
+    def __init__(self, path: str, threshold: float = DEFAULT_THRESHOLD, z: float = CONFIDENCE_Z):
+        self.path = path
+        self.threshold = threshold
+        self.z = z
+        self._lock = threading.Lock()
+        self._runs: Dict[str, List[Dict[str, Any]]] = self._read()
+        self._new: Dict[str, List[Dict[str, Any]]] = {}
+
+    def _read(self) -> Dict[str, List[Dict[str, Any]]]:
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            print(f"Could not read flake history {self.path}: {e}")
+            return {}
+
+    def record(self, result: Dict[str, Any], key: Optional[str] = None):
+        """Remember the attempts of a scenario that ran in this run."""
+        attempts = [a['success'] for a in result.get('attempts', [])] or [result['success']]
+        run = {"time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "key": key, "attempts": attempts}
+        with self._lock:
+            self._new.setdefault(result['scenario_id'], []).append(run)
+
+    def stats(self, scenario_id: str) -> Dict[str, Any]:
+        """Runs, flaky runs, flake rate and its lower bound for one scenario."""
+        with self._lock:
+            runs = self._runs.get(scenario_id, []) + self._new.get(scenario_id, [])
+        runs = runs[-MAX_RUNS:]
+        flaky = flaky_runs(runs)
+        lower = wilson_lower(flaky, len(runs), self.z)
+        return {"runs": len(runs), "flaky": flaky, "rate": flaky / len(runs) if runs else 0.0,
+                "lower": lower, "quarantined": lower > self.threshold}
+
+    def scenario_ids(self) -> List[str]:
+        with self._lock:
+            return sorted(set(self._runs) | set(self._new))
+
+    def quarantined(self) -> Set[str]:
+        """Scenarios whose flake rate is confidently above the threshold."""
+        return {sid for sid in self.scenario_ids() if self.stats(sid)["quarantined"]}
+
+    def save(self):
+        """Add this run's attempts to the history file, replacing it atomically."""
+        with self._lock:
+            if not self._new:
+                return
+            merged = self._read()
+            for scenario_id, runs in self._new.items():
+                merged[scenario_id] = (merged.get(scenario_id, []) + runs)[-MAX_RUNS:]
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(merged, f)
+            os.replace(tmp_path, self.path)
+            self._runs = merged
+            self._new = {}
+
+
+def report(history: FlakeHistory, show_all: bool = False):
+    """Print the flake rate of every scenario that flaked, worst first."""
+    rows = [(sid, history.stats(sid)) for sid in history.scenario_ids()]
+    rows = [row for row in rows if show_all or row[1]["flaky"]]
+    rows.sort(key=lambda row: (row[1]["lower"], row[1]["rate"]), reverse=True)
+    if not rows:
+        print("No flaky scenarios recorded")
+        return
+    print(f"{'Scenario':<12} {'Runs':>5} {'Flaky':>6} {'Rate':>7} {'Lower':>7}")
+    for sid, stats in rows:
+        mark = " 🚧 quarantined" if stats["quarantined"] else ""
+        print(f"{sid:<12} {stats['runs']:>5} {stats['flaky']:>6} {stats['rate']:>7.1%} {stats['lower']:>7.1%}{mark}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Report flake rates from the flake history of test runs')
+    parser.add_argument('history', help='Flake history file, e.g. test_results_flakes.json')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='Quarantine scenarios whose flake rate is confidently above this')
+    parser.add_argument('--all', action='store_true', help='Also list scenarios that never flaked')
+    args = parser.parse_args()
+    report(FlakeHistory(args.history, threshold=args.threshold), show_all=args.all)
+
+
+if __name__ == "__main__":
+    main()
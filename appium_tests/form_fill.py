@@ -0,0 +1,174 @@
+"""
+Fill several text fields with as few WebDriver round-trips as possible.
+
+The classic sequence is click, clear, send_keys: three requests per field.
+fill() tries cheaper strategies first and falls back when the server does
+not support them:
+
+  execute_driver  all fields in one request, through Appium's execute-driver
+                  plugin (appium --use-plugins=execute-driver)
+  replace_value   per field: a click (Flutter only accepts text on a focused
+                  field) and `mobile: replaceElementValue`
+  send_keys       per field: click, clear, send_keys
+
+A strategy that fails is remembered as unsupported for that driver or
+session. The logic is a flow (see ops.py), so the asyncio runner fills
+fields the same way. Every fill is counted per thread (or asyncio task) so
+results can report the round-trips saved.
+"""
+import contextvars
+import json
+from collections import Counter
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from selenium.common.exceptions import StaleElementReferenceException
+
+import ops
+from ops import Flow, op
+
+STRATEGIES = ["execute_driver", "replace_value", "send_keys"]
+
+# Requests per field for click + clear + send_keys
+CLASSIC_ROUND_TRIPS = 3
+
+_BATCH_SCRIPT = """
+const fields = %s;
+for (const [id, text] of fields) {
+  await driver.elementClick(id);
+  if (text) {
+    await driver.execute('mobile: replaceElementValue', {elementId: id, text: text});
+  } else {
+    await driver.elementClear(id);
+  }
+}
+return fields.length;
+"""
+
+_stats: contextvars.ContextVar = contextvars.ContextVar("fill_stats", default=None)
+
+
+class FillStats:
+    """Fields filled and requests spent on them in one scenario."""
+
+    def __init__(self):
+        self.fields = 0
+        self.round_trips = 0
+        self.by_strategy: Counter = Counter()
+
+    def record(self, strategy: str, fields: int, round_trips: int):
+        self.fields += fields
+        self.round_trips += round_trips
+        self.by_strategy[strategy] += fields
+
+    @property
+    def saved(self) -> int:
+        return self.fields * CLASSIC_ROUND_TRIPS - self.round_trips
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "fields": self.fields,
+            "round_trips": self.round_trips,
+            "round_trips_saved": self.saved,
+            "by_strategy": dict(self.by_strategy),
+        }
+
+
+def start_recording() -> FillStats:
+    """Start fresh fill statistics for the current thread or task and return them."""
+    stats = FillStats()
+    _stats.set(stats)
+    return stats
+
+
+def current_stats() -> Optional[FillStats]:
+    """Return the fill statistics for the current thread or task, if recording was started."""
+    return _stats.get()
+
+
+def _record(strategy: str, fields: int, round_trips: int):
+    stats = current_stats()
+    if stats is not None:
+        stats.record(strategy, fields, round_trips)
+
+
+def _mark_unsupported(unsupported: Set[str], strategy: str, error: Exception, wasted_round_trips: int):
+    reason = str(error).strip().splitlines()[0] if str(error).strip() else type(error).__name__
+    print(f"⚠️ {strategy} text entry unavailable, falling back: {reason}")
+    unsupported.add(strategy)
+    _record(strategy, 0, wasted_round_trips)
+
+
+def _fill_execute_driver(entries: List[Tuple[Any, str]]) -> Flow:
+    fields = [[element.id, value] for element, value in entries]
+    yield op("execute_driver", _BATCH_SCRIPT % json.dumps(fields))
+    _record("execute_driver", len(entries), 1)
+
+
+def _fill_replace_value(element, value: str) -> Flow:
+    yield op("click", element)
+    if value:
+        yield op("execute", "mobile: replaceElementValue", {"elementId": element.id, "text": value})
+    else:
+        yield op("clear", element)
+    _record("replace_value", 1, 2)
+
+
+def _fill_send_keys(element, value: str) -> Flow:
+    yield op("click", element)
+    yield op("clear", element)
+    yield op("send_keys", element, value)
+    _record("send_keys", 1, CLASSIC_ROUND_TRIPS)
+
+
+_PER_FIELD = {
+    "replace_value": _fill_replace_value,
+    "send_keys": _fill_send_keys,
+}
+
+
+def fill_flow(entries: List[Tuple[Any, str]], strategies: Optional[List[str]] = None) -> Flow:
+    """fill() as a flow of ops (see ops.py), for the synchronous and asyncio runners alike."""
+    unsupported = yield op("unsupported")
+    pending = list(entries)
+    for strategy in strategies or STRATEGIES:
+        if not pending:
+            return
+        if strategy in unsupported:
+            continue
+
+        if strategy == "execute_driver":
+            if len(pending) == 1:
+                continue  # a single field is no cheaper as a script
+            try:
+                yield from _fill_execute_driver(pending)
+                return
+            except StaleElementReferenceException:
+                raise
+            except Exception as e:
+                _mark_unsupported(unsupported, strategy, e, 1)
+                continue
+
+        filler = _PER_FIELD[strategy]
+        while pending:
+            element, value = pending[0]
+            try:
+                yield from filler(element, value)
+            except StaleElementReferenceException:
+                raise
+            except Exception as e:
+                if strategy == "send_keys":
+                    raise
+                # The click went through before the replace call failed
+                _mark_unsupported(unsupported, strategy, e, 2)
+                break
+            pending.pop(0)
+
+
+def fill(driver, entries: List[Tuple[Any, str]], strategies: Optional[List[str]] = None):
+    """
+    Set the text of each (element, value) pair, replacing what was there.
+
+    Raises StaleElementReferenceException if a handle went stale, so the
+    caller can resolve the fields again and retry.
+    """
+    ops.run(fill_flow(entries, strategies), ops.DriverOps(driver))
@@ -0,0 +1,255 @@
+"""
+Select the scenarios affected by changes between two git refs.
+
+IMPACT_MAP lists, per app source file, which test cases exercise each Dart
+member (validators, handlers, build methods). Changed lines from
+`git diff` are mapped to the member that contains them, in the old and the
+new version of the file, and the test cases registered for those members
+are selected. Code that is not listed, or that lies outside any member
+(fields, imports), selects every test case that uses the file.
+
+A member can also map to a function of the scenario. The survey validators
+use this to select just the scenarios they decide: those the survey accepts,
+which pass through every validator, and the rejected ones that
+survey_oracle.rejected_by() attributes to the changed validator.
+
+Changed scenario definitions in test_cases.json select just those
+scenarios, and changes to the harness in appium_tests select everything.
+
+    python impact.py origin/main            # changes since origin/main, incl. the working tree
+    python impact.py v1.2 v1.3 -j test_cases.json
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import survey_oracle
+
+ALL = "*"
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(HERE)
+TEST_CASES_PATH = "appium_tests/test_cases.json"
+
+Selector = Callable[[Dict[str, Any]], bool]
+
+
+def decided_by(member: str) -> Selector:
+    """Select the scenarios whose outcome a survey validator decides."""
+    def selects(scenario: Dict[str, Any]) -> bool:
+        # A regression can reject inputs the survey accepts, or accept the ones this member rejects
+        return (scenario["expected_result"]["should_submit"] or survey_oracle.predict(scenario).submitted
+                or member in survey_oracle.rejected_by(scenario))
+    return selects
+
+
+def ticks_ai_model(scenario: Dict[str, Any]) -> bool:
+    return bool(scenario["inputs"].get("ai_models_with_defects"))
+
+
+# file -> member -> test case ids or a Selector; the "*" entry covers everything not listed
+IMPACT_MAP: Dict[str, Dict[str, Any]] = {
+    "lib/main.dart": {"*": ALL},
+    "lib/main_debug.dart": {"*": ALL},
+    "lib/firebase_options.dart": {"*": ALL},
+    "lib/utils/config.dart": {"*": ALL},
+    "lib/screens/login_screen.dart": {
+        # Only used by the Google / Spotify scripts, not by test_cases.json
+        "_handleGoogleLogin": [],
+        "_handleSpotifyLogin": [],
+        # build() holds the email sign-in every scenario goes through
+        "*": ALL,
+    },
+    "lib/screens/login_success_page.dart": {"*": ALL},
+    "lib/screens/survey_page.dart": {
+        # Validators decide only the scenarios they accept or reject
+        "_validateName": decided_by("_validateName"),
+        "_validateDay": decided_by("_validateDay"),
+        "_validateMonth": decided_by("_validateMonth"),
+        "_validateYear": decided_by("_validateYear"),
+        "_isValidDateInput": decided_by("_isValidDateInput"),
+        "_isValidBirthDate": decided_by("_isValidBirthDate"),
+        "_validateCity": decided_by("_validateCity"),
+        "_validateAIModelDefects": decided_by("_validateAIModelDefects"),
+        "_validateBeneficialUseCase": decided_by("_validateBeneficialUseCase"),
+        # Ticking a checkbox goes through it
+        "_updateAIModelSelection": ticks_ai_model,
+        # build(), _isFormValid, _submitSurvey, logout (used to reset), state fields
+        "*": ALL,
+    },
+}
+
+# Path prefixes whose changes affect every scenario; app code missing from
+# IMPACT_MAP (e.g. a new screen) is treated the same way
+ALWAYS_AFFECTING = ["pubspec.yaml", "pubspec.lock", "android/", "assets/", "appium_tests/", "lib/"]
+
+# Dart members: top-level functions and class members (indented at most two spaces)
+_MEMBER = re.compile(
+    r'^ {0,2}(?=\S)(?!class\b|abstract\b|enum\b|extension\b|mixin\b|import\b|return\b)'
+    r'[\w<>?,\[\] ]*?\b(?:get\s+)?(\w+)\s*(?:\([^;]*?\))?\s*(?:async\s*)?\{\s*$'
+)
+_HUNK = re.compile(r'^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@')
+
+
+def _git(*args: str) -> str:
+    return subprocess.run(['git', '-C', REPO_ROOT] + list(args), capture_output=True, text=True,
+                          check=True).stdout
+
+
+def _read(path: str, ref: Optional[str]) -> Optional[str]:
+    """File content at a ref, or in the working tree when ref is None."""
+    try:
+        if ref is None:
+            with open(os.path.join(REPO_ROOT, path), encoding='utf-8') as f:
+                return f.read()
+        return _git('show', f'{ref}:{path}')
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def dart_members(source: str) -> List[Tuple[str, int, int]]:
+    """(name, first line, last line) of every member, 1-based and inclusive."""
+    lines = source.splitlines()
+    members = []
+    for start, line in enumerate(lines):
+        match = _MEMBER.match(line)
+        if not match:
+            continue
+        depth = 0
+        for end in range(start, len(lines)):
+            # Braces inside string literals and comments do not count
+            code = re.sub(r"'(?:\\.|[^'\\])*'|\"(?:\\.|[^\"\\])*\"|//.*", '', lines[end])
+            depth += code.count('{') - code.count('}')
+            if depth <= 0:
+                break
+        members.append((match.group(1), start + 1, end + 1))
+    return members
+
+
+def member_at(members: List[Tuple[str, int, int]], line: int) -> Optional[str]:
+    """The innermost member containing a line, or None for code outside members."""
+    containing = [m for m in members if m[1] <= line <= m[2]]
+    if not containing:
+        return None
+    return min(containing, key=lambda m: m[2] - m[1])[0]
+
+
+def changed_lines(base: str, head: Optional[str]) -> Dict[str, Tuple[Set[int], Set[int]]]:
+    """Per changed file, the changed line numbers in the base and in the head version."""
+    args = ['diff', '--unified=0', '--no-color', '--no-renames', base] + ([head] if head else [])
+    changes: Dict[str, Tuple[Set[int], Set[int]]] = {}
+    path = None
+    for line in _git(*args).splitlines():
+        if line.startswith('diff --git '):
+            path = line.split(' b/', 1)[1]
+            changes.setdefault(path, (set(), set()))
+        elif path and line.startswith('@@'):
+            match = _HUNK.match(line)
+            old_start, old_count, new_start, new_count = (
+                int(match.group(1)), int(match.group(2) or 1), int(match.group(3)), int(match.group(4) or 1))
+            changes[path][0].update(range(old_start, old_start + old_count))
+            changes[path][1].update(range(new_start, new_start + new_count))
+    return changes
+
+
+def _changed_scenarios(base: str, head: Optional[str]) -> Set[str]:
+    """Ids of scenarios added or edited in test_cases.json."""
+    def scenarios(ref):
+        try:
+            data = json.loads(_read(TEST_CASES_PATH, ref) or '{}')
+        except json.JSONDecodeError:
+            return {}
+        return {s['scenario_id']: s for tc in data.get('test_cases', []) for s in tc['scenarios']}
+
+    before, after = scenarios(base), scenarios(head)
+    return {sid for sid, scenario in after.items() if before.get(sid) != scenario}
+
+
+def affected(base: str, head: Optional[str] = None,
+             test_cases: Optional[List[Dict[str, Any]]] = None) -> Tuple[Any, Set[str], List[str]]:
+    """
+    Work out what a change between two refs affects.
+
+    Returns (test case ids or ALL, scenario ids, reasons). With head None the
+    working tree is compared against base. Members mapped to a Selector pick
+    scenarios out of `test_cases`.
+    """
+    case_ids: Set[str] = set()
+    scenario_ids: Set[str] = set()
+    reasons: List[str] = []
+
+    for path, (old_lines, new_lines) in sorted(changed_lines(base, head).items()):
+        if path == TEST_CASES_PATH:
+            scenario_ids |= _changed_scenarios(base, head)
+            reasons.append(f"{path}: scenarios {', '.join(sorted(scenario_ids)) or 'none'} changed")
+            continue
+        if path not in IMPACT_MAP:
+            if any(path == prefix or path.startswith(prefix) for prefix in ALWAYS_AFFECTING):
+                reasons.append(f"{path}: affects every scenario")
+                return ALL, scenario_ids, reasons
+            continue
+
+        members_map = IMPACT_MAP[path]
+        touched = set()
+        for ref, lines in ((base, old_lines), (head, new_lines)):
+            source = _read(path, ref)
+            if source is None:
+                continue
+            members = dart_members(source)
+            touched |= {member_at(members, line) or "*" for line in lines}
+
+        for member in sorted(touched):
+            selected = members_map.get(member, members_map.get("*", ALL))
+            if callable(selected):
+                picked = sorted(s['scenario_id'] for tc in test_cases or [] for s in tc['scenarios'] if selected(s))
+                reasons.append(f"{path}: {member} -> scenarios {', '.join(picked) or 'none'}")
+                scenario_ids |= set(picked)
+                continue
+            reasons.append(f"{path}: {member if member != '*' else 'code outside members'} -> "
+                           f"{'all test cases' if selected == ALL else ', '.join(selected) or 'nothing'}")
+            if selected == ALL:
+                return ALL, scenario_ids, reasons
+            case_ids |= set(selected)
+
+    return case_ids, scenario_ids, reasons
+
+
+def select(test_cases: List[Dict[str, Any]], base: str, head: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Return the test cases reduced to their affected scenarios, printing why."""
+    case_ids, scenario_ids, reasons = affected(base, head, test_cases)
+    for reason in reasons:
+        print(f"  {reason}")
+    if case_ids == ALL:
+        return test_cases
+
+    selected = []
+    for test_case in test_cases:
+        scenarios = [s for s in test_case['scenarios']
+                     if test_case['id'] in case_ids or s['scenario_id'] in scenario_ids]
+        if scenarios:
+            selected.append(dict(test_case, scenarios=scenarios))
+    return selected
+
+
+def main():
+    parser = argparse.ArgumentParser(description='List the scenarios affected by changes between two git refs')
+    parser.add_argument('base', help='Ref to compare against, e.g. origin/main')
+    parser.add_argument('head', nargs='?', help='Ref with the changes (default: the working tree)')
+    parser.add_argument('--json', '-j', default=os.path.join(HERE, 'test_cases.json'),
+                        help='Path to JSON file with test cases')
+    args = parser.parse_args()
+
+    with open(args.json) as f:
+        test_cases = json.load(f)['test_cases']
+    print(f"Changes in {args.base}..{args.head or 'working tree'}:")
+    selected = select(test_cases, args.base, args.head)
+    scenario_ids = [s['scenario_id'] for tc in selected for s in tc['scenarios']]
+    print(f"\n{len(scenario_ids)} of {sum(len(tc['scenarios']) for tc in test_cases)} scenarios affected"
+          + (f": {', '.join(scenario_ids)}" if scenario_ids else ""))
+
+
+if __name__ == "__main__":
+    main()
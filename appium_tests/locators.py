@@ -0,0 +1,263 @@
+"""
+Central registry of element locators for the app's screens.
+
+Each screen maps a logical field name to an ordered list of strategies.
+Accessibility ids (Flutter's semantics labels, exposed as content-desc) are
+listed first because UiAutomator2 resolves them without evaluating an XPath
+over the whole tree; XPaths remain as fallbacks. Parameterised fields use
+str.format placeholders, e.g. locators.find(driver, "survey", "gender_option", value="Female").
+
+Resolved element handles are cached per driver and per screen. The cache is
+dropped when the runner navigates to another screen or an element goes stale.
+
+Fields with several strategies are resolved by checking all of them against
+one page-source snapshot; the strategy that wins is remembered so later
+lookups of the same field try it first.
+"""
+import weakref
+from typing import Any, Dict, List, Optional, Tuple
+
+from appium.webdriver.common.appiumby import AppiumBy
+from selenium.webdriver.common.by import By
+from selenium.common.exceptions import NoSuchElementException
+
+import waits
+from page_snapshot import PageSnapshot
+
+Strategy = Tuple[str, str]
+
+LOCATORS: Dict[str, Dict[str, List[Strategy]]] = {
+    "login": {
+        "email": [(By.XPATH, '//android.widget.EditText[@hint="Enter your email or phone number"]')],
+        "password": [(By.XPATH, '//android.widget.EditText[@hint="Enter your password"]')],
+        "sign_in": [
+            (AppiumBy.ACCESSIBILITY_ID, "Sign in"),
+            (By.XPATH, '//android.widget.Button[@content-desc="Sign in"]'),
+        ],
+        "test_login": [
+            (AppiumBy.ACCESSIBILITY_ID, "Login as Test User"),
+            (By.XPATH, '//android.widget.Button[@content-desc="Login as Test User"]'),
+        ],
+        "spotify": [
+            (AppiumBy.ACCESSIBILITY_ID, "Continue with Spotify"),
+            (By.XPATH, '//android.widget.Button[@content-desc="Continue with Spotify"]'),
+        ],
+        "password_manager_dismiss": [
+            (By.XPATH, '//*[@text="Never" or @text="Not now" or @text="Cancel" or @content-desc="Never" '
+                       'or @content-desc="Not now" or @content-desc="Cancel"]'),
+        ],
+    },
+    "survey": {
+        "header": [
+            (AppiumBy.ACCESSIBILITY_ID, "AI Survey"),
+            (By.XPATH, '//android.view.View[@content-desc="AI Survey"]'),
+        ],
+        "logout": [(By.XPATH, '//android.view.View[@content-desc="Logout Button"]/android.widget.Button')],
+        # Flutter exposes a field's labelText as its hint. Positional XPaths
+        # under the ScrollView would only count the rows currently on screen
+        # and match another field once the form is scrolled.
+        "name": [(By.XPATH, '//android.widget.EditText[@hint="Name-Surname *"]')],
+        "day": [(By.XPATH, '//android.widget.EditText[@hint="Day"]')],
+        "month": [(By.XPATH, '//android.widget.EditText[@hint="Month"]')],
+        "year": [(By.XPATH, '//android.widget.EditText[@hint="Year"]')],
+        "education_dropdown": [
+            (AppiumBy.ACCESSIBILITY_ID, "Education Level *"),
+            (By.XPATH, '//android.widget.Button[@content-desc="Education Level *"]'),
+        ],
+        "education_option": [
+            (AppiumBy.ACCESSIBILITY_ID, "{value}"),
+            (By.XPATH, '//android.widget.Button[@content-desc="{value}"]'),
+        ],
+        "city": [
+            (By.XPATH, '//android.widget.EditText[@hint="City *"]'),
+            (By.XPATH, '//android.widget.EditText[@text="City *"]'),
+            (By.XPATH, '//android.widget.EditText[contains(@hint, "City")]'),
+        ],
+        "gender_option": [
+            (AppiumBy.ACCESSIBILITY_ID, "{value}"),
+            (By.XPATH, '//android.widget.RadioButton[@content-desc="{value}"]'),
+        ],
+        "ai_model_checkbox": [
+            (AppiumBy.ACCESSIBILITY_ID, "{value}"),
+            (By.XPATH, '//android.widget.CheckBox[@content-desc="{value}"]'),
+        ],
+        "defect_input": [(By.XPATH, '//android.widget.EditText[@hint="Defects/Cons of {model} *"]')],
+        "use_case": [(By.XPATH, '//android.widget.EditText[@hint="Beneficial Use Case of AI in Daily Life *"]')],
+        "send": [
+            (AppiumBy.ACCESSIBILITY_ID, "Send"),
+            (By.XPATH, '//android.widget.Button[@content-desc="Send"]'),
+        ],
+    },
+}
+
+
+def strategies(screen: str, field: str, **params) -> List[Strategy]:
+    """Return the ordered (by, value) strategies for a field, with parameters filled in."""
+    return [(by, value.format(**params)) for by, value in LOCATORS[screen][field]]
+
+
+def xpath(screen: str, field: str, **params) -> str:
+    """
+    Return the first XPath strategy for a field.
+
+    Used where a plain XPath is needed, e.g. for page-source snapshot queries.
+    """
+    for by, value in strategies(screen, field, **params):
+        if by == By.XPATH:
+            return value
+    raise KeyError(f"No XPath locator registered for {screen}.{field}")
+
+
+class ElementCache:
+    """Element handles resolved on the current screen of one driver."""
+
+    def __init__(self):
+        self.screen: Optional[str] = None
+        self.handles: Dict[Tuple[str, Tuple], Any] = {}
+
+    def get(self, screen: str, key: Tuple):
+        if screen != self.screen:
+            return None
+        return self.handles.get(key)
+
+    def put(self, screen: str, key: Tuple, element):
+        if screen != self.screen:
+            self.invalidate()
+            self.screen = screen
+        self.handles[key] = element
+
+    def invalidate(self):
+        self.screen = None
+        self.handles = {}
+
+
+_caches: "weakref.WeakKeyDictionary[Any, ElementCache]" = weakref.WeakKeyDictionary()
+
+# (screen, field) -> index of the strategy that last found the field
+_winning_strategy: Dict[Tuple[str, str], int] = {}
+
+
+def element_cache(driver) -> ElementCache:
+    """Return the element cache belonging to a driver, creating it on first use."""
+    cache = _caches.get(driver)
+    if cache is None:
+        cache = ElementCache()
+        _caches[driver] = cache
+    return cache
+
+
+def invalidate(driver):
+    """Forget all cached handles for a driver; call after navigating to another screen."""
+    element_cache(driver).invalidate()
+
+
+def find(driver, screen: str, field: str, timeout: float = 5, step: Optional[str] = None, **params):
+    """
+    Find a field on a screen, returning the element or None.
+
+    A cached handle is returned when available. Otherwise every poll checks
+    all strategies at once (see _race_strategies), so a missing preferred
+    strategy does not burn a full timeout before the fallbacks get a chance.
+    """
+    key = (field, tuple(sorted(params.items())))
+    cache = element_cache(driver)
+    cached = cache.get(screen, key)
+    if cached is not None:
+        return cached
+
+    candidates = strategies(screen, field, **params)
+
+    def first_match(d):
+        found = d.find_elements(*candidates[0])
+        return found[0] if found else False
+
+    def race(d):
+        return _race_strategies(d, screen, field, candidates) or False
+
+    condition = race if len(candidates) > 1 else first_match
+    try:
+        element = waits.wait_until(driver, condition, step or f"{screen}.{field}", timeout=timeout)
+    except Exception:
+        element = None
+
+    if element is not None:
+        cache.put(screen, key, element)
+    return element
+
+
+def find_group(driver, screen: str, fields: List[str], timeout: float = 5,
+               step: Optional[str] = None) -> List[Any]:
+    """
+    Find several fields of a screen with one round-trip, returning elements or None per field.
+
+    Fields with a single XPath strategy are combined into one XPath union;
+    the matches come back in document order, so `fields` must be listed in
+    the order they appear on screen. If the union does not match exactly one
+    element per field, each field is looked up on its own.
+    """
+    cache = element_cache(driver)
+    cached = [cache.get(screen, (field, ())) for field in fields]
+    if all(element is not None for element in cached):
+        return cached
+
+    candidates = [strategies(screen, field) for field in fields]
+    if len(fields) > 1 and all(len(c) == 1 and c[0][0] == By.XPATH for c in candidates):
+        union = " | ".join(c[0][1] for c in candidates)
+
+        def all_present(d):
+            found = d.find_elements(By.XPATH, union)
+            return found if len(found) == len(fields) else False
+
+        found = waits.wait_until(driver, all_present, step or f"{screen}.{'+'.join(fields)}", timeout=timeout)
+        if found:
+            for field, element in zip(fields, found):
+                cache.put(screen, (field, ()), element)
+            return found
+        # Something is missing; a single attempt per field tells which one
+        return [find(driver, screen, field, timeout=0) for field in fields]
+
+    return [find(driver, screen, field, timeout=timeout, step=step) for field in fields]
+
+
+def _snapshot_matches(snapshot: PageSnapshot, by: str, value: str) -> Optional[bool]:
+    """Check a strategy against a snapshot; None means it has to be tried on the device."""
+    if by == AppiumBy.ACCESSIBILITY_ID:
+        return snapshot.has_content_desc(value)
+    if by == By.XPATH:
+        return snapshot.matches(value)
+    return None
+
+
+def _race_strategies(driver, screen: str, field: str, candidates: List[Strategy]):
+    """
+    Resolve a field with several strategies in as few round-trips as possible.
+
+    The remembered winner is tried first with a single find_elements call.
+    Otherwise one page-source snapshot decides which strategy matches, and
+    only that one is sent to the device.
+    """
+    memo_key = (screen, field)
+    winner = _winning_strategy.get(memo_key)
+    if winner is not None and winner < len(candidates):
+        found = driver.find_elements(*candidates[winner])
+        if found:
+            return found[0]
+
+    snapshot = PageSnapshot.capture(driver)
+    for index, (by, value) in enumerate(candidates):
+        if index == winner or _snapshot_matches(snapshot, by, value) is False:
+            continue
+        found = driver.find_elements(by, value)
+        if found:
+            _winning_strategy[memo_key] = index
+            return found[0]
+    return None
+
+
+def require(driver, screen: str, field: str, timeout: float = 5, step: Optional[str] = None, **params):
+    """Like find(), but raise NoSuchElementException when the field is missing."""
+    element = find(driver, screen, field, timeout=timeout, step=step, **params)
+    if element is None:
+        raise NoSuchElementException(f"{screen}.{field} not found")
+    return element
+
@@ -1,45 +1,30 @@
-from appium import webdriver
-from appium.options.android import UiAutomator2Options
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 import time
+import artifacts
+import locators
+import driver_factory
+import screen_state
+from screen_state import Screen
 
 def create_driver():
     """Sets up and returns the Appium driver with appropriate capabilities"""
-    desired_caps = {
-        "platformName": "Android",
-        "platformVersion": "16",
-        "deviceName": "emulator-5554",
-        "appPackage": "com.example.my_auth_app",
-        "appActivity": "com.example.my_auth_app.MainActivity",
-        "automationName": "UiAutomator2",
-        "noReset": True
-    }
-    options = UiAutomator2Options().load_capabilities(desired_caps)
-    return webdriver.Remote("http://127.0.0.1:4723", options=options)
-
-def verify_login_success(wait, driver):
-    """Verifies login by checking for the AI Survey page"""
-    try:
-        # Try to find the survey page header
-        survey_header = wait.until(
-            EC.presence_of_element_located((By.XPATH, '//android.view.View[@content-desc="AI Survey"]'))
-        )
+    return driver_factory.get_driver()
+
+def verify_login_success(driver):
+    """Verifies login by waiting for the AI Survey page"""
+    # The login success page is shown briefly before the survey
+    if screen_state.wait_for(driver, Screen.SURVEY, "login_success", timeout=20):
         print("✅ Login successful! Found AI Survey page.")
         return True
-    except Exception as e:
-        print(f"❌ Login verification failed: {e}")
-        print("🪵 Page source for debug:")
-        print(driver.page_source)
-        return False
+    print(f"❌ Login verification failed: on {screen_state.detect(driver)} screen")
+    artifacts.capture(driver, "login_verification")
+    return False
 
 def dismiss_password_manager(driver):
     """Attempts to dismiss password manager popups"""
     try:
         # Look for the "Never" or "Not now" button on the popup
-        never_buttons = driver.find_elements(By.XPATH,
-            '//*[@text="Never" or @text="Not now" or @text="Cancel" or @content-desc="Never" or @content-desc="Not now" or @content-desc="Cancel"]')
+        never_buttons = driver.find_elements(By.XPATH, locators.xpath("login", "password_manager_dismiss"))
 
         if never_buttons:
             never_buttons[0].click()
@@ -54,27 +39,24 @@ def dismiss_password_manager(driver):
 def test_email_login():
     """Tests the email/password login functionality"""
     driver = create_driver()
-    wait = WebDriverWait(driver, 20)
 
     try:
-        # Wait longer for app to fully load and stabilize
-        time.sleep(5)
+        if not screen_state.wait_for(driver, Screen.LOGIN, "login_screen", timeout=20):
+            print(f"❌ Login screen did not appear, on {screen_state.detect(driver)} screen")
+            artifacts.capture(driver, "email_login_failure")
+            return False
         print("App loaded, starting email login test...")
 
 
          # Find email input field by hint text
-        email_input = wait.until(EC.element_to_be_clickable(
-            (By.XPATH, '//android.widget.EditText[@hint="Enter your email or phone number"]')
-        ))
+        email_input = locators.require(driver, "login", "email", timeout=20)
         email_input.click()
         email_input.clear()
         email_input.send_keys("john@example.com")
         print("✅ Entered email")
 
         # Find password input field by hint text
-        password_input = wait.until(EC.element_to_be_clickable(
-            (By.XPATH, '//android.widget.EditText[@hint="Enter your password"]')
-        ))
+        password_input = locators.require(driver, "login", "password", timeout=20)
         password_input.click()
         password_input.clear()
         password_input.send_keys("pass123")
@@ -98,10 +80,9 @@ def test_email_login():
         max_retries = 3
         for attempt in range(max_retries):
             try:
-                sign_in_button = wait.until(EC.element_to_be_clickable(
-                    (By.XPATH, '//android.widget.Button[@content-desc="Sign in"]')
-                ))
+                sign_in_button = locators.require(driver, "login", "sign_in", timeout=20)
                 sign_in_button.click()
+                locators.invalidate(driver)
                 print("✅ Sign in button clicked!")
                 break
             except Exception as e:
@@ -113,32 +94,15 @@ def test_email_login():
                     print(f"❌ Failed to click sign in button after {max_retries} attempts: {e}")
                     return False
 
-        # Wait for results
-        time.sleep(5)
-
         # Verify login success
-        try:
-            if "AI Survey" in driver.page_source:
-                print("✅ Login successful! Found AI Survey page.")
-                return True
-            else:
-                print("❌ Not on survey page after login attempt")
-                print("Page source:")
-                print(driver.page_source)
-                return False
-        except Exception as e:
-            print(f"❌ Error verifying login success: {e}")
-            return False
+        return verify_login_success(driver)
 
     except Exception as e:
         print(f"❌ Email/password login test failed: {e}")
-        try:
-            print(driver.page_source)
-        except:
-            print("Could not get page source")
+        artifacts.capture(driver, "email_login_failure")
         return False
     finally:
-        driver.quit()
+        driver_factory.release_driver(driver)
 
 def test_invalid_credentials():
     """Test various incorrect login scenarios with a simplified, robust approach."""
@@ -156,15 +120,9 @@ def test_invalid_credentials():
     # Results tracking
     results = []
 
-    email_field = wait.until(EC.element_to_be_clickable(
-        (By.XPATH, '//android.widget.EditText[@hint="Enter your email or phone number"]')
-    ))
-    password_field = wait.until(EC.element_to_be_clickable(
-        (By.XPATH, '//android.widget.EditText[@hint="Enter your password"]')
-    ))
-    login_button = wait.until(EC.element_to_be_clickable(
-        (By.XPATH, '//android.widget.Button[@content-desc="Sign in"]')
-    ))
+    email_field = locators.require(driver, "login", "email", timeout=20)
+    password_field = locators.require(driver, "login", "password", timeout=20)
+    login_button = locators.require(driver, "login", "sign_in", timeout=20)
 
     # Run each test independently
     for i, test_case in enumerate(test_cases):
@@ -190,15 +148,15 @@ def test_invalid_credentials():
         time.sleep(3)
 
         # Check if login form is still present (failure expected)
-        login_still_there = driver.find_elements(By.XPATH, '//android.widget.Button[@content-desc="Sign in"]')
-        if login_still_there:
+        state = screen_state.detect(driver)
+        if state.screen is Screen.LOGIN:
             print("✅ PASS: Login prevented as expected")
             results.append(True)
         else:
-            print("❌ FAIL: Possibly logged in or screen changed")
+            print(f"❌ FAIL: Screen changed to {state}")
             results.append(False)
 
-    driver.quit()
+    driver_factory.release_driver(driver)
 
     print("\n📊 Summary:")
     for i, result in enumerate(results):
@@ -206,20 +164,19 @@ def test_invalid_credentials():
 
 
 
-def logout_from_survey_page(driver, wait):
+def logout_from_survey_page(driver):
     """Clicks the logout button to return to the login screen."""
     try:
-        logout_button = wait.until(
-            EC.element_to_be_clickable((By.XPATH, '//android.view.View[@content-desc="Logout Button"]/android.widget.Button'))
-        )
+        logout_button = locators.require(driver, "survey", "logout", timeout=20)
         logout_button.click()
+        locators.invalidate(driver)
+        if not screen_state.wait_for(driver, Screen.LOGIN, "logout", timeout=20):
+            raise RuntimeError(f"on {screen_state.detect(driver)} screen after logout")
         print("🔚 Logged out successfully")
-        time.sleep(3)  # Let the login screen load
         return True
     except Exception as e:
         print(f"⚠️ Logout failed: {e}")
-        print("🪵 Page source:")
-        print(driver.page_source)
+        artifacts.capture(driver, "logout_failure")
         return False
 
 
@@ -230,10 +187,9 @@ if __name__ == "__main__":
         print("✅ Email/Password Login Test: PASSED")
 
         driver = create_driver()
-        wait = WebDriverWait(driver, 20)
 
         print("🔄 Attempting to log out...")
-        if logout_from_survey_page(driver, wait):
+        if logout_from_survey_page(driver):
             print("🚪 Proceeding with Invalid Credentials Corner Case Test...")
             test_invalid_credentials()
         else:
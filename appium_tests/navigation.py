@@ -0,0 +1,136 @@
+"""
+Getting the app to the login screen and signing in.
+
+These are flows (see ops.py) shared by the synchronous runner, which wraps
+them in test_runner.reset_to_login() and login_with_email(), and the
+asyncio runner, so both reset and log in the same way.
+"""
+import traceback
+
+from selenium.webdriver.common.by import By
+
+import form_fill
+import locators
+import ops
+import screen_state
+import waits
+from ops import Flow, op
+from screen_state import Screen
+
+APP_PACKAGE = "com.example.my_auth_app"
+# Custom scheme registered in AndroidManifest.xml; opening it brings MainActivity to the front
+APP_DEEP_LINK = "myauthapp://"
+
+# Elements whose appearance marks the end of a screen transition
+LOGIN_EMAIL_XPATH = locators.xpath("login", "email")
+
+
+def login_flow(email: str = "john@example.com", password: str = "pass123") -> Flow:
+    """Log in to the app with the given credentials; returns whether the survey appeared."""
+    try:
+        email_input = yield op("find", "login", "email", timeout=waits.DEFAULT_TIMEOUT, step="login_screen")
+        if not email_input:
+            print("❌ Login screen did not appear")
+            return False
+        print("App loaded, starting email login test...")
+
+        password_input = yield from ops.require("login", "password", timeout=waits.DEFAULT_TIMEOUT)
+        yield from form_fill.fill_flow([(email_input, email), (password_input, password)])
+        print("✅ Entered email and password")
+
+        # Sign in button
+        sign_in_button = yield from ops.require("login", "sign_in", timeout=waits.DEFAULT_TIMEOUT)
+        yield op("click", sign_in_button)
+        yield op("invalidate")
+        print("✅ Sign in button clicked!")
+
+        # Wait for the survey page (shown after the short login success page)
+        if not (yield op("find", "survey", "header", timeout=waits.DEFAULT_TIMEOUT, step="survey_page")):
+            print("❌ Survey page did not appear after sign in")
+            return False
+        return True
+    except Exception as e:
+        print(f"❌ Email/password login test failed: {e}")
+        return False
+
+
+def restart_flow() -> Flow:
+    """Terminate and relaunch the app; returns whether the login screen appeared."""
+    try:
+        yield op("invalidate")
+        yield op("execute", "mobile: terminateApp", {"appId": APP_PACKAGE})
+        yield op("execute", "mobile: activateApp", {"appId": APP_PACKAGE})
+        # The app is ready once the login form is on screen
+        if not (yield op("wait_for_xpaths", [LOGIN_EMAIL_XPATH], "app_launch")):
+            print("❌ Login screen did not appear after restarting the app")
+            return False
+        return True
+    except Exception as e:
+        print(f"Error resetting app: {e}")
+        traceback.print_exc()
+        return False
+
+
+def _detect() -> Flow:
+    try:
+        return screen_state.classify((yield op("snapshot")))
+    except Exception as e:
+        print(f"Could not read the screen: {e}")
+        return screen_state.ScreenState(Screen.UNKNOWN, 0.0)
+
+
+def current_screen_flow() -> Flow:
+    """
+    Identify the screen currently shown without waiting.
+
+    A password manager popup is dismissed first, and the short login success
+    page is given a moment to give way to the survey.
+    """
+    state = yield from _detect()
+    if state.screen is Screen.PASSWORD_MANAGER_POPUP:
+        dismiss_buttons = yield op("find_elements", By.XPATH, locators.xpath("login", "password_manager_dismiss"))
+        if dismiss_buttons:
+            yield op("click", dismiss_buttons[0])
+            print("✅ Dismissed password manager popup")
+        state = yield from _detect()
+    if state.screen is Screen.LOGIN_SUCCESS:
+        state = (yield op("wait_for_screen", Screen.SURVEY, "reset_redirect", timeout=5)) or state
+    return state
+
+
+def reset_flow(full_reset: bool = False) -> Flow:
+    """
+    Bring the app back to the login screen using the cheapest path available.
+
+    Paths, from cheapest to most expensive:
+      - "in_place":  already on the login screen; logging in clears the fields
+      - "logout":    on the survey form; press the logout button
+      - "deep_link": unknown screen; open the app's deep link to bring MainActivity forward
+      - "restart":   terminate and relaunch the app
+
+    Returns the name of the path that worked, or None if the app could not be reset.
+    """
+    if not full_reset:
+        try:
+            screen = (yield from current_screen_flow()).screen
+            if screen is Screen.LOGIN:
+                return "in_place"
+
+            if screen is Screen.SURVEY:
+                logout_buttons = yield op("find_elements", By.XPATH, locators.xpath("survey", "logout"))
+                if logout_buttons:
+                    yield op("click", logout_buttons[0])
+                    yield op("invalidate")
+                    if (yield op("wait_for_xpaths", [LOGIN_EMAIL_XPATH], "reset_logout", timeout=5)):
+                        return "logout"
+
+            yield op("invalidate")
+            yield op("execute", "mobile: deepLink", {"url": APP_DEEP_LINK, "package": APP_PACKAGE})
+            if (yield op("wait_for_xpaths", [LOGIN_EMAIL_XPATH], "reset_deep_link", timeout=5)):
+                return "deep_link"
+        except Exception as e:
+            print(f"Cheap reset failed, falling back to restart: {e}")
+
+    if (yield from restart_flow()):
+        return "restart"
+    return None
@@ -0,0 +1,144 @@
+"""
+Flows: harness logic written once for the synchronous and the asyncio runner.
+
+A flow is a generator that describes what to do on the device without doing
+it: every WebDriver interaction is yielded as an Op, and the value sent back
+is the op's result. A failed op is thrown into the flow at the yield, so
+flows handle errors with ordinary try/except:
+
+    def tick(model):
+        checkbox = yield op("find", "survey", "ai_model_checkbox", value=model)
+        yield op("click", checkbox)
+
+run() carries a flow out on a Selenium driver through DriverOps, and
+run_async() on an asyncio session (async_runner.SessionOps), so the steps,
+login, reset, text entry and scrolling flows, with their messages and
+verdicts, exist only once.
+
+Ops a backend provides:
+
+  snapshot()                               PageSnapshot of the current screen
+  find(screen, field, timeout, step, **p)  element or None, waiting for it
+  find_group(screen, fields)               elements (or None) in one round-trip
+  find_elements(by, value)                 matching elements, without waiting
+  text(element) / click / clear / send_keys(element, text)
+  execute(script, args)                    execute_script, e.g. `mobile:` commands
+  execute_driver(script)                   Appium's execute-driver plugin
+  swipe(start_x, start_y, end_x, end_y, duration)
+  invalidate()                             forget cached element handles
+  wait_for_xpaths(xpaths, step, timeout)   first XPath that matched, or None
+  wait_for_screen(screens, step, timeout)  ScreenState, or None on timeout
+  unsupported()                            mutable set of strategies the server rejected
+"""
+import weakref
+from typing import Any, Dict, Generator, NamedTuple, Set, Tuple
+
+from selenium.common.exceptions import NoSuchElementException
+
+import locators
+import screen_state
+import waits
+from page_snapshot import PageSnapshot
+
+Flow = Generator["Op", Any, Any]
+
+_unsupported: "weakref.WeakKeyDictionary[Any, Set[str]]" = weakref.WeakKeyDictionary()
+
+
+class Op(NamedTuple):
+    """One interaction with the device, to be carried out by a backend."""
+    name: str
+    args: Tuple[Any, ...]
+    kwargs: Dict[str, Any]
+
+
+def op(name: str, /, *args, **kwargs) -> Op:
+    return Op(name, args, kwargs)
+
+
+def require(screen: str, field: str, **kwargs) -> Flow:
+    """Find a field, raising NoSuchElementException when it is missing."""
+    element = yield op("find", screen, field, **kwargs)
+    if element is None:
+        raise NoSuchElementException(f"{screen}.{field} not found")
+    return element
+
+
+def run(flow: Flow, backend) -> Any:
+    """Carry out a flow with a synchronous backend and return its result."""
+    value, error = None, None
+    while True:
+        try:
+            request = flow.throw(error) if error is not None else flow.send(value)
+        except StopIteration as stop:
+            return stop.value
+        try:
+            value, error = getattr(backend, request.name)(*request.args, **request.kwargs), None
+        except Exception as e:
+            value, error = None, e
+
+
+async def run_async(flow: Flow, backend) -> Any:
+    """Carry out a flow with a backend whose ops are coroutines and return its result."""
+    value, error = None, None
+    while True:
+        try:
+            request = flow.throw(error) if error is not None else flow.send(value)
+        except StopIteration as stop:
+            return stop.value
+        try:
+            value, error = await getattr(backend, request.name)(*request.args, **request.kwargs), None
+        except Exception as e:
+            value, error = None, e
+
+
+class DriverOps:
+    """The ops on a Selenium/Appium driver, with the locator cache and recorded waits."""
+
+    def __init__(self, driver):
+        self.driver = driver
+
+    def snapshot(self) -> PageSnapshot:
+        return PageSnapshot.capture(self.driver)
+
+    def find(self, screen: str, field: str, timeout: float = 5, step=None, **params):
+        return locators.find(self.driver, screen, field, timeout=timeout, step=step, **params)
+
+    def find_group(self, screen: str, fields, timeout: float = 5, step=None):
+        return locators.find_group(self.driver, screen, fields, timeout=timeout, step=step)
+
+    def find_elements(self, by: str, value: str):
+        return self.driver.find_elements(by, value)
+
+    def text(self, element) -> str:
+        return element.text
+
+    def click(self, element):
+        element.click()
+
+    def clear(self, element):
+        element.clear()
+
+    def send_keys(self, element, text: str):
+        element.send_keys(text)
+
+    def execute(self, script: str, args=None):
+        return self.driver.execute_script(script, args or {})
+
+    def execute_driver(self, script: str):
+        return self.driver.execute_driver(script)
+
+    def swipe(self, start_x: int, start_y: int, end_x: int, end_y: int, duration: int = 0):
+        self.driver.swipe(start_x, start_y, end_x, end_y, duration)
+
+    def invalidate(self):
+        locators.invalidate(self.driver)
+
+    def wait_for_xpaths(self, xpaths, step: str, timeout=None):
+        return waits.wait_for_any_xpath(self.driver, xpaths, step, timeout=timeout)
+
+    def wait_for_screen(self, screens, step: str, timeout=None):
+        return screen_state.wait_for(self.driver, screens, step, timeout=timeout)
+
+    def unsupported(self) -> Set[str]:
+        return _unsupported.setdefault(self.driver, set())
@@ -0,0 +1,154 @@
+"""
+Local queries over a single page-source snapshot.
+
+Asking the Appium server for every TextView's text costs one HTTP round-trip
+per element. A PageSnapshot fetches `driver.page_source` once, parses it with
+ElementTree and answers text / hint / content-desc questions in memory.
+"""
+import re
+import xml.etree.ElementTree as ET
+from typing import Iterable, Iterator, List, Optional
+
+# Words that mark a TextView as a validation or error message
+ERROR_KEYWORDS = ["error", "invalid", "please", "required"]
+
+# //tag[...] whose predicate ElementTree cannot evaluate: contains() and or/and
+_PREDICATE_XPATH = re.compile(r'^//([\w.*]+)\[(.*)\]$')
+_QUOTED = re.compile(r'"[^"]*"')
+_UNQUOTED_SPACE = r'(?=(?:[^"]*"[^"]*")*[^"]*$)'  # lookahead: not inside a quoted string
+_OR = re.compile(r'\s+or\s+' + _UNQUOTED_SPACE)
+_AND = re.compile(r'\s+and\s+' + _UNQUOTED_SPACE)
+_UNION = re.compile(r'\s*\|\s*' + _UNQUOTED_SPACE)
+_CONTAINS_TERM = re.compile(r'^contains\(@([\w-]+),\s*"([^"]*)"\)$')
+_EQUALS_TERM = re.compile(r'^@([\w-]+)\s*=\s*"([^"]*)"$')
+
+
+def _predicate_matches(element: ET.Element, predicate: str) -> Optional[bool]:
+    """
+    Evaluate a flat predicate of contains()/@attr="value" terms joined by or/and.
+
+    Returns None if the predicate uses anything else (parentheses, other functions).
+    """
+    any_group = False
+    for group in _OR.split(predicate):
+        all_terms = True
+        for term in _AND.split(group):
+            term = term.strip()
+            contains = _CONTAINS_TERM.match(term)
+            equals = _EQUALS_TERM.match(term)
+            if contains:
+                ok = contains.group(2) in (element.get(contains.group(1)) or '')
+            elif equals:
+                ok = element.get(equals.group(1)) == equals.group(2)
+            else:
+                return None
+            all_terms = all_terms and ok
+        any_group = any_group or all_terms
+    return any_group
+
+
+class PageSnapshot:
+    """An in-memory copy of the UI hierarchy at one point in time."""
+
+    def __init__(self, page_source: str, root: Optional[ET.Element] = None):
+        self.source = page_source
+        self.root = root if root is not None else ET.fromstring(page_source)
+
+    @classmethod
+    def from_root(cls, root: ET.Element) -> "PageSnapshot":
+        """Wrap an already-built element tree."""
+        return cls(ET.tostring(root, encoding='unicode'), root)
+
+    @classmethod
+    def capture(cls, driver) -> "PageSnapshot":
+        """Fetch the page source once and parse it."""
+        return cls(driver.page_source)
+
+    def elements(self, class_name: Optional[str] = None) -> Iterator[ET.Element]:
+        """Iterate over all elements in document order, optionally filtered by class."""
+        for element in self.root.iter():
+            if class_name is None or element.tag == class_name:
+                yield element
+
+    def xpath(self, xpath: str) -> List[ET.Element]:
+        """
+        Evaluate an XPath against the snapshot.
+
+        Supports the ElementTree subset (tag steps, positional predicates and
+        [@attr="value"] tests), single-step //tag[...] queries whose predicate
+        combines contains() and @attr="value" with or/and, and unions of
+        those joined with |. Raises SyntaxError for anything else.
+        """
+        parts = _UNION.split(xpath)
+        if len(parts) > 1:
+            found = {id(e): e for part in parts for e in self.xpath(part)}
+            return [e for e in self.root.iter() if id(e) in found]
+
+        match = _PREDICATE_XPATH.match(xpath)
+        if match and re.search(r'contains\(|\sor\s|\sand\s', _QUOTED.sub('""', match.group(2))):
+            tag, predicate = match.groups()
+            found = []
+            for element in self.elements(None if tag == '*' else tag):
+                ok = _predicate_matches(element, predicate)
+                if ok is None:
+                    raise SyntaxError(f"Unsupported XPath predicate: {predicate}")
+                if ok:
+                    found.append(element)
+            return found
+
+        if xpath.startswith('//'):
+            xpath = '.' + xpath
+        return self.root.findall(xpath)
+
+    def exists(self, xpath: str) -> bool:
+        """Whether at least one element matches the XPath."""
+        return bool(self.xpath(xpath))
+
+    def matches(self, xpath: str) -> Optional[bool]:
+        """
+        Whether the XPath matches anything, or None if it cannot be evaluated locally.
+        """
+        try:
+            return self.exists(xpath)
+        except SyntaxError:
+            return None
+
+    def texts(self, class_name: str = 'android.widget.TextView') -> List[str]:
+        """Non-empty text attributes of all elements of the given class."""
+        return [e.get('text') for e in self.elements(class_name) if e.get('text')]
+
+    def has_attribute(self, attribute: str, value: str, class_name: Optional[str] = None) -> bool:
+        """Whether any element has exactly the given attribute value."""
+        return any(e.get(attribute) == value for e in self.elements(class_name))
+
+    def has_hint(self, hint: str) -> bool:
+        return self.has_attribute('hint', hint)
+
+    def has_content_desc(self, content_desc: str) -> bool:
+        return self.has_attribute('content-desc', content_desc)
+
+    def find_text_containing(self, needle: str, class_name: str = 'android.widget.TextView') -> Optional[str]:
+        """Return the first text containing `needle` (case-insensitive), or None."""
+        needle = needle.lower()
+        for text in self.texts(class_name):
+            if needle in text.lower():
+                return text
+        return None
+
+    def find_error(self, keywords: Iterable[str] = ERROR_KEYWORDS) -> Optional[str]:
+        """
+        Return the first visible error message, or None.
+
+        Looks at TextView texts containing any of the error keywords first,
+        then at snackbar messages.
+        """
+        keywords = [k.lower() for k in keywords]
+        for text in self.texts():
+            if any(k in text.lower() for k in keywords):
+                return text
+
+        for element in self.elements('android.widget.TextView'):
+            if 'snackbar_text' in (element.get('resource-id') or '') and element.get('text'):
+                return element.get('text')
+
+        return None
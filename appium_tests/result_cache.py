@@ -0,0 +1,147 @@
+"""
+Cache of passing scenario results, keyed by app build and scenario content.
+
+A scenario's fingerprint combines:
+- the installed app build: the SHA-256 of the APK, or the versionCode and
+  install time reported by `adb shell dumpsys package`
+- the test harness itself (the runner, step engine and locator sources), so a
+  fix in the harness reruns everything
+- the canonical JSON of the scenario
+
+Only passes are cached. A scenario whose fingerprint has a cached pass is
+skipped; any change to the app, the harness or the scenario misses the cache.
+Entries live in a JSON-lines file and are evicted by age and, beyond a
+maximum count, least recently used first.
+"""
+import glob
+import hashlib
+import json
+import os
+import re
+import subprocess
+import time
+from typing import Any, Dict, Optional
+
+DEFAULT_MAX_ENTRIES = 1000
+DEFAULT_MAX_AGE_DAYS = 14
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+# Where `flutter build apk` puts its output, relative to this directory
+DEFAULT_APK_GLOB = os.path.join(HERE, '..', 'build', 'app', 'outputs', 'flutter-apk', '*.apk')
+# Sources whose changes can change a scenario's verdict
+HARNESS_FILES = ['test_runner.py', 'steps.py', 'locators.py', 'waits.py', 'page_snapshot.py', 'form_fill.py',
+                 'survey_oracle.py', 'scroll.py', 'screen_state.py', 'ops.py', 'navigation.py']
+
+
+def _sha256_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def app_build_id(package: str, apk_path: Optional[str] = None, udid: Optional[str] = None) -> Optional[str]:
+    """
+    Identify the app build under test, or None if it cannot be determined.
+
+    Uses the given APK, else the newest APK from `flutter build`, else asks
+    the device for the installed package's versionCode and last update time.
+    """
+    if apk_path:
+        return f"apk:{_sha256_file(apk_path)}"
+
+    built = sorted(glob.glob(DEFAULT_APK_GLOB), key=os.path.getmtime)
+    if built:
+        return f"apk:{_sha256_file(built[-1])}"
+
+    command = ['adb'] + (['-s', udid] if udid else []) + ['shell', 'dumpsys', 'package', package]
+    try:
+        output = subprocess.run(command, capture_output=True, text=True, timeout=15).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    version = re.search(r'versionCode=(\d+)', output)
+    updated = re.search(r'lastUpdateTime=([\d\- :]+)', output)
+    if not version:
+        return None
+    return f"installed:{version.group(1)}:{updated.group(1).strip() if updated else ''}"
+
+
+def harness_id() -> str:
+    """Hash of the harness sources that decide a scenario's verdict."""
+    digest = hashlib.sha256()
+    for name in HARNESS_FILES:
+        path = os.path.join(HERE, name)
+        if os.path.exists(path):
+            digest.update(name.encode())
+            digest.update(_sha256_file(path).encode())
+    return digest.hexdigest()
+
+
+def fingerprint(app_id: str, harness: str, scenario: Dict[str, Any], options: Optional[Dict[str, Any]] = None) -> str:
+    """Fingerprint of one scenario run against one app build."""
+    canonical = json.dumps({"app": app_id, "harness": harness, "scenario": scenario, "options": options or {}},
+                           sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    """Passing results by fingerprint, stored in a JSON-lines file."""
+
+    def __init__(self, path: str, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 max_age_days: float = DEFAULT_MAX_AGE_DAYS):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age = max_age_days * 86400
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # a torn last line from an interrupted write
+                    self.entries[entry['fingerprint']] = entry
+        except OSError as e:
+            print(f"Could not read result cache {self.path}: {e}")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached result for a fingerprint, if fresh, marking it as used."""
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if time.time() - entry['stored_at'] > self.max_age:
+            del self.entries[key]
+            return None
+        entry['last_used'] = time.time()
+        return entry['result']
+
+    def put(self, key: str, result: Dict[str, Any]):
+        now = time.time()
+        self.entries[key] = {"fingerprint": key, "stored_at": now, "last_used": now, "result": result}
+
+    def evict(self):
+        """Drop expired entries, then the least recently used beyond max_entries."""
+        now = time.time()
+        fresh = [e for e in self.entries.values() if now - e['stored_at'] <= self.max_age]
+        fresh.sort(key=lambda e: e['last_used'], reverse=True)
+        self.entries = {e['fingerprint']: e for e in fresh[:self.max_entries]}
+
+    def save(self):
+        """Evict and rewrite the cache file atomically."""
+        self.evict()
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            for entry in self.entries.values():
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,169 @@
+"""
+Stream scenario results to disk as soon as each one finishes.
+
+Each result is appended to a JSON-lines file and flushed, so a dashboard
+tailing the file sees progress and a crash or Ctrl-C loses at most the
+scenario that was running. fsync is batched: the file is synced every
+`sync_every` results or `sync_interval` seconds, whichever comes first, and
+on close. An optional JUnit XML report is rewritten on every sync.
+
+read_completed() loads the results of an interrupted run so it can be
+resumed without repeating finished scenarios. make_result() builds the
+record of one scenario for either runner, and report_result() hands it to
+the run's stream.
+"""
+import json
+import os
+import threading
+import time
+import xml.etree.ElementTree as ET
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import form_fill
+import tracing
+import waits
+
+DEFAULT_SYNC_EVERY = 10
+DEFAULT_SYNC_INTERVAL = 5.0
+
+
+def make_result(test_case: Dict[str, Any], scenario: Dict[str, Any], success: bool, message: str) -> Dict[str, Any]:
+    """Build the result record stored in the results file for one scenario."""
+    result = {
+        "test_case_id": test_case['id'],
+        "scenario_id": scenario['scenario_id'],
+        "description": scenario['description'],
+        "success": success,
+        "message": message,
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    }
+    recorder = waits.current_recorder()
+    if recorder is not None:
+        result["wait_seconds"] = recorder.total_seconds()
+        result["waits"] = recorder.records
+    stats = form_fill.current_stats()
+    if stats is not None:
+        result["text_entry"] = stats.as_dict()
+    tracer = tracing.current_tracer()
+    if tracer is not None:
+        tracer.finish()
+        result["steps"] = tracer.summary()
+    return result
+
+
+def report_result(result: Dict[str, Any], run_options: Optional[Dict[str, Any]] = None):
+    """Hand a finished result to the run's result stream, if there is one."""
+    on_result = (run_options or {}).get("on_result")
+    if on_result is None:
+        return
+    try:
+        on_result(result)
+    except Exception as e:
+        print(f"Error streaming result: {e}")
+
+
+def read_completed(path: str) -> Dict[str, Dict[str, Any]]:
+    """Results already in a stream file by scenario id; later lines win."""
+    completed: Dict[str, Dict[str, Any]] = {}
+    if not os.path.exists(path):
+        return completed
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # a torn last line from an interrupted write
+            completed[result['scenario_id']] = result
+    return completed
+
+
+def write_junit(results: List[Dict[str, Any]], path: str, name: str = "survey-app"):
+    """
+    Write results as JUnit XML, one testsuite per test case, replacing the file atomically.
+
+    Only the last attempt of a retried scenario is reported. Failures of
+    quarantined scenarios are reported as skipped, so they do not fail the build.
+    """
+    results = list({r['scenario_id']: r for r in results}.values())
+    suites: Dict[str, List[Dict[str, Any]]] = {}
+    for result in results:
+        suites.setdefault(result['test_case_id'], []).append(result)
+
+    def counts(suite_results: List[Dict[str, Any]]) -> Dict[str, str]:
+        skipped = sum(1 for r in suite_results if not r['success'] and r.get('quarantined'))
+        failures = sum(1 for r in suite_results if not r['success']) - skipped
+        return {"tests": str(len(suite_results)), "failures": str(failures), "skipped": str(skipped)}
+
+    root = ET.Element("testsuites", name=name, **counts(results))
+    for test_case_id, suite_results in suites.items():
+        suite = ET.SubElement(root, "testsuite", name=test_case_id, **counts(suite_results))
+        for result in suite_results:
+            seconds = sum(s['seconds'] for s in result.get('steps', []) if '/' not in s['name'])
+            case = ET.SubElement(suite, "testcase", classname=test_case_id, name=result['scenario_id'],
+                                 time=f"{seconds:.3f}")
+            if result.get('cached'):
+                ET.SubElement(case, "system-out").text = "Reused cached pass"
+            elif len(result.get('attempts', [])) > 1:
+                ET.SubElement(case, "system-out").text = "\n".join(
+                    f"Attempt {i}: {'passed' if a['success'] else 'failed'}: {a['message']}"
+                    for i, a in enumerate(result['attempts'], 1))
+            if not result['success'] and result.get('quarantined'):
+                ET.SubElement(case, "skipped", message=f"Quarantined as flaky: {result['message']}")
+            elif not result['success']:
+                ET.SubElement(case, "failure", message=result['message']).text = result.get('description', '')
+
+    tmp_path = f"{path}.tmp"
+    ET.ElementTree(root).write(tmp_path, encoding='utf-8', xml_declaration=True)
+    os.replace(tmp_path, path)
+
+
+class ResultStream:
+    """Append-only JSON-lines sink for scenario results, safe to share between workers."""
+
+    def __init__(self, path: str, resume: bool = False, junit_path: Optional[str] = None,
+                 sync_every: int = DEFAULT_SYNC_EVERY, sync_interval: float = DEFAULT_SYNC_INTERVAL):
+        self.path = path
+        self.junit_path = junit_path
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.results: List[Dict[str, Any]] = list(read_completed(path).values()) if resume else []
+        self._lock = threading.Lock()
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._file = open(path, 'a' if resume else 'w', encoding='utf-8')
+
+    def write(self, result: Dict[str, Any]):
+        """Append one result and flush it; sync to disk if the batch is due."""
+        line = json.dumps(result, ensure_ascii=False) + '\n'
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            self.results.append(result)
+            self._unsynced += 1
+            if (self._unsynced >= self.sync_every
+                    or time.monotonic() - self._last_sync >= self.sync_interval):
+                self._sync()
+
+    def _sync(self):
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        if self.junit_path:
+            try:
+                write_junit(self.results, self.junit_path)
+            except Exception as e:
+                print(f"Error writing JUnit report: {e}")
+
+    def close(self):
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.flush()
+            self._sync()
+            self._file.close()
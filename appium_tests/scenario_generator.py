@@ -0,0 +1,310 @@
+"""
+Generate survey scenarios in the test_cases.json format.
+
+Every input field has equivalence classes (a valid two-word name, a unicode
+name, a birth date that turns 10 today, a hyphenated city, several AI models
+with one short defect, ...), each producing concrete values from a seeded
+random generator. The expected result of every scenario comes from
+survey_oracle, so it matches the app's validators by construction.
+
+By default the output is a covering array: only as many scenarios as it takes
+for every pair of classes of two different fields to appear together at least
+once (--strength 3 covers every triple). Scenarios are picked greedily: for
+each one, --tries random candidates are drawn around a combination not covered
+yet and the candidate covering the most new combinations is kept. --random N
+skips the reduction and emits N random scenarios instead.
+
+Candidates are drawn one at a time and scenarios are written as soon as they
+are picked, so memory stays bounded by the combinations still to cover, not by
+the number of candidates:
+
+    python scenario_generator.py -o generated_cases.json --seed 7
+    python scenario_generator.py --random 100000 -o large_cases.json
+    python test_runner.py -j generated_cases.json -f GEN1
+
+The same seed and --today produce the same file. Birth date classes are
+relative to --today, so regenerate rather than reuse old files.
+"""
+import argparse
+import itertools
+import json
+import random
+import sys
+import textwrap
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, Iterator, List, Optional, TextIO, Tuple
+
+import survey_oracle
+
+DEFAULT_SEED = 1
+DEFAULT_STRENGTH = 2
+DEFAULT_TRIES = 50
+DEFAULT_CANDIDATES = 100000
+DEFAULT_PER_CASE = 50
+
+Value = Callable[[random.Random, date], Any]
+
+FIRST_NAMES = ["Jane", "John", "Ahmet", "Elif", "Maria", "Kenji", "Amara", "Lucas"]
+LAST_NAMES = ["Doe", "Smith", "Yilmaz", "Kaya", "Garcia", "Tanaka", "Okafor", "Silva"]
+UNICODE_NAMES = ["Zoë Ødegård", "José Müller", "Łukasz Żółć", "Ayşe Yılmaz", "Nguyễn Văn An", "Søren Kierkegård"]
+# Characters outside the BMP count twice in Dart's String.length
+ASTRAL_NAMES = ["𝓐𝓷𝓪 Lee", "Li 😀", "𝔍𝔬 𝔅𝔢"]
+HYPHENATED_NAMES = ["Anne-Marie Dupont", "Jean-Luc Picard-Smith", "Mary-Kate Olsen"]
+PLAIN_CITIES = ["Istanbul", "Ankara", "Paris", "Lagos", "Tokyo", "Boston"]
+SPACED_CITIES = ["New York", "Rio de Janeiro", "San Francisco", "Buenos Aires"]
+HYPHENATED_CITIES = ["Stratford-upon-Avon", "Aix-en-Provence", "Winston-Salem", "Saint-Denis"]
+UNICODE_CITIES = ["São Paulo", "Zürich", "İzmir", "Kraków", "Malmö"]
+DEFECTS = ["Sometimes gives incorrect information", "Hallucinates sources", "Limited knowledge cutoff",
+           "Suggests insecure code", "Loses track of long conversations", "Overly verbose answers"]
+UNICODE_DEFECTS = ["Répond parfois à côté", "Übersetzt Fachbegriffe falsch", "Yanlış kaynak gösteriyor"]
+USE_CASES = ["AI helps me summarize research papers quickly.", "Drafting emails and meeting notes.",
+             "Explaining unfamiliar code during reviews.", "Practicing a new language every day."]
+
+
+def _years_ago(day: date, years: int) -> date:
+    """The same calendar day `years` earlier; 29 February becomes the 28th."""
+    try:
+        return day.replace(year=day.year - years)
+    except ValueError:
+        return day.replace(year=day.year - years, day=28)
+
+
+def _fields(birth: date, fmt: Callable[[int], str] = str) -> Dict[str, str]:
+    return {"day": fmt(birth.day), "month": fmt(birth.month), "year": str(birth.year)}
+
+
+def _adult(rng: random.Random, today: date) -> date:
+    return date(today.year - rng.randint(18, 80), rng.randint(1, 12), rng.randint(1, 28))
+
+
+def _one_part(rng: random.Random, today: date, value: str) -> Dict[str, str]:
+    """An adult's birth date with one of day, month and year replaced."""
+    birth = _fields(_adult(rng, today))
+    birth[rng.choice(["day", "month", "year"])] = value
+    return birth
+
+
+def _out_of_range(rng: random.Random, today: date) -> Dict[str, str]:
+    birth = _fields(_adult(rng, today))
+    part, value = rng.choice([("day", "0"), ("day", "32"), ("month", "13"), ("year", "1899"),
+                              ("year", str(today.year + 1))])
+    birth[part] = value
+    return birth
+
+
+def _models(rng: random.Random, count: int, defect: Callable[[random.Random], str]) -> Dict[str, str]:
+    """`count` AI models in survey order, the first with `defect`, the others valid."""
+    models = sorted(rng.sample(survey_oracle.AI_MODELS, count), key=survey_oracle.AI_MODELS.index)
+    return {m: defect(rng) if i == 0 else rng.choice(DEFECTS) for i, m in enumerate(models)}
+
+
+def _choose(values: List[str]) -> Value:
+    return lambda rng, today: rng.choice(values)
+
+
+def _const(value: Any) -> Value:
+    return lambda rng, today: value
+
+
+# Equivalence classes of every input, keyed by the input's name in test_cases.json
+CLASSES: Dict[str, Dict[str, Value]] = {
+    "name": {
+        "two words": lambda rng, today: f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+        "hyphenated": _choose(HYPHENATED_NAMES),
+        "unicode": _choose(UNICODE_NAMES),
+        "astral": _choose(ASTRAL_NAMES),
+        "long": lambda rng, today: f"{rng.choice(FIRST_NAMES) * 20} {rng.choice(LAST_NAMES) * 20}",
+        "single word": _choose(FIRST_NAMES),
+        "too short": _const("Al B"),
+        "whitespace": _const("   "),
+        "empty": _const(""),
+    },
+    "birth_date": {
+        "adult": lambda rng, today: _fields(_adult(rng, today)),
+        "turns 10 today": lambda rng, today: _fields(_years_ago(today, 10)),
+        "turns 10 tomorrow": lambda rng, today: _fields(_years_ago(today + timedelta(days=1), 10)),
+        "oldest allowed": lambda rng, today: _fields(today - timedelta(days=365 * 120)),
+        "too old": lambda rng, today: _fields(today - timedelta(days=365 * 120 + 1)),
+        "future": lambda rng, today: _fields(today + timedelta(days=rng.randint(1, 400))),
+        "day overflow": lambda rng, today: {"day": rng.choice(["29", "30", "31"]), "month": rng.choice(["2", "4", "6"]),
+                                            "year": str(_adult(rng, today).year)},
+        "out of range": _out_of_range,
+        "zero padded or hex": lambda rng, today: _fields(_adult(rng, today),
+                                                         rng.choice([lambda n: f"{n:02d}", lambda n: f"0x{n:X}"])),
+        "not a number": lambda rng, today: _one_part(rng, today, rng.choice(["1a", "fifteen", "1.5", "-"])),
+        "missing part": lambda rng, today: _one_part(rng, today, ""),
+        "empty": _const({"day": "", "month": "", "year": ""}),
+    },
+    "education": dict({level: _const(level) for level in survey_oracle.EDUCATION_LEVELS}, none=_const("")),
+    "city": {
+        "plain": _choose(PLAIN_CITIES),
+        "with spaces": _choose(SPACED_CITIES),
+        "hyphenated": _choose(HYPHENATED_CITIES),
+        "unicode": _choose(UNICODE_CITIES),
+        "digits": lambda rng, today: f"{rng.choice(PLAIN_CITIES)} {rng.randint(1, 99)}",
+        "apostrophe": _const("Coeur d'Alene"),
+        "too short": _const("X"),
+        "empty": _const(""),
+    },
+    "gender": dict({option: _const(option) for option in survey_oracle.GENDER_OPTIONS}, none=_const("")),
+    "ai_models_with_defects": {
+        "none": _const({}),
+        "one": lambda rng, today: _models(rng, 1, lambda r: r.choice(DEFECTS)),
+        "several": lambda rng, today: _models(rng, rng.randint(2, 4), lambda r: r.choice(DEFECTS)),
+        "all": lambda rng, today: _models(rng, len(survey_oracle.AI_MODELS), lambda r: r.choice(DEFECTS)),
+        "unicode defect": lambda rng, today: _models(rng, rng.randint(1, 3), lambda r: r.choice(UNICODE_DEFECTS)),
+        "short defect": lambda rng, today: _models(rng, rng.randint(1, 3), lambda r: r.choice(["Bad", "Slow", "Meh"])),
+        "empty defect": lambda rng, today: _models(rng, rng.randint(1, 3), lambda r: ""),
+    },
+    "beneficial_use_case": {
+        "sentence": _choose(USE_CASES),
+        "unicode": _const("Résumés de réunions en quelques secondes"),
+        "exactly 10 chars": _const("Saves time"),
+        "9 chars": _const("Fast help"),
+        "padded short": _const("   Quick   "),
+        "long": lambda rng, today: " ".join(rng.choice(USE_CASES) for _ in range(12)),
+        "empty": _const(""),
+    },
+}
+
+FIELDS = list(CLASSES)
+LABELS = {"birth_date": "birth date", "ai_models_with_defects": "AI models",
+          "beneficial_use_case": "use case"}
+
+# A scenario as the index of its class in every field, in FIELDS order
+Assignment = Tuple[int, ...]
+Combination = Tuple[Tuple[int, int], ...]
+
+
+def combinations(assignment: Assignment, strength: int) -> Iterator[Combination]:
+    """The (field, class) combinations of `strength` fields an assignment covers."""
+    return itertools.combinations(enumerate(assignment), strength)
+
+
+def all_combinations(strength: int) -> Dict[Combination, None]:
+    """Every combination to cover, in a fixed order."""
+    sizes = [len(CLASSES[f]) for f in FIELDS]
+    found = {}
+    for fields in itertools.combinations(range(len(FIELDS)), strength):
+        for classes in itertools.product(*(range(sizes[f]) for f in fields)):
+            found[tuple(zip(fields, classes))] = None
+    return found
+
+
+def random_assignment(rng: random.Random, fixed: Combination = ()) -> Assignment:
+    classes = [rng.randrange(len(CLASSES[f])) for f in FIELDS]
+    for field, cls in fixed:
+        classes[field] = cls
+    return tuple(classes)
+
+
+def covering(rng: random.Random, strength: int = DEFAULT_STRENGTH, tries: int = DEFAULT_TRIES,
+             candidates: int = DEFAULT_CANDIDATES, stats: Optional[Dict[str, int]] = None) -> Iterator[Assignment]:
+    """
+    Assignments until every combination of `strength` fields is covered or `candidates` are used up.
+
+    `stats`, if given, is updated with the combinations in total, covered and
+    the candidates drawn.
+    """
+    uncovered = all_combinations(strength)
+    stats = stats if stats is not None else {}
+    stats.update(combinations=len(uncovered), covered=0, candidates=0)
+    while uncovered and stats["candidates"] < candidates:
+        target = next(iter(uncovered))
+        best, best_score = None, -1
+        for _ in range(min(tries, candidates - stats["candidates"])):
+            candidate = random_assignment(rng, target)
+            stats["candidates"] += 1
+            score = sum(1 for c in combinations(candidate, strength) if c in uncovered)
+            if score > best_score:
+                best, best_score = candidate, score
+        for c in combinations(best, strength):
+            uncovered.pop(c, None)
+        stats["covered"] = stats["combinations"] - len(uncovered)
+        yield best
+
+
+def scenario(assignment: Assignment, rng: random.Random, today: date) -> Dict[str, Any]:
+    """A test_cases.json scenario (without its id) for an assignment."""
+    names = [list(CLASSES[f])[cls] for f, cls in zip(FIELDS, assignment)]
+    inputs = {f: CLASSES[f][name](rng, today) for f, name in zip(FIELDS, names)}
+    outcome = survey_oracle.predict({"inputs": inputs}, today)
+    expected = {"should_submit": outcome.submitted}
+    if not outcome.submitted:
+        expected["error_message"] = outcome.messages[0]
+    description = ", ".join(f"{LABELS.get(f, f)} {name}" for f, name in zip(FIELDS, names))
+    return {"description": f"{'Submits' if outcome.submitted else 'Blocked'}: {description}",
+            "inputs": inputs, "expected_result": expected}
+
+
+def write_suite(scenarios: Iterator[Dict[str, Any]], out: TextIO, header: Dict[str, Any],
+                per_case: int = DEFAULT_PER_CASE) -> int:
+    """Write scenarios as test cases of `per_case` scenarios each, as they come; returns how many."""
+    out.write('{\n  "generator": ' + json.dumps(header) + ',\n  "test_cases": [')
+    count = 0
+    for count, item in enumerate(scenarios, 1):
+        case, index = divmod(count - 1, per_case)
+        if index == 0:
+            if case:
+                out.write('\n      ]\n    },')
+            out.write(f'\n    {{\n      "id": "GEN{case + 1}",\n'
+                      f'      "name": "Generated scenarios, part {case + 1}",\n'
+                      f'      "description": "Generated by scenario_generator.py (seed {header["seed"]})",\n'
+                      f'      "scenarios": [\n')
+        else:
+            out.write(',\n')
+        item = dict(scenario_id=f"GEN{case + 1}.{index + 1}", **item)
+        out.write(textwrap.indent(json.dumps(item, indent=2, ensure_ascii=False), ' ' * 8))
+    if count:
+        out.write('\n      ]\n    }')
+    out.write('\n  ]\n}\n')
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate survey scenarios in the test_cases.json format')
+    parser.add_argument('--output', '-o', default='-', help='Path of the JSON file to write (default: stdout)')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help='Random seed; the same seed gives the same file')
+    parser.add_argument('--strength', type=int, choices=[1, 2, 3], default=DEFAULT_STRENGTH,
+                        help='Cover every combination of this many fields (2 = pairwise)')
+    parser.add_argument('--tries', type=int, default=DEFAULT_TRIES,
+                        help='Candidates drawn for every scenario kept')
+    parser.add_argument('--candidates', type=int, default=DEFAULT_CANDIDATES,
+                        help='Stop after drawing this many candidates, even if not everything is covered')
+    parser.add_argument('--random', type=int, metavar='N',
+                        help='Emit N random scenarios instead of a covering set')
+    parser.add_argument('--per-case', type=int, default=DEFAULT_PER_CASE,
+                        help='Scenarios per generated test case')
+    parser.add_argument('--today', help='Date the birth date classes are relative to (YYYY-MM-DD)')
+    args = parser.parse_args()
+
+    today = date.fromisoformat(args.today) if args.today else date.today()
+    rng = random.Random(args.seed)
+    stats: Dict[str, int] = {}
+    if args.random is not None:
+        assignments = (random_assignment(rng) for _ in range(args.random))
+        header = {"seed": args.seed, "today": today.isoformat(), "random": args.random}
+    else:
+        assignments = covering(rng, args.strength, args.tries, args.candidates, stats)
+        header = {"seed": args.seed, "today": today.isoformat(), "strength": args.strength}
+    scenarios = (scenario(a, rng, today) for a in assignments)
+
+    out = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    try:
+        count = write_suite(scenarios, out, header, args.per_case)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    summary = f"📝 Wrote {count} scenarios"
+    if stats:
+        summary += (f" covering {stats['covered']}/{stats['combinations']} combinations of {args.strength} fields"
+                    f" from {stats['candidates']} candidates")
+    print(f"{summary} (seed {args.seed})", file=sys.stderr)
+    if stats and stats["covered"] < stats["combinations"]:
+        print(f"⚠️ {stats['combinations'] - stats['covered']} combinations not covered; raise --candidates",
+              file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Tell which screen the app is showing from a single page-source snapshot.
+
+Probing for a screen with find_element costs a round-trip per probe and, with
+an implicit or explicit wait, a full timeout when the element is absent.
+classify() instead scores one PageSnapshot against markers of every known
+screen in memory, so "are we on the login page?" costs one page_source call
+whatever the answer.
+
+Each screen has weighted markers; the confidence of a screen is the share of
+its marker weight found in the snapshot. The screen with the highest
+confidence wins, overlays (the password manager and OAuth pages) before the
+app screens on a tie. Below MIN_CONFIDENCE the screen is UNKNOWN.
+"""
+from enum import Enum
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import waits
+from page_snapshot import PageSnapshot
+
+MIN_CONFIDENCE = 0.5
+
+
+class Screen(Enum):
+    LOGIN = "login"
+    SURVEY = "survey"
+    LOGIN_SUCCESS = "login_success"
+    WEBVIEW_OAUTH = "webview_oauth"
+    PASSWORD_MANAGER_POPUP = "password_manager_popup"
+    UNKNOWN = "unknown"
+
+
+class ScreenState(NamedTuple):
+    """The detected screen, how sure the detector is, and the markers it found."""
+    screen: Screen
+    confidence: float
+    markers: Tuple[str, ...] = ()
+
+    def __str__(self) -> str:
+        return f"{self.screen.value} ({self.confidence:.0%})"
+
+
+Marker = Tuple[str, float, Callable[[PageSnapshot], bool]]
+
+
+def _label(label: str) -> Callable[[PageSnapshot], bool]:
+    """Flutter exposes Text widgets as content-desc, native views as text."""
+    return lambda s: s.has_content_desc(label) or s.has_attribute('text', label)
+
+
+def _hint(hint: str) -> Callable[[PageSnapshot], bool]:
+    return lambda s: s.has_hint(hint)
+
+
+def _class(class_name: str) -> Callable[[PageSnapshot], bool]:
+    return lambda s: next(s.elements(class_name), None) is not None
+
+
+def _package(predicate: Callable[[str], bool]) -> Callable[[PageSnapshot], bool]:
+    return lambda s: any(predicate(e.get('package') or '') for e in s.elements())
+
+
+def _text_containing(*needles: str) -> Callable[[PageSnapshot], bool]:
+    def check(s: PageSnapshot) -> bool:
+        for element in s.elements():
+            text = ' '.join(filter(None, (element.get('text'), element.get('content-desc')))).lower()
+            if any(n in text for n in needles):
+                return True
+        return False
+    return check
+
+
+_BROWSER_PACKAGES = ("com.android.chrome", "org.chromium", "com.google.android.webview")
+_AUTOFILL_PACKAGES = ("com.google.android.gms", "com.android.providers.autofill", "com.google.android.gms.autofill")
+
+# Screens in tie-break order: overlays first
+MARKERS: Dict[Screen, List[Marker]] = {
+    Screen.PASSWORD_MANAGER_POPUP: [
+        ("save password prompt", 2.0, _text_containing("save password", "update password", "save to google")),
+        ("dismiss button", 1.0, lambda s: any(_label(b)(s) for b in ("Never", "Not now"))),
+        ("autofill package", 1.0, _package(lambda p: p in _AUTOFILL_PACKAGES)),
+    ],
+    Screen.WEBVIEW_OAUTH: [
+        ("web view", 1.0, _class("android.webkit.WebView")),
+        ("browser package", 1.0, _package(lambda p: p.startswith(_BROWSER_PACKAGES))),
+        ("provider page", 1.0, _text_containing("accounts.spotify.com", "accounts.google.com",
+                                                 "log in to spotify", "sign in with google")),
+    ],
+    Screen.LOGIN: [
+        ("email field", 2.0, _hint("Enter your email or phone number")),
+        ("password field", 1.0, _hint("Enter your password")),
+        ("sign in button", 1.0, _label("Sign in")),
+        ("social buttons", 1.0, lambda s: _label("Continue with Spotify")(s) or _label("Continue with Google")(s)),
+    ],
+    Screen.LOGIN_SUCCESS: [
+        ("success title", 2.0, _label("Login Successful!")),
+        ("redirect note", 1.0, _label("Redirecting to survey...")),
+    ],
+    Screen.SURVEY: [
+        ("header", 2.0, _label("AI Survey")),
+        ("name field", 1.0, _hint("Name-Surname *")),
+        ("logout button", 1.0, _label("Logout Button")),
+        ("send button", 0.5, _label("Send")),
+    ],
+}
+
+
+def classify(snapshot: PageSnapshot) -> ScreenState:
+    """The most likely screen shown in the snapshot."""
+    best = ScreenState(Screen.UNKNOWN, 0.0)
+    for screen, markers in MARKERS.items():
+        found = tuple(name for name, _, check in markers if check(snapshot))
+        total = sum(weight for _, weight, _ in markers)
+        confidence = sum(weight for name, weight, _ in markers if name in found) / total
+        if confidence > best.confidence:
+            best = ScreenState(screen, confidence, found)
+    if best.confidence < MIN_CONFIDENCE:
+        return ScreenState(Screen.UNKNOWN, best.confidence, best.markers)
+    return best
+
+
+def detect(driver) -> ScreenState:
+    """Classify the screen the driver shows now, with one page_source round-trip."""
+    try:
+        return classify(PageSnapshot.capture(driver))
+    except Exception as e:
+        print(f"Could not read the screen: {e}")
+        return ScreenState(Screen.UNKNOWN, 0.0)
+
+
+def wait_for(driver, screens, step: str, timeout: Optional[float] = None,
+             poll_interval: Optional[float] = None) -> Optional[ScreenState]:
+    """
+    Wait until one of the screens is shown, returning its state, or None on timeout.
+
+    Every poll costs one page_source call, however many screens are accepted.
+    """
+    screens = (screens,) if isinstance(screens, Screen) else tuple(screens)
+
+    def shown(d):
+        state = detect(d)
+        return state if state.screen in screens else False
+
+    return waits.wait_until(driver, shown, step, timeout=timeout, poll_interval=poll_interval)
@@ -0,0 +1,194 @@
+"""
+Scroll until a field is in view instead of swiping blindly.
+
+A fixed swipe costs a long gesture whether or not the target is already
+visible, and its coordinates only fit one screen size. into_view() checks a
+page-source snapshot first and only scrolls while the field is missing or cut
+off at an edge of the scrollable area. Gestures are sized from the bounds of
+the scrollable element in that snapshot, so they scale with the device:
+
+  missing   scroll SEARCH_PERCENT of the area down, then up once the end is reached
+  cut off   scroll just far enough towards it to show it whole
+  visible   stop
+
+Gestures go through `mobile: scrollGesture` (UiAutomator2), which scrolls
+without flinging. Servers that do not support it get an equivalent W3C touch
+swipe; the fallback is remembered per driver or session. Both are flows (see
+ops.py), so the asyncio runner scrolls the same way.
+"""
+import re
+import xml.etree.ElementTree as ET
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+from appium.webdriver.common.appiumby import AppiumBy
+from selenium.webdriver.common.by import By
+
+import locators
+import ops
+from ops import Flow, op
+from page_snapshot import PageSnapshot
+
+MAX_SCROLLS = 12
+SEARCH_PERCENT = 0.7
+NUDGE_PERCENT = 0.25
+# Drag duration of the fallback swipe; slow enough that Flutter does not fling
+SWIPE_DURATION_MS = 600
+# Fraction of the window treated as the scrollable area when the page has none
+WINDOW_MARGIN = 0.15
+
+Bounds = Tuple[int, int, int, int]
+
+_BOUNDS = re.compile(r"\[(-?\d+),(-?\d+)\]\[(-?\d+),(-?\d+)\]")
+
+
+def bounds(element: ET.Element) -> Optional[Bounds]:
+    """An element's bounds as (left, top, right, bottom)."""
+    match = _BOUNDS.fullmatch(element.get('bounds') or '')
+    return tuple(int(n) for n in match.groups()) if match else None
+
+
+def scroll_area(snapshot: PageSnapshot) -> Bounds:
+    """Bounds of the first scrollable element, or the middle of the window."""
+    for element in snapshot.elements():
+        if element.get('scrollable') == 'true':
+            area = bounds(element)
+            if area and area[3] > area[1]:
+                return area
+    width, height = int(snapshot.root.get('width', 1080)), int(snapshot.root.get('height', 2400))
+    return (int(width * WINDOW_MARGIN), int(height * WINDOW_MARGIN),
+            int(width * (1 - WINDOW_MARGIN)), int(height * (1 - WINDOW_MARGIN)))
+
+
+def find_target(snapshot: PageSnapshot, screen: str, field: str, **params) -> Optional[ET.Element]:
+    """The field's element in the snapshot, by the first of its strategies that matches."""
+    for by, value in locators.strategies(screen, field, **params):
+        if by == AppiumBy.ACCESSIBILITY_ID:
+            found = [e for e in snapshot.elements() if e.get('content-desc') == value]
+        elif by == By.XPATH:
+            try:
+                found = snapshot.xpath(value)
+            except SyntaxError:
+                continue
+        else:
+            continue
+        if found:
+            return found[0]
+    return None
+
+
+class Gesture(NamedTuple):
+    """Scroll `percent` of `area` so that content further `direction` comes into view."""
+    direction: str
+    percent: float
+    area: Bounds
+
+    def scroll_args(self) -> Dict[str, Any]:
+        """Arguments of `mobile: scrollGesture`."""
+        left, top, right, bottom = self.area
+        return {"left": left, "top": top, "width": right - left, "height": bottom - top,
+                "direction": self.direction, "percent": self.percent}
+
+    def swipe_args(self) -> Dict[str, int]:
+        """The same scroll as a touch swipe, for driver.swipe()."""
+        left, top, right, bottom = self.area
+        distance = int((bottom - top) * self.percent)
+        middle = (top + bottom) // 2
+        x = (left + right) // 2
+        # The finger moves against the scroll direction
+        start_y, end_y = middle + distance // 2, middle - distance // 2
+        if self.direction == "up":
+            start_y, end_y = end_y, start_y
+        return {"start_x": x, "start_y": start_y, "end_x": x, "end_y": end_y, "duration": SWIPE_DURATION_MS}
+
+
+class Search:
+    """
+    Decides, one snapshot at a time, how to bring a field into view.
+
+    Feed it the snapshot after every gesture; next_gesture() returns None once
+    the search is over, and `visible` tells whether it succeeded.
+    """
+
+    def __init__(self, screen: str, field: str, max_scrolls: int = MAX_SCROLLS, **params):
+        self.screen = screen
+        self.field = field
+        self.params = params
+        self.max_scrolls = max_scrolls
+        self.direction = "down"
+        self.turned = False
+        self.scrolls = 0
+        self.visible = False
+        self._last: Optional[Tuple] = None
+
+    def next_gesture(self, snapshot: PageSnapshot) -> Optional[Gesture]:
+        area = scroll_area(snapshot)
+        element = find_target(snapshot, self.screen, self.field, **self.params)
+        # The screen did not change since the last gesture: that end is reached
+        signature = tuple(e.get('bounds') for e in snapshot.elements())
+        stuck = signature == self._last
+        self._last = signature
+
+        if element is not None:
+            gesture = self._reveal(element, area)
+            if gesture is None or stuck:
+                self.visible = True
+                return None
+        else:
+            if stuck:
+                if self.turned:
+                    return None
+                self.direction, self.turned = ("up" if self.direction == "down" else "down"), True
+            gesture = Gesture(self.direction, SEARCH_PERCENT, area)
+
+        if self.scrolls >= self.max_scrolls:
+            return None
+        self.scrolls += 1
+        return gesture
+
+    def _reveal(self, element: ET.Element, area: Bounds) -> Optional[Gesture]:
+        """The gesture that shows a found element whole, or None if it already is."""
+        box = bounds(element)
+        if box is None:
+            return None
+        height = area[3] - area[1]
+        # Off-screen parts are cut from the reported bounds, so an element
+        # touching an edge of the area is likely to continue beyond it
+        if box[1] <= area[1] and box[3] < area[3]:
+            return Gesture("up", min(max((area[1] - box[1]) / height, NUDGE_PERCENT), 1.0), area)
+        if box[3] >= area[3] and box[1] > area[1]:
+            return Gesture("down", NUDGE_PERCENT, area)
+        return None
+
+
+def gesture_flow(gesture: Gesture) -> Flow:
+    """Scroll with `mobile: scrollGesture`, or a touch swipe where it is unsupported."""
+    unsupported = yield op("unsupported")
+    if "scroll_gesture" not in unsupported:
+        try:
+            yield op("execute", "mobile: scrollGesture", gesture.scroll_args())
+            return
+        except Exception as e:
+            reason = str(e).strip().splitlines()[0] if str(e).strip() else type(e).__name__
+            print(f"⚠️ mobile: scrollGesture unavailable, falling back to swipes: {reason}")
+            unsupported.add("scroll_gesture")
+    yield op("swipe", **gesture.swipe_args())
+
+
+def into_view_flow(screen: str, field: str, **params) -> Flow:
+    """into_view() as a flow of ops (see ops.py), for the synchronous and asyncio runners alike."""
+    search = Search(screen, field, **params)
+    while True:
+        gesture = search.next_gesture((yield op("snapshot")))
+        if gesture is None:
+            break
+        yield from gesture_flow(gesture)
+        # Handles of elements scrolled out of view go stale
+        yield op("invalidate")
+    if not search.visible:
+        print(f"Could not scroll {screen}.{field} into view")
+    return search.visible
+
+
+def into_view(driver, screen: str, field: str, **params) -> bool:
+    """Scroll until a field is fully visible; returns whether it is."""
+    return ops.run(into_view_flow(screen, field, **params), ops.DriverOps(driver))
@@ -0,0 +1,464 @@
+"""
+Declarative step plans for filling in and submitting the survey form.
+
+Each form field is described once in FIELDS: which locators it uses, how it
+is filled, whether it can be skipped and when the form should be checked for
+a validation message right after it. compile_plan() turns a scenario from
+test_cases.json into a list of Steps ahead of time, and run_plan() executes
+such a list and decides whether the scenario passed. The actions are flows
+(see ops.py): plan_flow() is the same execution for the asyncio runner.
+
+Compiling first means work that cannot affect the outcome is left out of the
+plan: optional fields without input are skipped, and an error check is only
+planned where a message found there would end the scenario (e.g. after the
+name only when the name is empty).
+
+In fast-fail mode, scenarios that expect the form to be blocked pass as soon
+as their expected error, or a message survey_oracle predicts for their
+inputs, appears after pressing Send; the page-source verification is skipped.
+"""
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import traceback
+
+from selenium.webdriver.common.by import By
+from selenium.common.exceptions import StaleElementReferenceException
+
+import form_fill
+import ops
+import screen_state
+import scroll
+import survey_oracle
+import tracing
+from navigation import LOGIN_EMAIL_XPATH
+from ops import Flow, op
+from page_snapshot import PageSnapshot
+from screen_state import Screen
+
+Outcome = Optional[Tuple[bool, str]]
+
+# Any validator message or snackbar that can appear after pressing Send
+SUBMIT_FEEDBACK_XPATH = (
+    '//android.widget.TextView[contains(@text, "Please") or contains(@text, "Invalid")'
+    ' or contains(@text, "too short") or contains(@text, "can only contain")'
+    ' or contains(@text, "Required") or contains(@text, "Numbers only")]'
+)
+
+# Messages lib/screens/survey_page.dart can show after pressing Send
+VALIDATOR_MESSAGES = survey_oracle.VISIBLE_MESSAGES
+
+# Survey fields in the order they are filled. Keys:
+#   input:      key in the scenario's "inputs"
+#   action:     type | select | click | models | submit
+#   fields:     locator names on the "survey" screen, in on-screen order
+#   label:      used in "Failed to enter <label>" style messages
+#   optional:   skip the step when the input is empty
+#   check:      look for a validation message after the step:
+#               "always", or "if_empty" to do so only when the input is empty
+#   blocked_by: input whose emptiness explains a missing field in a scenario
+#               that expects the form to be blocked
+FIELDS: List[Dict[str, Any]] = [
+    {"name": "name", "input": "name", "action": "type", "fields": ["name"], "label": "name",
+     "check": "if_empty"},
+    {"name": "birth_date", "input": "birth_date", "action": "type", "fields": ["day", "month", "year"],
+     "label": "birth date", "check": "always"},
+    {"name": "education", "input": "education", "action": "select",
+     "fields": ["education_dropdown", "education_option"], "label": "education", "optional": True},
+    {"name": "city", "input": "city", "action": "type", "fields": ["city"], "label": "city",
+     "check": "if_empty", "blocked_by": "name"},
+    {"name": "gender", "input": "gender", "action": "click", "fields": ["gender_option"], "label": "gender",
+     "optional": True},
+    {"name": "ai_model", "input": "ai_models_with_defects", "action": "models",
+     "fields": ["ai_model_checkbox", "defect_input"], "label": "AI models"},
+    {"name": "use_case", "input": "beneficial_use_case", "action": "type", "fields": ["use_case"],
+     "label": "beneficial use case"},
+    {"name": "submit", "action": "submit", "fields": ["send"]},
+]
+
+# How a missing element is reported
+FIELD_LABELS = {
+    "name": "Name field",
+    "day": "Day field",
+    "month": "Month field",
+    "year": "Year field",
+    "education_dropdown": "Education dropdown",
+    "city": "City field",
+    "use_case": "Beneficial use case field",
+}
+
+
+class Step:
+    """One planned action on the survey form."""
+
+    def __init__(self, name: str, action: str, fields: List[str], values: List[Any],
+                 label: str = "", check: bool = False,
+                 blocked_by: Optional[str] = None, params: Optional[Dict[str, Any]] = None,
+                 fast_fail: bool = False):
+        self.name = name
+        self.action = action
+        self.fields = fields
+        self.values = values
+        self.label = label
+        self.check = check
+        self.blocked_by = blocked_by
+        self.params = params or {}
+        self.fast_fail = fast_fail
+
+    def __repr__(self):
+        return f"Step({self.name!r}, {self.action!r}, check={self.check})"
+
+
+def compile_plan(scenario: Dict[str, Any], fast_fail: bool = False) -> List[Step]:
+    """
+    Turn a scenario's inputs into the list of steps that will run for it.
+
+    With fast_fail, a scenario that expects the form to be blocked stops at the
+    first matching error after Send instead of verifying the whole screen.
+    """
+    inputs = scenario["inputs"]
+    fast_fail = fast_fail and not scenario["expected_result"]["should_submit"]
+    plan = []
+    for spec in FIELDS:
+        value = inputs[spec["input"]] if "input" in spec else None
+        if spec.get("optional") and not value:
+            continue
+
+        check = spec.get("check") == "always" or (spec.get("check") == "if_empty" and not value)
+        common = {"label": spec.get("label", ""), "check": check, "blocked_by": spec.get("blocked_by")}
+
+        if spec["action"] == "models":
+            # One step per selected model, followed by its defect field
+            for model, defect in value.items():
+                plan.append(Step(f"{spec['name']}:{model}", "models", spec["fields"], [model, defect],
+                                 params={"model": model}, **common))
+        elif spec["action"] == "type" and isinstance(value, dict):
+            plan.append(Step(spec["name"], "type", spec["fields"], [value[f] for f in spec["fields"]], **common))
+        else:
+            fields = spec.get("fields", [])
+            values = [value] * len(fields) if value is not None else []
+            plan.append(Step(spec["name"], spec["action"], fields, values,
+                             fast_fail=fast_fail and spec["action"] == "submit", **common))
+    return plan
+
+
+def compile_suite(test_cases: List[Dict[str, Any]], fast_fail: bool = False) -> Dict[str, List[Step]]:
+    """Compile every scenario up front, keyed by scenario id."""
+    return {
+        scenario["scenario_id"]: compile_plan(scenario, fast_fail)
+        for test_case in test_cases
+        for scenario in test_case["scenarios"]
+    }
+
+
+def is_error_displayed(driver, snapshot: Optional[PageSnapshot] = None):
+    """
+    Check if any error message is displayed.
+
+    Uses the given snapshot, or fetches one, so the check costs a single
+    round-trip to the Appium server.
+    """
+    try:
+        snapshot = snapshot or PageSnapshot.capture(driver)
+        text = snapshot.find_error()
+        if text:
+            print(f"Found error message: {text}")
+            return True, text
+
+        return False, ""
+    except Exception as e:
+        print(f"Error checking for error messages: {e}")
+        return False, ""
+
+
+def plan_flow(plan: List[Step], scenario: Dict[str, Any]) -> Flow:
+    """Execute a compiled plan as a flow of ops (see ops.py); returns (success, message)."""
+    for step in plan:
+        tracing.step(step.name)
+        outcome = yield from ACTIONS[step.action](step, scenario)
+        if outcome is not None:
+            return outcome
+        if step.check:
+            outcome = yield from _check_errors(scenario)
+            if outcome is not None:
+                return outcome
+    return False, "Plan ended without submitting the form"
+
+
+def run_plan(driver, plan: List[Step], scenario: Dict[str, Any]) -> Tuple[bool, str]:
+    """Execute a compiled plan and return (success, message) for the scenario."""
+    return ops.run(plan_flow(plan, scenario), ops.DriverOps(driver))
+
+
+def _check_errors(scenario: Dict[str, Any]) -> Flow:
+    """End the scenario if a validation message is already showing."""
+    try:
+        snapshot = yield op("snapshot")
+    except Exception as e:
+        print(f"Error checking for error messages: {e}")
+        return None
+    error_found, error_msg = is_error_displayed(None, snapshot)
+    if not error_found:
+        return None
+    # If we expected an error, this is actually a pass
+    if not scenario["expected_result"]["should_submit"]:
+        return True, f"Form was correctly blocked with error: {error_msg}"
+    return False, f"Form validation failed with error: {error_msg}"
+
+
+def _reveal(field: str, **params) -> Flow:
+    """Scroll the survey until a field is in view; a field that stays hidden is reported by its lookup."""
+    yield from scroll.into_view_flow("survey", field, **params)
+
+
+def _fill(fields: List[str], elements: List[Any], values: List[str], **params) -> Flow:
+    """Type into several fields at once, resolving them again once if a handle went stale."""
+    try:
+        yield from form_fill.fill_flow(list(zip(elements, values)))
+    except StaleElementReferenceException:
+        yield op("invalidate")
+        elements = []
+        for field in fields:
+            elements.append((yield from ops.require("survey", field, **params)))
+        yield from form_fill.fill_flow(list(zip(elements, values)))
+
+
+def _type(step: Step, scenario: Dict[str, Any]) -> Flow:
+    inputs = scenario["inputs"]
+    try:
+        print(f"Entering {step.label}: {', '.join(str(v) for v in step.values)}")
+        # The last field of a group is the lowest on screen
+        yield from _reveal(step.fields[-1])
+        # Fields of one step are looked up together in a single round-trip
+        elements = yield op("find_group", "survey", step.fields)
+        for field, element in zip(step.fields, elements):
+            if element is None:
+                print(f"{FIELD_LABELS.get(field, field)} not found")
+                if (step.blocked_by and not inputs[step.blocked_by]
+                        and not scenario["expected_result"]["should_submit"]):
+                    return True, f"Form correctly blocked before {step.label} field (due to {step.blocked_by} validation)"
+                return False, f"{FIELD_LABELS.get(field, field)} not found"
+        yield from _fill(step.fields, elements, step.values)
+        print(f"✅ Entered {step.label}")
+    except Exception as e:
+        print(f"Error entering {step.label}: {e}")
+        if (step.blocked_by and not inputs[step.blocked_by]
+                and not scenario["expected_result"]["should_submit"]):
+            return True, f"Form correctly blocked before {step.label} field (due to {step.blocked_by} validation)"
+        return False, f"Failed to enter {step.label}: {e}"
+    return None
+
+
+def _select(step: Step, scenario: Dict[str, Any]) -> Flow:
+    dropdown_field, option_field = step.fields
+    value = step.values[0]
+    try:
+        print(f"Selecting {step.label}: {value}")
+        yield from _reveal(dropdown_field)
+        dropdown = yield op("find", "survey", dropdown_field)
+        if not dropdown:
+            print(f"{FIELD_LABELS.get(dropdown_field, dropdown_field)} not found")
+            return False, f"{FIELD_LABELS.get(dropdown_field, dropdown_field)} not found"
+        yield op("click", dropdown)
+        # The option appearing is the signal that the dropdown menu has opened
+        option = yield op("find", "survey", option_field, value=value)
+        if not option:
+            print(f"{step.label.capitalize()} choice {value} not found")
+            return False, f"{step.label.capitalize()} choice {value} not found"
+        yield op("click", option)
+        print(f"✅ Selected {step.label}")
+    except Exception as e:
+        print(f"Error selecting {step.label}: {e}")
+        return False, f"Failed to select {step.label}: {e}"
+    return None
+
+
+def _click(step: Step, scenario: Dict[str, Any]) -> Flow:
+    field = step.fields[0]
+    value = step.values[0]
+    try:
+        print(f"Selecting {step.label}: {value}")
+        yield from _reveal(field, value=value)
+        element = yield op("find", "survey", field, value=value)
+        if not element:
+            print(f"{step.label.capitalize()} option {value} not found")
+            return False, f"{step.label.capitalize()} option {value} not found"
+        yield op("click", element)
+        print(f"✅ Selected {step.label}")
+    except Exception as e:
+        print(f"Error selecting {step.label}: {e}")
+        return False, f"Failed to select {step.label}: {e}"
+    return None
+
+
+def _model(step: Step, scenario: Dict[str, Any]) -> Flow:
+    checkbox_field, defect_field = step.fields
+    model, defect = step.values
+    try:
+        print(f"Selecting AI model: {model}")
+        yield from _reveal(checkbox_field, value=model)
+        checkbox = yield op("find", "survey", checkbox_field, value=model)
+        if not checkbox:
+            print(f"AI model {model} checkbox not found")
+            return False, f"AI model {model} checkbox not found"
+        yield op("click", checkbox)
+
+        print(f"Entering defect for {model}: {defect}")
+        yield from _reveal(defect_field, **step.params)
+        defect_input = yield op("find", "survey", defect_field, **step.params)
+        if not defect_input:
+            print(f"Defect input for {model} not found")
+            return False, f"Defect input for {model} not found"
+        yield from _fill([defect_field], [defect_input], [defect], **step.params)
+        print("✅ Selected AI model and entered defect")
+    except Exception as e:
+        print(f"Error with AI models: {e}")
+        return False, f"Failed with AI models: {e}"
+    return None
+
+
+def _submit(step: Step, scenario: Dict[str, Any]) -> Flow:
+    try:
+        print("Attempting to submit form")
+        yield from _reveal(step.fields[0])
+
+        try:
+            submit_button = yield op("find", "survey", step.fields[0])
+            if submit_button:
+                yield op("click", submit_button)
+                yield op("invalidate")
+                print("✅ Submit button clicked")
+                # Wait for either a validation message or the redirect to the login screen
+                yield op("wait_for_xpaths", [SUBMIT_FEEDBACK_XPATH, LOGIN_EMAIL_XPATH], "submit_outcome", timeout=5)
+            else:
+                print("Submit button not found")
+        except Exception as e:
+            print(f"Could not click submit button: {e}")
+
+        if step.fast_fail:
+            tracing.step("fast_fail")
+            outcome = yield from _first_error_after_submit(scenario)
+            if outcome is not None:
+                return outcome
+
+        tracing.step("verification")
+        # One snapshot of the screen answers all the checks; the runner
+        # captures screenshots of failed scenarios afterwards (see artifacts.py)
+        return judge_submission(scenario, (yield op("snapshot")))
+    except Exception as e:
+        print(f"Error in submission verification: {e}")
+        traceback.print_exc()
+        return False, f"Test failed during submission verification: {e}"
+
+
+def _first_error_after_submit(scenario: Dict[str, Any]) -> Flow:
+    """
+    Pass a blocked scenario on the first expected error or validator message shown.
+
+    Returns None when neither is on screen, so the full verification decides.
+    """
+    try:
+        found = yield op("find_elements", By.XPATH, fast_fail_xpath(scenario))
+        texts = []
+        for element in found:
+            texts.append((yield op("text", element)))
+    except Exception as e:
+        print(f"Fast-fail check failed: {e}")
+        return None
+    return judge_fast_fail(scenario, texts)
+
+
+def fast_fail_xpath(scenario: Dict[str, Any]) -> str:
+    """
+    XPath matching the scenario's expected error or the messages the survey validators will show.
+
+    survey_oracle predicts the exact messages from the scenario's inputs; if it
+    predicts a submission, any validator message is accepted instead.
+    """
+    expected = scenario["expected_result"].get("error_message")
+    outcome = survey_oracle.predict(scenario)
+    messages = VALIDATOR_MESSAGES if outcome.submitted else outcome.messages
+    terms = [f'@text="{message}"' for message in messages]
+    if expected:
+        terms.insert(0, f'contains(@text, "{expected}")')
+    return f'//android.widget.TextView[{" or ".join(terms)}]'
+
+
+def judge_fast_fail(scenario: Dict[str, Any], texts: List[str]) -> Outcome:
+    """The fast-fail verdict for the messages found after Send; None if there were none."""
+    if not texts:
+        return None
+    expected = scenario["expected_result"].get("error_message")
+    for text in texts:
+        if expected and expected.lower() in text.lower():
+            print(f"✅ Expected error shown: {text}")
+            return True, f"Form was correctly blocked with expected error: {text}"
+    print(f"✅ Validation error shown: {texts[0]}")
+    if expected:
+        return True, f"Form was blocked but with different error: {texts[0]}"
+    return True, f"Form was correctly blocked with error: {texts[0]}"
+
+
+def judge_submission(scenario: Dict[str, Any], snapshot: PageSnapshot) -> Tuple[bool, str]:
+    """The verdict for a scenario given a snapshot of the screen after pressing Send."""
+    inputs = scenario["inputs"]
+
+    # Capture any error messages after submission attempt
+    error_found, error_msg = is_error_displayed(None, snapshot)
+
+    # Check name validation - this is specific for TC1.3 (single word name)
+    name_error = False
+    if inputs['name'] and len(inputs['name'].split()) == 1:
+        text = snapshot.find_text_containing("name and surname")
+        if text:
+            print(f"Found name validation error: {text}")
+            name_error = True
+            error_found = True
+            error_msg = text
+
+    # Still on the form, or back on the login page (successful submission)
+    screen = screen_state.classify(snapshot).screen
+    still_on_form = screen is Screen.SURVEY
+    on_login_page = screen is Screen.LOGIN
+
+    # Determine if the test passed based on expected results
+    expected_should_submit = scenario["expected_result"]["should_submit"]
+
+    # If we expected it to submit successfully
+    if expected_should_submit:
+        if on_login_page:
+            return True, "Successfully submitted form and redirected to login screen as expected"
+        elif error_found:
+            return False, f"Expected to submit but got error message: {error_msg}"
+        elif still_on_form:
+            return False, "Expected to submit but still on form page"
+        else:
+            return False, "Could not determine if submission was successful"
+    # If we expected it NOT to submit
+    else:
+        if name_error and "name with only one word" in scenario['description'].lower():
+            return True, f"Form was correctly blocked with name validation error: {error_msg}"
+
+        if on_login_page:
+            return False, "Form submitted successfully but should have been blocked"
+        elif error_found:
+            if "error_message" in scenario["expected_result"]:
+                expected_error = scenario["expected_result"]["error_message"]
+                if expected_error.lower() in error_msg.lower():
+                    return True, f"Form was correctly blocked with expected error: {error_msg}"
+                else:
+                    # Still a pass but with different error message
+                    return True, f"Form was blocked but with different error: {error_msg}"
+            return True, f"Form was correctly blocked with error: {error_msg}"
+        elif still_on_form:
+            return True, "Form correctly did not submit (still on form page)"
+        else:
+            return False, "Could not determine if submission was blocked"
+
+
+# Each action is a flow returning an Outcome
+ACTIONS: Dict[str, Callable[[Step, Dict[str, Any]], Flow]] = {
+    "type": _type,
+    "select": _select,
+    "click": _click,
+    "models": _model,
+    "submit": _submit,
+}
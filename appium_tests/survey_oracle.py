@@ -0,0 +1,318 @@
+"""
+The survey's validation rules in Python, to predict a scenario's outcome without a device.
+
+Mirrors lib/screens/survey_page.dart: the field validators, _isValidDateInput,
+_isValidBirthDate (10 to 120 years old), _isFormValid and _submitSurvey.
+submit() returns what the app does when Send is pressed: whether the survey
+is saved, the snackbar it shows and the validator messages under the fields.
+The fake Appium server uses the same functions, so the two cannot drift apart.
+
+rejected_by() names the Dart members that reject a scenario's inputs, so
+impact.py can select only the scenarios a changed validator decides.
+
+lint() checks the expected results in test_cases.json against the prediction
+before any device time is spent:
+
+    python survey_oracle.py test_cases.json
+
+Dates are judged against `today`, so age-boundary scenarios go stale as time
+passes; lint reports those too.
+"""
+import argparse
+import json
+import re
+import sys
+from datetime import date, timedelta
+from typing import Any, Dict, List, NamedTuple, Optional, Set
+
+# Options offered by the survey
+EDUCATION_LEVELS = ["High School", "Associate Degree", "Bachelor's Degree",
+                    "Master's Degree", "Doctorate", "Other"]
+GENDER_OPTIONS = ["Male", "Female", "Non-binary", "Prefer not to say"]
+AI_MODELS = ["ChatGPT", "Bard", "Claude", "Copilot", "Gemini"]
+
+# Snackbars shown by _submitSurvey
+INVALID_BIRTH_DATE = "Please enter a valid birth date"
+FORM_INVALID = "Please fill all required fields correctly"
+SUBMITTED = "Survey submitted successfully! Email will be sent shortly."
+# Shown under the date fields while the three parts do not form a valid date
+INVALID_DATE = "Please enter a valid date"
+
+# Messages the survey can put on screen: the validators wired into build(),
+# the inline date message and the snackbars. Only INVALID_DATE is shown while
+# typing; everything else appears after pressing Send.
+VISIBLE_MESSAGES = [
+    "Please enter your name",
+    "Required",
+    "Invalid",
+    "Numbers only",
+    INVALID_DATE,
+    "Please enter your city",
+    "Please describe a beneficial use case",
+    INVALID_BIRTH_DATE,
+    FORM_INVALID,
+]
+
+_DART_INT = re.compile(r"\s*[+-]?(0[xX][0-9a-fA-F]+|\d+)\s*")
+
+
+def dart_int(value: str) -> Optional[int]:
+    """int.parse as Dart does it: optional sign, decimal or 0x hex, surrounding whitespace."""
+    if not _DART_INT.fullmatch(value):
+        return None
+    return int(value.strip(), 0) if "x" in value.lower() else int(value.strip())
+
+
+def dart_length(value: str) -> int:
+    """String.length in Dart counts UTF-16 code units."""
+    return len(value.encode("utf-16-le")) // 2
+
+
+def birth_date(day: str, month: str, year: str, today: date) -> Optional[date]:
+    """_isValidDateInput: the DateTime built from the three fields, or None."""
+    if not day or not month or not year:
+        return None
+    d, m, y = dart_int(day), dart_int(month), dart_int(year)
+    if d is None or m is None or y is None:
+        return None
+    if d < 1 or d > 31 or m < 1 or m > 12 or y < 1900 or y > today.year:
+        return None
+    # DateTime(year, month, day) rolls overflowing days into the next month
+    return date(y, m, 1) + timedelta(days=d - 1)
+
+
+def validate_range(value: str, low: int, high: int) -> Optional[str]:
+    """_validateDay / _validateMonth / _validateYear."""
+    if not value:
+        return "Required"
+    number = dart_int(value)
+    if number is None:
+        return "Numbers only"
+    if number < low or number > high:
+        return "Invalid"
+    return None
+
+
+def validate_name(value: str) -> Optional[str]:
+    if not value:
+        return "Please enter your name"
+    if len([w for w in value.strip().split(" ") if w]) < 2:
+        return "Please enter both name and surname"
+    if dart_length(value.strip()) < 5:
+        return "Name is too short"
+    return None
+
+
+def is_valid_birth_date(birth: Optional[date], today: date) -> bool:
+    if birth is None or birth > today:
+        return False
+    if birth < today - timedelta(days=365 * 120):
+        return False
+    age = today.year - birth.year
+    if (today.month, today.day) < (birth.month, birth.day):
+        age -= 1
+    return age >= 10
+
+
+def validate_city(value: str) -> Optional[str]:
+    if not value:
+        return "Please enter your city"
+    if dart_length(value.strip()) < 2:
+        return "City name is too short"
+    if not re.fullmatch(r"[a-zA-Z\s\-]+", value):
+        return "City can only contain letters, spaces, and hyphens"
+    return None
+
+
+def validate_defects(value: Optional[str], model: str) -> Optional[str]:
+    if not value:
+        return f"Please describe defects for {model}"
+    if dart_length(value.strip()) < 5:
+        return "Description is too short"
+    return None
+
+
+def validate_use_case(value: str) -> Optional[str]:
+    if not value:
+        return "Please describe a beneficial use case"
+    if dart_length(value.strip()) < 10:
+        return "Description is too short (minimum 10 characters)"
+    return None
+
+
+class Outcome(NamedTuple):
+    """What the survey shows after Send is pressed."""
+    submitted: bool
+    snackbar: str
+    field_errors: Dict[str, str]
+    date_error: bool
+
+    @property
+    def messages(self) -> List[str]:
+        """Every message on screen, in screen order, the snackbar last."""
+        messages = [self.field_errors[f] for f in ("name", "day", "month", "year") if f in self.field_errors]
+        if self.date_error:
+            messages.append(INVALID_DATE)
+        messages += [self.field_errors[f] for f in ("city", "use_case") if f in self.field_errors]
+        return messages + [self.snackbar]
+
+
+def date_error_visible(form: Dict[str, Any], today: Optional[date] = None) -> bool:
+    """Whether the inline "Please enter a valid date" message is showing."""
+    today = today or date.today()
+    return bool(form["day"] and form["month"] and form["year"]) and \
+        birth_date(form["day"], form["month"], form["year"], today) is None
+
+
+def submit(form: Dict[str, Any], today: Optional[date] = None) -> Outcome:
+    """
+    _submitSurvey for a form state.
+
+    `form` has the text of the name, day, month, year, city and use_case fields,
+    the chosen education and gender ("" for none) and `models`, the selected AI
+    models mapped to their defect text.
+    """
+    today = today or date.today()
+    date_error = date_error_visible(form, today)
+    birth = birth_date(form["day"], form["month"], form["year"], today)
+    if birth is None:
+        return Outcome(False, INVALID_BIRTH_DATE, {}, date_error)
+
+    # _formKey.currentState!.validate(): only the validators wired into build()
+    errors = {}
+    if not form["name"]:
+        errors["name"] = "Please enter your name"
+    for field, (low, high) in (("day", (1, 31)), ("month", (1, 12)), ("year", (1900, today.year))):
+        message = validate_range(form[field], low, high)
+        if message:
+            errors[field] = message
+    if not form["city"]:
+        errors["city"] = "Please enter your city"
+    if not form["use_case"]:
+        errors["use_case"] = "Please describe a beneficial use case"
+
+    models = form["models"]
+    has_required = bool(form["name"] and form["education"] and form["city"] and form["gender"] and models
+                        and all(models.values()) and form["use_case"])
+    form_valid = has_required \
+        and is_valid_birth_date(birth, today) \
+        and validate_name(form["name"]) is None \
+        and validate_city(form["city"]) is None \
+        and all(validate_defects(defect, model) is None for model, defect in models.items()) \
+        and validate_use_case(form["use_case"]) is None
+
+    if errors or not form_valid:
+        return Outcome(False, FORM_INVALID, errors, date_error)
+    return Outcome(True, SUBMITTED, {}, date_error)
+
+
+def form_from_inputs(inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """The form state a scenario's inputs leave behind when they are entered."""
+    birth = inputs.get("birth_date") or {}
+    return {
+        "name": inputs.get("name", ""),
+        "day": birth.get("day", ""),
+        "month": birth.get("month", ""),
+        "year": birth.get("year", ""),
+        "education": inputs.get("education", ""),
+        "city": inputs.get("city", ""),
+        "gender": inputs.get("gender", ""),
+        "models": dict(inputs.get("ai_models_with_defects") or {}),
+        "use_case": inputs.get("beneficial_use_case", ""),
+    }
+
+
+def predict(scenario: Dict[str, Any], today: Optional[date] = None) -> Outcome:
+    """What the app shows after a scenario's inputs are entered and Send is pressed."""
+    return submit(form_from_inputs(scenario["inputs"]), today)
+
+
+def rejected_by(scenario: Dict[str, Any], today: Optional[date] = None) -> Set[str]:
+    """
+    The survey_page.dart members that reject a scenario's inputs when Send is pressed.
+
+    _submitSurvey stops at _isValidDateInput, so a scenario with an unusable
+    date is rejected by that check alone. Empty for inputs the survey accepts.
+    """
+    today = today or date.today()
+    form = form_from_inputs(scenario["inputs"])
+    birth = birth_date(form["day"], form["month"], form["year"], today)
+    if birth is None:
+        return {"_isValidDateInput"}
+
+    members = set()
+    for member, field, (low, high) in (("_validateDay", "day", (1, 31)), ("_validateMonth", "month", (1, 12)),
+                                       ("_validateYear", "year", (1900, today.year))):
+        if validate_range(form[field], low, high):
+            members.add(member)
+    if not is_valid_birth_date(birth, today):
+        members.add("_isValidBirthDate")
+    if validate_name(form["name"]):
+        members.add("_validateName")
+    if validate_city(form["city"]):
+        members.add("_validateCity")
+    if any(validate_defects(defect, model) for model, defect in form["models"].items()):
+        members.add("_validateAIModelDefects")
+    if validate_use_case(form["use_case"]):
+        members.add("_validateBeneficialUseCase")
+    return members
+
+
+def lint_scenario(scenario: Dict[str, Any], today: Optional[date] = None) -> List[str]:
+    """Problems with a scenario's expected result; empty if it matches the prediction."""
+    outcome = predict(scenario, today)
+    expected = scenario["expected_result"]
+    if expected["should_submit"] and not outcome.submitted:
+        return [f"expects the survey to be submitted, but the app shows: {'; '.join(outcome.messages)}"]
+    if not expected["should_submit"] and outcome.submitted:
+        return ["expects the form to be blocked, but the validators accept it"]
+    problems = []
+    error = expected.get("error_message")
+    if error and not outcome.submitted and not any(error.lower() in m.lower() for m in outcome.messages):
+        problems.append(f"expects error {error!r}, which the app does not show; "
+                        f"it shows: {'; '.join(outcome.messages)}")
+    return problems
+
+
+def lint(test_cases: List[Dict[str, Any]], today: Optional[date] = None) -> Dict[str, List[str]]:
+    """Problems by scenario id for every scenario whose expectation disagrees with the validators."""
+    problems = {}
+    for test_case in test_cases:
+        for scenario in test_case["scenarios"]:
+            found = lint_scenario(scenario, today)
+            if found:
+                problems[scenario["scenario_id"]] = found
+    return problems
+
+
+def is_mismatch(problem: str) -> bool:
+    """Whether a lint problem is a wrong should_submit, rather than an unseen error message."""
+    return problem.startswith(("expects the survey", "expects the form"))
+
+
+def report(problems: Dict[str, List[str]]) -> bool:
+    """Print lint problems; returns whether any scenario expects the wrong outcome."""
+    for scenario_id, found in problems.items():
+        for problem in found:
+            print(f"{'❌' if is_mismatch(problem) else '⚠️'} {scenario_id}: {problem}")
+    return any(is_mismatch(p) for found in problems.values() for p in found)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check expected results in a test case file against the survey validators')
+    parser.add_argument('json', help='Path to JSON file with test cases')
+    parser.add_argument('--today', help='Judge birth dates as of this date (YYYY-MM-DD)')
+    args = parser.parse_args()
+
+    today = date.fromisoformat(args.today) if args.today else None
+    with open(args.json) as f:
+        test_cases = json.load(f)["test_cases"]
+    problems = lint(test_cases, today)
+    mismatched = report(problems)
+    total = sum(len(tc["scenarios"]) for tc in test_cases)
+    print(f"{total - len(problems)}/{total} scenarios match the validators")
+    sys.exit(1 if mismatched else 0)
+
+
+if __name__ == "__main__":
+    main()
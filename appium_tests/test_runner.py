@@ -1,19 +1,30 @@
-from appium import webdriver
-from appium.options.android import UiAutomator2Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import NoSuchElementException
 import time
-import datetime
 import json
 import os
 import sys
+import queue
+import threading
 from termcolor import colored
 import traceback
 from typing import Dict, Any, List, Tuple, Optional
 import argparse
-from datetime import datetime
+import waits
+import tracing
+import steps
+import form_fill
+import artifacts
+import result_cache
+import timeout_history
+import impact
+import results_stream
+import async_runner
+import connection
+import driver_factory
+import screen_state
+import survey_oracle
+import flake
+import navigation
+import ops
 
 def load_test_cases(json_file_path: str) -> Dict[str, Any]:
     """Load test cases from a JSON file."""
@@ -24,420 +35,46 @@ def load_test_cases(json_file_path: str) -> Dict[str, Any]:
         print(f"Error loading test cases: {e}")
         sys.exit(1)
 
-def create_driver():
-    """Create and return an Appium driver."""
-    desired_caps = {
-        "platformName": "Android",
-        "platformVersion": "16",
-        "deviceName": "emulator-5554",
-        "appPackage": "com.example.my_auth_app",
-        "appActivity": "com.example.my_auth_app.MainActivity",
-        "automationName": "UiAutomator2",
-        "noReset": True
-    }
-    options = UiAutomator2Options().load_capabilities(desired_caps)
-    return webdriver.Remote("http://127.0.0.1:4723", options=options)
+def parse_devices(devices_arg: str) -> List[Dict[str, Any]]:
+    """
+    Parse a comma-separated device list of the form UDID[:SYSTEM_PORT].
 
-def login_with_email(driver, email="john@example.com", password="pass123"):
-    """Log in to the app with the given credentials."""
-    wait = WebDriverWait(driver, 20)
-    try:
-        time.sleep(5)
-        print("App loaded, starting email login test...")
-
-        email_input = wait.until(EC.element_to_be_clickable(
-            (By.XPATH, '//android.widget.EditText[@hint="Enter your email or phone number"]')
-        ))
-        email_input.click()
-        email_input.clear()
-        email_input.send_keys(email)
-        print("✅ Entered email")
-
-        password_input = wait.until(EC.element_to_be_clickable(
-            (By.XPATH, '//android.widget.EditText[@hint="Enter your password"]')
-        ))
-        password_input.click()
-        password_input.clear()
-        password_input.send_keys(password)
-        print("✅ Entered password")
-
-        # Sign in button
-        sign_in_button = wait.until(EC.element_to_be_clickable(
-            (By.XPATH, '//android.widget.Button[@content-desc="Sign in"]')
-        ))
-        sign_in_button.click()
-        print("✅ Sign in button clicked!")
-
-        # Wait for survey page to load
-        time.sleep(5)
-        return True
-    except Exception as e:
-        print(f"❌ Email/password login test failed: {e}")
-        return False
+    Example: "emulator-5554:8200,emulator-5556:8201"
+    """
+    devices = []
+    for entry in devices_arg.split(','):
+        entry = entry.strip()
+        if not entry:
+            continue
+        udid, _, port = entry.partition(':')
+        devices.append({"udid": udid, "system_port": int(port) if port else None})
+    return devices
 
-def find_element_safe(driver, xpath, timeout=5):
-    """Safely find an element, return None if not found."""
-    try:
-        wait = WebDriverWait(driver, timeout)
-        return wait.until(EC.presence_of_element_located((By.XPATH, xpath)))
-    except:
-        return None
+def create_driver(udid: Optional[str] = None, system_port: Optional[int] = None):
+    """Get a driver from the session pool, optionally bound to a specific device."""
+    return tracing.instrument(driver_factory.get_driver(udid, system_port))
 
-def is_error_displayed(driver):
-    """Check if any error message is displayed."""
-    try:
-        error_elements = driver.find_elements(By.XPATH, '//android.widget.TextView')
-        for element in error_elements:
-            text = element.get_attribute("text")
-            if text and any(err in text.lower() for err in ["error", "invalid", "please", "required"]):
-                print(f"Found error message: {text}")
-                return True, text
-
-        # Also check for snackbar error messages
-        snackbar = find_element_safe(driver, '//android.widget.TextView[contains(@resource-id, "snackbar_text")]')
-        if snackbar:
-            text = snackbar.get_attribute("text")
-            print(f"Found snackbar message: {text}")
-            return True, text
-
-        return False, ""
-    except Exception as e:
-        print(f"Error checking for error messages: {e}")
-        return False, ""
+def login_with_email(driver, email="john@example.com", password="pass123"):
+    """Log in to the app with the given credentials."""
+    return ops.run(navigation.login_flow(email, password), ops.DriverOps(driver))
 
-def run_test_scenario(driver, scenario: Dict[str, Any]) -> Tuple[bool, str]:
+def run_test_scenario(driver, scenario: Dict[str, Any],
+                      plan: Optional[List[steps.Step]] = None) -> Tuple[bool, str]:
     """
     Run a single test scenario and return the result.
 
     Args:
         driver: The Appium WebDriver instance
         scenario: The test scenario data
+        plan: The scenario's precompiled step plan; compiled here if omitted
 
     Returns:
         Tuple of (success: bool, message: str)
     """
     try:
-        inputs = scenario["inputs"]
-
-        # Enter name
-        try:
-            print(f"Entering name: {inputs['name']}")
-            name_field = find_element_safe(driver, '//android.widget.EditText[@hint="Name-Surname *"]')
-            if name_field:
-                name_field.click()
-                time.sleep(1)
-                name_field.clear()
-                name_field.send_keys(inputs['name'])
-            else:
-                print("Name field not found")
-                return False, "Name field not found"
-        except Exception as e:
-            print(f"Error entering name: {e}")
-            return False, f"Failed to enter name: {e}"
-
-        # Check for any validation error after entering name
-        error_found, error_msg = is_error_displayed(driver)
-        if error_found and not inputs['name']:
-            # If we expected an error (empty name), this is actually a pass
-            if not scenario["expected_result"]["should_submit"]:
-                return True, f"Form was correctly blocked with error: {error_msg}"
-            else:
-                return False, f"Form validation failed with error: {error_msg}"
-
-        # Enter birth date
-        try:
-            print("Entering birth date")
-            birth_date = inputs['birth_date']
-
-            # Enter day
-            day_field = find_element_safe(driver, '//android.widget.ScrollView/android.widget.EditText[2]/android.widget.EditText')
-            if day_field:
-                day_field.click()
-                time.sleep(1)
-                day_field.clear()
-                day_field.send_keys(birth_date['day'])
-
-                # Enter month
-                month_field = find_element_safe(driver, '//android.widget.ScrollView/android.widget.EditText[3]/android.widget.EditText')
-                if month_field:
-                    month_field.click()
-                    time.sleep(1)
-                    month_field.clear()
-                    month_field.send_keys(birth_date['month'])
-
-                    # Enter year
-                    year_field = find_element_safe(driver, '//android.widget.ScrollView/android.widget.EditText[4]/android.widget.EditText')
-                    if year_field:
-                        year_field.click()
-                        time.sleep(1)
-                        year_field.clear()
-                        year_field.send_keys(birth_date['year'])
-                        print(f"✅ Entered birth date: Day={birth_date['day']}, Month={birth_date['month']}, Year={birth_date['year']}")
-                    else:
-                        print("Year field not found")
-                        return False, "Year field not found"
-                else:
-                    print("Month field not found")
-                    return False, "Month field not found"
-            else:
-                print("Day field not found")
-                return False, "Day field not found"
-        except Exception as e:
-            print(f"Error entering birth date: {e}")
-            return False, f"Failed to enter birth date: {e}"
-
-        # Check for any validation error after entering birth date
-        error_found, error_msg = is_error_displayed(driver)
-        if error_found:
-            # If we expected an error (invalid date), this is actually a pass
-            if not scenario["expected_result"]["should_submit"]:
-                return True, f"Form was correctly blocked with error: {error_msg}"
-            else:
-                return False, f"Form validation failed with error: {error_msg}"
-
-        # Select education level
-        try:
-            if inputs['education']:
-                print(f"Selecting education level: {inputs['education']}")
-                education_dropdown = find_element_safe(driver, '//android.widget.Button[@content-desc="Education Level *"]')
-                if education_dropdown:
-                    education_dropdown.click()
-                    time.sleep(2)
-                    education_choice = find_element_safe(driver, f'''//android.widget.Button[@content-desc="{inputs['education']}"]''')
-                    if education_choice:
-                        education_choice.click()
-                        print("✅ Selected education level")
-                    else:
-                        print(f"Education choice {inputs['education']} not found")
-                        return False, f"Education choice {inputs['education']} not found"
-                else:
-                    print("Education dropdown not found")
-                    return False, "Education dropdown not found"
-        except Exception as e:
-            print(f"Error selecting education: {e}")
-            return False, f"Failed to select education: {e}"
-
-        # Enter city
-        try:
-            print(f"Entering city: {inputs['city']}")
-            # Try different XPaths for the city field as the structure might change
-            city_field = find_element_safe(driver, '//android.widget.ScrollView/android.widget.EditText[5]/android.widget.EditText')
-            if not city_field:
-                # Try alternative XPath
-                city_field = find_element_safe(driver, '//android.widget.EditText[@text="City *"]')
-            if not city_field:
-                # Try more general XPath
-                city_fields = driver.find_elements(By.XPATH, '//android.widget.EditText')
-                for field in city_fields:
-                    hint = field.get_attribute("hint")
-                    if hint and "City" in hint:
-                        city_field = field
-                        break
-
-            if city_field:
-                city_field.click()
-                time.sleep(1)
-                city_field.clear()
-                city_field.send_keys(inputs['city'])
-                print("✅ Entered city")
-            else:
-                print("City field not found")
-                # If we can't find city field and we're testing empty name, this might be expected
-                if not inputs['name'] and not scenario["expected_result"]["should_submit"]:
-                    return True, "Form correctly blocked before city field (due to name validation)"
-                return False, "City field not found"
-        except Exception as e:
-            print(f"Error entering city: {e}")
-            # If this is a name validation test, we might expect this error
-            if not inputs['name'] and not scenario["expected_result"]["should_submit"]:
-                return True, "Form correctly blocked before city field (due to name validation)"
-            return False, f"Failed to enter city: {e}"
-
-        # Check for any validation error after entering city
-        error_found, error_msg = is_error_displayed(driver)
-        if error_found and not inputs['city']:
-            # If we expected an error (empty city), this is actually a pass
-            if not scenario["expected_result"]["should_submit"]:
-                return True, f"Form was correctly blocked with error: {error_msg}"
-            else:
-                return False, f"Form validation failed with error: {error_msg}"
-
-        # Select gender
-        try:
-            if inputs['gender']:
-                print(f"Selecting gender: {inputs['gender']}")
-                gender_field = find_element_safe(driver, f'//android.widget.RadioButton[@content-desc="{inputs["gender"]}"]')
-                if gender_field:
-                    gender_field.click()
-                    print("✅ Selected gender")
-                else:
-                    print(f"Gender option {inputs['gender']} not found")
-                    return False, f"Gender option {inputs['gender']} not found"
-        except Exception as e:
-            print(f"Error selecting gender: {e}")
-            return False, f"Failed to select gender: {e}"
-
-        # Need to scroll down for AI models
-        try:
-            print("Scrolling down")
-            driver.swipe(start_x=500, start_y=1500, end_x=500, end_y=300, duration=800)
-            time.sleep(1)
-        except Exception as e:
-            print(f"Error scrolling: {e}")
-            return False, f"Failed to scroll: {e}"
-
-        # Select AI models and enter defects
-        try:
-            print("Selecting AI models and entering defects")
-            count = 1
-            for model, defect in inputs['ai_models_with_defects'].items():
-                print(f"Selecting AI model: {model}")
-                model_checkbox = find_element_safe(driver, f'''//android.widget.CheckBox[@content-desc="{model}"]''')
-                if model_checkbox:
-                    model_checkbox.click()
-                    time.sleep(1)
-
-                    # Scroll down again to see defect input
-                    driver.swipe(start_x=500, start_y=1500, end_x=500, end_y=300, duration=800)
-                    time.sleep(1)
-
-                    print(f"Entering defect for {model}: {defect}")
-                    defect_input = None
-                    if count == 1:
-                        defect_input = find_element_safe(driver, f'''//android.view.View[@content-desc="AI Models Section"]/android.widget.EditText/android.widget.EditText''')
-                    else:
-                        defect_input = find_element_safe(driver, f'''//android.view.View[@content-desc="AI Models Section"]/android.widget.EditText[{str(count)}]/android.widget.EditText''')
-
-                    if defect_input:
-                        defect_input.click()
-                        time.sleep(1)
-                        defect_input.clear()
-                        defect_input.send_keys(defect)
-                        count += 1
-                        print(f"✅ Selected AI model and entered defect")
-                    else:
-                        print(f"Defect input for {model} not found")
-                        return False, f"Defect input for {model} not found"
-                else:
-                    print(f"AI model {model} checkbox not found")
-                    return False, f"AI model {model} checkbox not found"
-        except Exception as e:
-            print(f"Error with AI models: {e}")
-            return False, f"Failed with AI models: {e}"
-
-        # Enter beneficial use case
-        try:
-            print(f"Entering beneficial use case: {inputs['beneficial_use_case']}")
-            # Scroll down again to see beneficial use case input
-            driver.swipe(start_x=500, start_y=1500, end_x=500, end_y=300, duration=800)
-            time.sleep(1)
-
-            use_case_field = find_element_safe(driver, f'''//android.widget.ScrollView/android.widget.EditText/android.widget.EditText''')
-            if use_case_field:
-                use_case_field.click()
-                time.sleep(1)
-                use_case_field.clear()
-                use_case_field.send_keys(inputs['beneficial_use_case'])
-                print("✅ Entered beneficial use case")
-            else:
-                print("Beneficial use case field not found")
-                return False, "Beneficial use case field not found"
-        except Exception as e:
-            print(f"Error entering beneficial use case: {e}")
-            return False, f"Failed to enter beneficial use case: {e}"
-
-        # Try to submit the form
-        try:
-            print("Attempting to submit form")
-            # Final scroll to ensure Send button is visible
-            driver.swipe(start_x=800, start_y=1800, end_x=800, end_y=800, duration=800)
-            time.sleep(1)
-
-            # Check if submit button exists and is clickable
-            submit_button_exists = True
-            try:
-                submit_button = find_element_safe(driver, '//android.widget.Button[@content-desc="Send"]')
-                if submit_button:
-                    submit_button.click()
-                    print("✅ Submit button clicked")
-                    time.sleep(5)  # Wait longer for potential error messages or success
-                else:
-                    submit_button_exists = False
-                    print("Submit button not found")
-            except Exception as e:
-                submit_button_exists = False
-                print(f"Could not click submit button: {e}")
-
-            # Capture any error messages after submission attempt
-            error_found, error_msg = is_error_displayed(driver)
-
-            # Check name validation - this is specific for TC1.3 (single word name)
-            name_error = False
-            if inputs['name'] and len(inputs['name'].split()) == 1:
-                try:
-                    name_errors = driver.find_elements(By.XPATH, '//android.widget.TextView')
-                    for element in name_errors:
-                        text = element.get_attribute("text")
-                        if text and "name and surname" in text.lower():
-                            print(f"Found name validation error: {text}")
-                            name_error = True
-                            error_found = True
-                            error_msg = text
-                            break
-                except:
-                    pass
-
-            # Take a screenshot for debugging (if needed)
-            try:
-                screenshot_name = f"{scenario['scenario_id'].replace('.', '_')}.png"
-                driver.get_screenshot_as_file(screenshot_name)
-                print(f"Screenshot saved as {screenshot_name}")
-            except Exception as e:
-                print(f"Could not take screenshot: {e}")
-
-            # Check if we're still on the form page by looking for the name field
-            still_on_form = find_element_safe(driver, '//android.widget.EditText[@hint="Name-Surname *"]') is not None
-
-            # Check if we're on the login page (successful submission)
-            on_login_page = find_element_safe(driver, '//android.widget.EditText[@hint="Enter your email or phone number"]') is not None
-
-            # Determine if the test passed based on expected results
-            expected_should_submit = scenario["expected_result"]["should_submit"]
-
-            # If we expected it to submit successfully
-            if expected_should_submit:
-                if on_login_page:
-                    return True, "Successfully submitted form and redirected to login screen as expected"
-                elif error_found:
-                    return False, f"Expected to submit but got error message: {error_msg}"
-                elif still_on_form:
-                    return False, "Expected to submit but still on form page"
-                else:
-                    return False, "Could not determine if submission was successful"
-            # If we expected it NOT to submit
-            else:
-                if name_error and "name with only one word" in scenario['description'].lower():
-                    return True, f"Form was correctly blocked with name validation error: {error_msg}"
-
-                if on_login_page:
-                    return False, "Form submitted successfully but should have been blocked"
-                elif error_found:
-                    if "error_message" in scenario["expected_result"]:
-                        expected_error = scenario["expected_result"]["error_message"]
-                        if expected_error.lower() in error_msg.lower():
-                            return True, f"Form was correctly blocked with expected error: {error_msg}"
-                        else:
-                            # Still a pass but with different error message
-                            return True, f"Form was blocked but with different error: {error_msg}"
-                    return True, f"Form was correctly blocked with error: {error_msg}"
-                elif still_on_form:
-                    return True, "Form correctly did not submit (still on form page)"
-                else:
-                    return False, "Could not determine if submission was blocked"
-        except Exception as e:
-            print(f"Error in submission verification: {e}")
-            traceback.print_exc()
-            return False, f"Test failed during submission verification: {e}"
+        if plan is None:
+            plan = steps.compile_plan(scenario)
+        return steps.run_plan(driver, plan, scenario)
     except Exception as e:
         print(f"General error in test scenario: {e}")
         traceback.print_exc()
@@ -445,18 +82,72 @@ def run_test_scenario(driver, scenario: Dict[str, Any]) -> Tuple[bool, str]:
 
 def reset_app(driver):
     """Reset the app to the login screen."""
-    try:
-        driver.terminate_app("com.example.my_auth_app")
-        time.sleep(2)
-        driver.activate_app("com.example.my_auth_app")
-        time.sleep(5)
-        return True
-    except Exception as e:
-        print(f"Error resetting app: {e}")
-        traceback.print_exc()
-        return False
+    return ops.run(navigation.restart_flow(), ops.DriverOps(driver))
+
+def current_screen(driver) -> screen_state.ScreenState:
+    """Identify the screen currently shown without waiting (see navigation.current_screen_flow)."""
+    return ops.run(navigation.current_screen_flow(), ops.DriverOps(driver))
+
+def reset_to_login(driver, full_reset: bool = False) -> Optional[str]:
+    """
+    Bring the app back to the login screen using the cheapest path available.
 
-def run_test_case(driver, test_case: Dict[str, Any]) -> List[Dict[str, Any]]:
+    Returns the name of the path that worked (see navigation.reset_flow), or
+    None if the app could not be reset.
+    """
+    return ops.run(navigation.reset_flow(full_reset), ops.DriverOps(driver))
+
+def capture_artifacts(driver, result: Dict[str, Any]) -> Dict[str, Any]:
+    """Save the screen of a failed scenario (or of every one with --artifacts always) to the result."""
+    if artifacts.wanted(result['success']):
+        paths = artifacts.capture(driver, result['scenario_id'])
+        if paths:
+            result["artifacts"] = paths
+    return result
+
+def run_scenario(driver, test_case: Dict[str, Any], scenario: Dict[str, Any],
+                 run_options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Reset the app, log in and run a single scenario, returning its result record.
+    """
+    run_options = run_options or {}
+    waits.start_recording(driver_factory.device_id(driver.capabilities))
+    form_fill.start_recording()
+    tracing.start_trace(scenario['scenario_id'])
+
+    with tracing.span("reset"):
+        reset_path = reset_to_login(driver, full_reset=run_options.get("full_reset", False))
+    if not reset_path:
+        return capture_artifacts(driver, results_stream.make_result(test_case, scenario, False, "Failed to reset app"))
+    print(f"App reset via: {reset_path}")
+
+    with tracing.span("login"):
+        logged_in = login_with_email(driver)
+    if not logged_in:
+        result = results_stream.make_result(test_case, scenario, False, "Failed to login")
+        result["reset_path"] = reset_path
+        return capture_artifacts(driver, result)
+
+    print(f"\n{'-'*80}")
+    print(f"Running Scenario: {scenario['scenario_id']} - {scenario['description']}")
+    print(f"{'-'*80}\n")
+
+    # Run the test scenario
+    with tracing.span("scenario"):
+        plan = run_options.get("plans", {}).get(scenario['scenario_id'])
+        success, message = run_test_scenario(driver, scenario, plan)
+
+    if success:
+        print(f"\n✅ Scenario {scenario['scenario_id']} PASSED: {message}")
+    else:
+        print(f"\n❌ Scenario {scenario['scenario_id']} FAILED: {message}")
+
+    result = results_stream.make_result(test_case, scenario, success, message)
+    result["reset_path"] = reset_path
+    return capture_artifacts(driver, result)
+
+def run_test_case(driver, test_case: Dict[str, Any],
+                  run_options: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
     """
     Run all scenarios in a test case and return results.
     """
@@ -468,65 +159,170 @@ def run_test_case(driver, test_case: Dict[str, Any]) -> List[Dict[str, Any]]:
     print(f"{'='*80}\n")
 
     for scenario in test_case['scenarios']:
-        # Reset and login for each scenario
-        if not reset_app(driver):
-            result = {
-                "test_case_id": test_case['id'],
-                "scenario_id": scenario['scenario_id'],
-                "description": scenario['description'],
-                "success": False,
-                "message": "Failed to reset app",
-                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            }
-            results.append(result)
-            continue
+        result = run_scenario(driver, test_case, scenario, run_options)
+        results_stream.report_result(result, run_options)
+        results.append(result)
 
-        if not login_with_email(driver):
-            result = {
-                "test_case_id": test_case['id'],
-                "scenario_id": scenario['scenario_id'],
-                "description": scenario['description'],
-                "success": False,
-                "message": "Failed to login",
-                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            }
-            results.append(result)
-            continue
+    return results
 
-        print(f"\n{'-'*80}")
-        print(f"Running Scenario: {scenario['scenario_id']} - {scenario['description']}")
-        print(f"{'-'*80}\n")
+def run_parallel(test_cases: List[Dict[str, Any]], devices: List[Dict[str, Any]],
+                 run_options: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """
+    Run all scenarios on a pool of workers, one Appium session per device.
 
-        # Run the test scenario
-        success, message = run_test_scenario(driver, scenario)
+    Workers pull scenarios from a shared queue, so faster devices simply take
+    more work. Results are returned in the same order as the scenarios appear
+    in the test case file, regardless of which worker finished first.
+    """
+    work = queue.Queue()
+    ordered = []
+    for test_case in test_cases:
+        for scenario in test_case['scenarios']:
+            work.put((len(ordered), test_case, scenario))
+            ordered.append((test_case, scenario))
 
-        result = {
-            "test_case_id": test_case['id'],
-            "scenario_id": scenario['scenario_id'],
-            "description": scenario['description'],
-            "success": success,
-            "message": message,
-            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        }
+    results: List[Optional[Dict[str, Any]]] = [None] * len(ordered)
 
-        if success:
-            print(f"\n✅ Scenario {scenario['scenario_id']} PASSED: {message}")
-        else:
-            print(f"\n❌ Scenario {scenario['scenario_id']} FAILED: {message}")
+    def worker(worker_id: int, device: Dict[str, Any]):
+        try:
+            driver = create_driver(device["udid"], device["system_port"])
+        except Exception as e:
+            print(f"❌ [worker {worker_id}] Could not start session on {device['udid']}: {e}")
+            return
 
-        results.append(result)
-        time.sleep(2)  # Brief pause between scenarios
+        print(f"[worker {worker_id}] Session started on {device['udid']}")
+        try:
+            while True:
+                try:
+                    index, test_case, scenario = work.get_nowait()
+                except queue.Empty:
+                    break
+                print(f"[worker {worker_id}] Picked up scenario {scenario['scenario_id']}")
+                try:
+                    results[index] = run_scenario(driver, test_case, scenario, run_options)
+                except Exception as e:
+                    traceback.print_exc()
+                    results[index] = results_stream.make_result(test_case, scenario, False, f"Worker error: {e}")
+                results_stream.report_result(results[index], run_options)
+        finally:
+            driver_factory.release_driver(driver)
+
+    threads = [
+        threading.Thread(target=worker, args=(i + 1, device), daemon=True)
+        for i, device in enumerate(devices)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Anything still missing was never picked up because every session failed to start
+    for index, (test_case, scenario) in enumerate(ordered):
+        if results[index] is None:
+            results[index] = results_stream.make_result(test_case, scenario, False, "Not run: no worker session available")
 
     return results
 
+def run_suite(test_cases: List[Dict[str, Any]], devices: List[Dict[str, Any]], workers: int = 1,
+              use_async: bool = False, run_options: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """Run the scenarios with the asyncio core, on parallel workers or on one session, and return their results."""
+    if use_async:
+        sessions = devices[:max(workers, 1)] or [{"udid": None, "system_port": None}]
+        print(f"Running {len(sessions)} sessions with the asyncio core")
+        return async_runner.run(test_cases, sessions, run_options)
+    if workers > 1:
+        print(f"Running with {workers} parallel workers")
+        return run_parallel(test_cases, devices[:workers], run_options)
+
+    device = devices[0] if devices else {"udid": None, "system_port": None}
+    driver = create_driver(device["udid"], device["system_port"])
+    results = []
+    try:
+        for test_case in test_cases:
+            results.extend(run_test_case(driver, test_case, run_options))
+    finally:
+        driver_factory.release_driver(driver)
+    return results
+
+def select_scenarios(test_cases: List[Dict[str, Any]], scenario_ids) -> List[Dict[str, Any]]:
+    """The test cases narrowed down to the given scenarios, dropping test cases left empty."""
+    selected = []
+    for test_case in test_cases:
+        scenarios = [s for s in test_case['scenarios'] if s['scenario_id'] in scenario_ids]
+        if scenarios:
+            selected.append(dict(test_case, scenarios=scenarios))
+    return selected
+
 def main():
     """Main function to run all tests from a JSON file."""
     parser = argparse.ArgumentParser(description='Run automated tests for the Survey app')
     parser.add_argument('--json', '-j', required=True, help='Path to JSON file with test cases')
     parser.add_argument('--output', '-o', default='test_results.json', help='Path to output JSON file for results')
     parser.add_argument('--filter', '-f', help='Filter test cases by ID (comma-separated)')
+    parser.add_argument('--workers', '-w', type=int, default=1, help='Number of parallel Appium sessions')
+    parser.add_argument('--devices', '-d', help='Comma-separated device list as UDID[:SYSTEM_PORT], one per worker')
+    parser.add_argument('--wait-timeout', type=float, default=waits.DEFAULT_TIMEOUT,
+                        help='Seconds to wait for a screen transition before giving up')
+    parser.add_argument('--poll-interval', type=float, default=waits.DEFAULT_POLL_INTERVAL,
+                        help='Seconds between checks while waiting for an element')
+    parser.add_argument('--fixed-timeouts', action='store_true',
+                        help='Use the given timeouts for every wait instead of ones learned from earlier runs')
+    parser.add_argument('--timeout-factor', type=float, default=timeout_history.DEFAULT_FACTOR,
+                        help='Learned timeout of a wait step = p99 of its earlier durations times this factor')
+    parser.add_argument('--max-wait', type=float, default=timeout_history.DEFAULT_CEILING,
+                        help='Upper limit in seconds for learned wait timeouts')
+    driver_factory.add_arguments(parser)
+    parser.add_argument('--http-timeout', type=float, default=connection.TIMEOUT,
+                        help='Seconds to wait for the Appium server to answer a command')
+    parser.add_argument('--http-retries', type=int, default=connection.RETRIES,
+                        help='Retries with exponential backoff when a connection to Appium fails or is reset')
+    parser.add_argument('--full-reset', action='store_true',
+                        help='Always terminate and relaunch the app between scenarios')
+    parser.add_argument('--fast-fail', action='store_true',
+                        help='Stop negative scenarios at the first expected error after pressing Send')
+    parser.add_argument('--lint', action='store_true',
+                        help='Only check expected results against the survey validators, without a device')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Run every scenario even if it already passed against this app build')
+    parser.add_argument('--apk', help='APK under test, used to identify the app build for the result cache')
+    parser.add_argument('--affected-since', metavar='REF',
+                        help='Only run scenarios affected by changes since this git ref')
+    parser.add_argument('--affected-until', metavar='REF',
+                        help='With --affected-since, compare against this ref instead of the working tree')
+    parser.add_argument('--async', dest='use_async', action='store_true',
+                        help='Drive all sessions from one thread with the asyncio core')
+    parser.add_argument('--resume', action='store_true',
+                        help='Skip scenarios already recorded in the result stream of an interrupted run')
+    parser.add_argument('--retries', type=int, default=flake.DEFAULT_RETRIES,
+                        help='Rerun failed scenarios on fresh sessions up to this many times')
+    parser.add_argument('--quarantine-threshold', type=float, default=flake.DEFAULT_THRESHOLD,
+                        help='Quarantine scenarios whose flake rate is confidently above this fraction')
+    parser.add_argument('--no-quarantine', action='store_true',
+                        help='Run and count quarantined scenarios like any other')
+    parser.add_argument('--junit', help='Also write results as JUnit XML to this path, updated during the run')
+    parser.add_argument('--artifacts', choices=artifacts.MODES, default='failure',
+                        help='When to save screenshots and page sources of a scenario (default: failure)')
+    parser.add_argument('--artifacts-dir', help='Root directory for saved artifacts (default: <output>_artifacts)')
+    parser.add_argument('--artifacts-max-mb', type=float, default=artifacts.DEFAULT_MAX_MB,
+                        help='Size cap in MB for the artifacts of one run')
+    parser.add_argument('--trace', help='Path for the Chrome trace of all steps (default: <output>_trace.json)')
     args = parser.parse_args()
 
+    waits.configure(timeout=args.wait_timeout, poll_interval=args.poll_interval)
+    artifacts.configure(root=args.artifacts_dir or f"{os.path.splitext(args.output)[0]}_artifacts",
+                        mode=args.artifacts, max_mb=args.artifacts_max_mb)
+    try:
+        driver_factory.configure(args)
+    except ValueError as e:
+        parser.error(str(e))
+    # One pooled connection per parallel session
+    connection.configure(pool_size=max(connection.POOL_SIZE, args.workers), timeout=args.http_timeout,
+                         retries=args.http_retries)
+
+    devices = parse_devices(args.devices) if args.devices else []
+    if args.workers > 1 and len(devices) < args.workers:
+        parser.error(f"--workers {args.workers} needs at least {args.workers} entries in --devices")
+
     # Load test cases
     test_data = load_test_cases(args.json)
 
@@ -535,34 +331,235 @@ def main():
         filter_ids = args.filter.split(',')
         test_data['test_cases'] = [tc for tc in test_data['test_cases'] if tc['id'] in filter_ids]
 
+    # Narrow down to the scenarios affected by the changes, if asked
+    if args.affected_since:
+        print(f"Selecting scenarios affected by {args.affected_since}..{args.affected_until or 'working tree'}:")
+        try:
+            test_data['test_cases'] = impact.select(test_data['test_cases'], args.affected_since, args.affected_until)
+        except Exception as e:
+            print(f"⚠️ Could not work out affected scenarios, running all: {e}")
+        print(f"{sum(len(tc['scenarios']) for tc in test_data['test_cases'])} scenarios selected")
+
     print(f"Loaded {len(test_data['test_cases'])} test cases")
 
-    # Initialize the driver
-    driver = create_driver()
+    # Check expected results against the survey validators before spending device time
+    problems = survey_oracle.lint(test_data['test_cases'])
+    mismatched = survey_oracle.report(problems)
+    if args.lint:
+        print(f"{len(problems)} scenarios disagree with the survey validators")
+        sys.exit(1 if mismatched else 0)
+
+    # Compile every scenario into its step plan before any session starts
+    try:
+        plans = steps.compile_suite(test_data['test_cases'], fast_fail=args.fast_fail)
+    except KeyError as e:
+        print(f"Error compiling test cases: missing input {e}")
+        sys.exit(1)
+
+    run_options = {"full_reset": args.full_reset, "plans": plans}
+
+    # Results are streamed here as each scenario finishes
+    stream_path = f"{os.path.splitext(args.output)[0]}_results.jsonl"
+    scenario_ids = {s['scenario_id'] for tc in test_data['test_cases'] for s in tc['scenarios']}
+    resumed_results = {}
+    if args.resume:
+        try:
+            resumed_results = {sid: r for sid, r in results_stream.read_completed(stream_path).items()
+                               if sid in scenario_ids}
+        except Exception as e:
+            print(f"Error reading {stream_path}, starting over: {e}")
+        print(f"Resuming: {len(resumed_results)} scenarios already completed in {stream_path}")
+
+    # Skip scenarios that already passed against the same app build and harness
+    cache = None
+    fingerprints = {}
+    cached_results = {}
+    app_id = result_cache.app_build_id(navigation.APP_PACKAGE, args.apk, devices[0]["udid"] if devices else None)
+    if app_id:
+        cache = result_cache.ResultCache(f"{os.path.splitext(args.output)[0]}_cache.jsonl")
+        harness = result_cache.harness_id()
+        for test_case in test_data['test_cases']:
+            for scenario in test_case['scenarios']:
+                key = result_cache.fingerprint(app_id, harness, scenario, {"fast_fail": args.fast_fail})
+                fingerprints[scenario['scenario_id']] = key
+                cached = None if args.no_cache else cache.get(key)
+                if cached and scenario['scenario_id'] not in resumed_results:
+                    cached_results[scenario['scenario_id']] = dict(cached, cached=True)
+        if cached_results:
+            print(f"Skipping {len(cached_results)} scenarios that already passed against this app build")
+    else:
+        print("⚠️ Could not identify the app build (use --apk); result cache disabled")
+
+    # Learn each wait's timeout from earlier runs on the same device and app build
+    history = None
+    if not args.fixed_timeouts:
+        history = timeout_history.TimeoutHistory(f"{os.path.splitext(args.output)[0]}_timeouts.json", app_id,
+                                                 factor=args.timeout_factor, ceiling=args.max_wait)
+        waits.use_history(history)
+
+    # Scenarios that flaked too often in earlier runs go last and do not fail the run
+    flakes = flake.FlakeHistory(f"{os.path.splitext(args.output)[0]}_flakes.json",
+                                threshold=args.quarantine_threshold)
+    quarantined = set() if args.no_quarantine else flakes.quarantined() & scenario_ids
+    if quarantined:
+        print(f"🚧 Quarantined as flaky, running last: {', '.join(sorted(quarantined))}")
+
+    pending = scenario_ids - set(cached_results) - set(resumed_results)
+    test_cases_to_run = (select_scenarios(test_data['test_cases'], pending - quarantined)
+                         + select_scenarios(test_data['test_cases'], pending & quarantined))
+
+    stream = results_stream.ResultStream(stream_path, resume=args.resume, junit_path=args.junit)
+    latest: Dict[str, Dict[str, Any]] = {}
+
+    def on_result(result: Dict[str, Any]):
+        # Every attempt is streamed; a retry's record carries the attempts before it
+        flake.add_attempt(result, latest.get(result['scenario_id']))
+        if result['scenario_id'] in quarantined:
+            result['quarantined'] = True
+        latest[result['scenario_id']] = result
+        stream.write(result)
+
+    run_options["on_result"] = on_result
+    print(f"Streaming results to {stream_path}")
+
+    # Failures the validators predict would only fail again, and quarantined ones are not worth the time
+    no_retry = quarantined | {sid for sid, found in problems.items()
+                              if any(survey_oracle.is_mismatch(p) for p in found)}
 
     # Run all test cases
     all_results = []
 
     try:
-        for test_case in test_data['test_cases']:
-            results = run_test_case(driver, test_case)
-            all_results.extend(results)
+        if not test_cases_to_run:
+            print("Nothing to run")
+        else:
+            all_results = run_suite(test_cases_to_run, devices, args.workers, args.use_async, run_options)
+        for attempt in range(2, args.retries + 2):
+            failed = {r['scenario_id'] for r in all_results
+                      if not r['success'] and r['scenario_id'] not in no_retry}
+            if not failed:
+                break
+            print(f"\n🔁 Retrying {len(failed)} failed scenarios on fresh sessions "
+                  f"(attempt {attempt} of {args.retries + 1}): {', '.join(sorted(failed))}")
+            # Quit the warm sessions so the retry does not inherit a broken session or app state
+            driver_factory.pool.close(keep_sessions=False)
+            retried = run_suite(select_scenarios(test_cases_to_run, failed), devices,
+                                min(args.workers, len(failed)), args.use_async, run_options)
+            by_id = {r['scenario_id']: r for r in retried}
+            all_results = [by_id.get(r['scenario_id'], r) for r in all_results]
+    except KeyboardInterrupt:
+        print(f"\n⚠️ Interrupted; rerun with --resume to skip the {len({r['scenario_id'] for r in stream.results})} completed scenarios")
     except Exception as e:
         print(f"Error running tests: {e}")
         traceback.print_exc()
     finally:
+        try:
+            stream.close()
+        except Exception as e:
+            print(f"Error closing result stream: {e}")
+
+        # Scenarios that finished before an interruption are only in the stream, where the last attempt wins
+        by_id = {r['scenario_id']: r for r in all_results}
+        by_id.update((r['scenario_id'], r) for r in stream.results)
+
+        # Remember new passes, then put cached results back in file order
+        if cache is not None:
+            for r in by_id.values():
+                key = fingerprints.get(r['scenario_id'])
+                if r['success'] and key:
+                    cache.put(key, {k: r[k] for k in ('test_case_id', 'scenario_id', 'description',
+                                                      'success', 'message', 'timestamp')})
+            try:
+                cache.save()
+            except Exception as e:
+                print(f"Error saving result cache: {e}")
+
+        if history is not None:
+            try:
+                history.save()
+            except Exception as e:
+                print(f"Error saving timeout history: {e}")
+
+        for scenario_id, r in by_id.items():
+            if scenario_id in pending and r.get('attempts'):
+                flakes.record(r, fingerprints.get(scenario_id))
+        try:
+            flakes.save()
+        except Exception as e:
+            print(f"Error saving flake history: {e}")
+
+        by_id.update(cached_results)
+        all_results = [by_id[s['scenario_id']] for tc in test_data['test_cases']
+                       for s in tc['scenarios'] if s['scenario_id'] in by_id]
+
         # Generate summary
         total_scenarios = len(all_results)
         if total_scenarios > 0:
             passed_scenarios = sum(1 for r in all_results if r['success'])
+            quarantined_failures = [r['scenario_id'] for r in all_results
+                                    if r.get('quarantined') and not r['success']]
+            failed_scenarios = total_scenarios - passed_scenarios - len(quarantined_failures)
 
             print(f"\n\n{'='*80}")
             print("TEST EXECUTION SUMMARY")
             print(f"{'='*80}")
             print(f"Total scenarios: {total_scenarios}")
             print(f"Passed scenarios: {passed_scenarios}")
-            print(f"Failed scenarios: {total_scenarios - passed_scenarios}")
-            print(f"Success rate: {passed_scenarios/total_scenarios*100:.2f}%")
+            print(f"Failed scenarios: {failed_scenarios}")
+            if quarantined_failures:
+                print(f"Quarantined failures, not counted: {', '.join(quarantined_failures)}")
+            if passed_scenarios + failed_scenarios:
+                print(f"Success rate: {passed_scenarios/(passed_scenarios + failed_scenarios)*100:.2f}%")
+            if cached_results:
+                print(f"Cached passes reused: {len(cached_results)}")
+            if resumed_results:
+                print(f"Resumed from earlier run: {len(resumed_results)}")
+
+            retried = [r for r in all_results if len(r.get('attempts', [])) > 1]
+            if retried:
+                flaky = [r['scenario_id'] for r in retried if r.get('flaky')]
+                print(f"Retries: {sum(len(r['attempts']) - 1 for r in retried)} for {len(retried)} scenarios; "
+                      f"passed on retry: {', '.join(flaky) or 'none'}")
+            if any(flakes.stats(sid)['flaky'] for sid in by_id):
+                print(f"Flake rates: python flake.py {flakes.path}")
+
+            reset_paths = {}
+            for r in all_results:
+                if r.get('reset_path'):
+                    reset_paths[r['reset_path']] = reset_paths.get(r['reset_path'], 0) + 1
+            if reset_paths:
+                print("App resets: " + ", ".join(f"{path}={count}" for path, count in sorted(reset_paths.items())))
+
+            entry_stats = [r['text_entry'] for r in all_results if r.get('text_entry')]
+            if entry_stats:
+                print(f"Text entry: {sum(e['fields'] for e in entry_stats)} fields in "
+                      f"{sum(e['round_trips'] for e in entry_stats)} round-trips "
+                      f"({sum(e['round_trips_saved'] for e in entry_stats)} saved)")
+
+            if history is not None and history.adapted:
+                print(f"Learned wait timeouts: {len(history.adapted)} steps, "
+                      f"{min(history.adapted.values()):.1f}-{max(history.adapted.values()):.1f}s "
+                      f"(history in {history.path})")
+
+            http = connection.stats()
+            if http['requests']:
+                print(f"HTTP: {http['requests']} requests over {http['connections']} connections "
+                      f"({http['reused']} reused, {http['retries']} retries)")
+
+            step_seconds = {}
+            for r in all_results:
+                for step in r.get('steps', []):
+                    step_seconds[step['name']] = step_seconds.get(step['name'], 0) + step['seconds']
+            if step_seconds:
+                slowest = sorted(step_seconds.items(), key=lambda item: item[1], reverse=True)[:5]
+                print("Slowest steps: " + ", ".join(f"{name}={seconds:.1f}s" for name, seconds in slowest))
+
+            trace_path = args.trace or f"{os.path.splitext(args.output)[0]}_trace.json"
+            try:
+                tracing.export_chrome_trace(trace_path)
+                print(f"Step trace saved to {trace_path}")
+            except Exception as e:
+                print(f"Error saving trace: {e}")
 
             # Save results to file
             try:
@@ -572,8 +569,17 @@ def main():
             except Exception as e:
                 print(f"Error saving results: {e}")
 
+            if args.junit:
+                try:
+                    results_stream.write_junit(all_results, args.junit)
+                    print(f"JUnit report saved to {args.junit}")
+                except Exception as e:
+                    print(f"Error saving JUnit report: {e}")
+
         # Clean up
-        driver.quit()
+        artifacts.close()
+        driver_factory.pool.close()
+        connection.shutdown()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The harness modules are flat scripts in appium_tests/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
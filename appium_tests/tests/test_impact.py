@@ -0,0 +1,46 @@
+import json
+import os
+
+import impact
+
+SURVEY_PAGE = "lib/screens/survey_page.dart"
+
+
+def _load_test_cases():
+    with open(os.path.join(impact.HERE, "test_cases.json")) as f:
+        return json.load(f)["test_cases"]
+
+
+def _line_in(member):
+    with open(os.path.join(impact.REPO_ROOT, SURVEY_PAGE), encoding="utf-8") as f:
+        members = impact.dart_members(f.read())
+    return next(start for name, start, end in members if name == member) + 1
+
+
+def _change(monkeypatch, path, line):
+    monkeypatch.setattr(impact, "changed_lines", lambda base, head: {path: ({line}, {line})})
+    # Both sides of the diff read the working tree
+    read = impact._read
+    monkeypatch.setattr(impact, "_read", lambda p, ref: read(p, None))
+
+
+def test_changed_validator_selects_the_scenarios_it_decides(monkeypatch):
+    test_cases = _load_test_cases()
+    _change(monkeypatch, SURVEY_PAGE, _line_in("_validateCity"))
+
+    selected = impact.select(test_cases, "base")
+    ids = {s["scenario_id"] for tc in selected for s in tc["scenarios"]}
+    total = sum(len(tc["scenarios"]) for tc in test_cases)
+
+    assert len(ids) < total
+    # Invalid cities, and scenarios the survey accepts
+    assert {"TC1.4", "TC5.1", "TC5.2", "TC1.1", "TC6.3"} <= ids
+    # Rejected by other validators
+    assert not ids & {"TC1.2", "TC2.2", "TC5.3", "TC5.4"}
+
+
+def test_change_outside_members_selects_everything(monkeypatch):
+    test_cases = _load_test_cases()
+    _change(monkeypatch, SURVEY_PAGE, 1)
+
+    assert impact.select(test_cases, "base") == test_cases
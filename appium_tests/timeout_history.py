@@ -0,0 +1,111 @@
+"""
+Adaptive wait timeouts learned from how long each wait took in earlier runs.
+
+A fixed timeout has to cover the slowest device, so a lookup that is going to
+fail always burns the whole budget. The history keeps the durations of
+waits per device, app build and wait step, and derives each step's timeout as
+its p99 duration times a safety factor, clamped between a floor and a hard
+ceiling. Steps with fewer than `min_samples` observations keep the caller's
+timeout.
+
+A wait that times out is kept as a censored sample: its duration is only a
+lower bound of how long the step would have taken. Without it a learned
+timeout could only shrink, since anything slower than it is never observed.
+Once more than 1% of a step's samples are censored, its p99 is at least the
+timeout that cut it short, so the next timeout is `factor` times longer, up to
+the ceiling.
+
+Samples are stored in a JSON file as {"<device>|<build>": {step: [seconds, ...]}},
+keeping the most recent MAX_SAMPLES per step. save() merges with the file on
+disk, so runs sharing a history do not overwrite each other's samples.
+"""
+import json
+import math
+import os
+import threading
+from typing import Dict, List, Optional
+
+DEFAULT_FACTOR = 3.0
+DEFAULT_PERCENTILE = 99
+DEFAULT_FLOOR = 1.0
+DEFAULT_CEILING = 60.0
+MIN_SAMPLES = 20
+MAX_SAMPLES = 500
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+class TimeoutHistory:
+    """Observed wait durations for one app build, and the timeouts derived from them."""
+
+    def __init__(self, path: str, build: Optional[str] = None, factor: float = DEFAULT_FACTOR,
+                 ceiling: float = DEFAULT_CEILING, floor: float = DEFAULT_FLOOR,
+                 min_samples: int = MIN_SAMPLES, pct: float = DEFAULT_PERCENTILE):
+        self.path = path
+        self.build = build or "unknown"
+        self.factor = factor
+        self.ceiling = ceiling
+        self.floor = min(floor, ceiling)
+        self.min_samples = min_samples
+        self.pct = pct
+        self._lock = threading.Lock()
+        self._samples: Dict[str, Dict[str, List[float]]] = self._read()
+        self._new: Dict[str, Dict[str, List[float]]] = {}
+        # Steps whose timeout came from the history in this run
+        self.adapted: Dict[str, float] = {}
+
+    def _key(self, device: Optional[str]) -> str:
+        return f"{device or 'default'}|{self.build}"
+
+    def _read(self) -> Dict[str, Dict[str, List[float]]]:
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            print(f"Could not read timeout history {self.path}: {e}")
+            return {}
+
+    def timeout(self, device: Optional[str], step: str, default: float) -> float:
+        """The learned timeout for a step on a device, or `default` without enough history."""
+        with self._lock:
+            samples = self._samples.get(self._key(device), {}).get(step, [])
+            samples = samples + self._new.get(self._key(device), {}).get(step, [])
+        if len(samples) < self.min_samples:
+            return default
+        timeout = min(max(percentile(samples, self.pct) * self.factor, self.floor), self.ceiling)
+        self.adapted[step] = timeout
+        return timeout
+
+    def record(self, device: Optional[str], step: str, seconds: float, satisfied: bool,
+               timeout: Optional[float] = None):
+        """Remember how long a wait took; a timed-out wait took at least its timeout."""
+        if not satisfied and timeout is not None:
+            seconds = max(seconds, timeout)
+        with self._lock:
+            self._new.setdefault(self._key(device), {}).setdefault(step, []).append(round(seconds, 3))
+
+    def save(self):
+        """Add this run's samples to the history file, replacing it atomically."""
+        with self._lock:
+            if not self._new:
+                return
+            merged = self._read()
+            for key, steps in self._new.items():
+                for step, samples in steps.items():
+                    kept = merged.setdefault(key, {}).setdefault(step, []) + samples
+                    merged[key][step] = kept[-MAX_SAMPLES:]
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(merged, f)
+            os.replace(tmp_path, self.path)
+            self._samples = merged
+            self._new = {}
@@ -0,0 +1,207 @@
+"""
+Structured timing spans for test scenarios.
+
+Each scenario gets a Tracer for the thread running it. Code marks the steps
+it goes through, either with a `with tracing.span("login"):` block or with
+`tracing.step("city")`, which ends the previous step at the same level.
+Every span records its start and end time and how many WebDriver commands
+were sent while it was open, so a slow scenario can be broken down into the
+dropdown, the scrolling or the submission wait.
+
+All traces of a run can be exported as a Chrome trace file, which opens in
+chrome://tracing or https://ui.perfetto.dev.
+"""
+import contextlib
+import contextvars
+import json
+import os
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+# Common time base so spans from different worker threads line up in one trace
+_EPOCH = time.perf_counter()
+
+# Per thread, and per asyncio task when scenarios run as coroutines
+_current: contextvars.ContextVar = contextvars.ContextVar("tracer", default=None)
+_traces: List["Tracer"] = []
+_traces_lock = threading.Lock()
+
+
+class Span:
+    """One timed step; `commands` counts WebDriver commands sent while it was open."""
+
+    def __init__(self, name: str, parent: Optional["Span"], is_step: bool, args: Dict[str, Any]):
+        self.name = name
+        self.parent = parent
+        self.is_step = is_step
+        self.args = args
+        self.start = time.perf_counter() - _EPOCH
+        self.end: Optional[float] = None
+        self.commands: Counter = Counter()
+
+    @property
+    def seconds(self) -> float:
+        end = self.end if self.end is not None else time.perf_counter() - _EPOCH
+        return end - self.start
+
+    def path(self) -> str:
+        return f"{self.parent.path()}/{self.name}" if self.parent else self.name
+
+
+class Tracer:
+    """The spans recorded for one scenario on one thread."""
+
+    def __init__(self, name: str, lane: Optional[str] = None):
+        self.name = name
+        # Scenarios sharing one thread (asyncio sessions) are told apart by lane
+        self.thread_name = lane or threading.current_thread().name
+        self.thread_id = threading.get_ident() if lane is None else abs(hash(lane)) % 1_000_000
+        self.spans: List[Span] = []
+        self._open: List[Span] = []
+
+    def begin(self, name: str, is_step: bool = False, **args) -> Span:
+        span = Span(name, self._open[-1] if self._open else None, is_step, args)
+        self.spans.append(span)
+        self._open.append(span)
+        return span
+
+    def end(self, span: Optional[Span] = None):
+        """End `span` (default: the innermost open span) and any spans still open inside it."""
+        if not self._open:
+            return
+        span = span or self._open[-1]
+        if span not in self._open:
+            return
+        now = time.perf_counter() - _EPOCH
+        while self._open:
+            top = self._open.pop()
+            top.end = now
+            if top is span:
+                break
+
+    def step(self, name: str, **args) -> Span:
+        """Start a step, ending the previous step opened at the same level."""
+        if self._open and self._open[-1].is_step:
+            self.end(self._open[-1])
+        return self.begin(name, is_step=True, **args)
+
+    def finish(self):
+        while self._open:
+            self.end()
+
+    def command(self, name: str):
+        for span in self._open:
+            span.commands[name] += 1
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """Finished spans as plain dicts for the results file."""
+        base = self.spans[0].start if self.spans else 0.0
+        return [
+            {
+                "name": span.path(),
+                "offset_seconds": round(span.start - base, 3),
+                "seconds": round(span.seconds, 3),
+                "commands": sum(span.commands.values()),
+            }
+            for span in self.spans
+        ]
+
+
+def start_trace(name: str, lane: Optional[str] = None) -> Tracer:
+    """Start a fresh tracer for the current thread or task and return it."""
+    tracer = Tracer(name, lane)
+    _current.set(tracer)
+    with _traces_lock:
+        _traces.append(tracer)
+    return tracer
+
+
+def current_tracer() -> Optional[Tracer]:
+    """Return the tracer for the current thread or task, if one was started."""
+    return _current.get()
+
+
+@contextlib.contextmanager
+def span(name: str, **args):
+    """Time a block as one span; does nothing when no trace was started."""
+    tracer = current_tracer()
+    if tracer is None:
+        yield None
+        return
+    opened = tracer.begin(name, **args)
+    try:
+        yield opened
+    finally:
+        tracer.end(opened)
+
+
+def step(name: str, **args) -> Optional[Span]:
+    """Mark the start of the next step in the current span, if tracing."""
+    tracer = current_tracer()
+    if tracer is None:
+        return None
+    return tracer.step(name, **args)
+
+
+def instrument(driver):
+    """
+    Count every WebDriver command the driver sends against the open spans.
+
+    Wraps `driver.execute`, through which all Selenium and Appium commands pass.
+    """
+    if getattr(driver, "_traced", False):
+        return driver
+    execute = driver.execute
+
+    def traced_execute(driver_command, params=None):
+        tracer = current_tracer()
+        if tracer is not None:
+            tracer.command(driver_command)
+        return execute(driver_command, params)
+
+    driver.execute = traced_execute
+    driver._traced = True
+    return driver
+
+
+def clear():
+    """Forget all recorded traces."""
+    with _traces_lock:
+        _traces.clear()
+
+
+def chrome_trace_events(traces: Optional[List[Tracer]] = None) -> List[Dict[str, Any]]:
+    """Convert traces to Chrome trace "complete" events (timestamps in microseconds)."""
+    if traces is None:
+        with _traces_lock:
+            traces = list(_traces)
+
+    pid = os.getpid()
+    events = []
+    thread_names = {}
+    for tracer in traces:
+        thread_names[tracer.thread_id] = tracer.thread_name
+        for span in tracer.spans:
+            args = dict(span.args, scenario=tracer.name, commands=sum(span.commands.values()))
+            args.update({f"cmd.{name}": count for name, count in span.commands.items()})
+            events.append({
+                "name": span.name,
+                "cat": "step" if span.is_step else "scenario",
+                "ph": "X",
+                "ts": round(span.start * 1e6),
+                "dur": round(span.seconds * 1e6),
+                "pid": pid,
+                "tid": tracer.thread_id,
+                "args": args,
+            })
+    for tid, thread_name in thread_names.items():
+        events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": thread_name}})
+    return events
+
+
+def export_chrome_trace(path: str, traces: Optional[List[Tracer]] = None):
+    """Write all traces (or the given ones) as a Chrome trace / Perfetto JSON file."""
+    with open(path, 'w') as f:
+        json.dump({"traceEvents": chrome_trace_events(traces), "displayTimeUnit": "ms"}, f)
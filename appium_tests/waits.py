@@ -0,0 +1,136 @@
+"""
+Condition-driven waits for the Appium test runner.
+
+Instead of sleeping for a fixed time, callers wait for the element or state
+that the next step actually needs. Every wait is recorded with how long it
+really took, so slow steps show up in the results file.
+
+With a TimeoutHistory installed via use_history(), each wait's timeout is
+learned from earlier durations of the same step on the same device and app
+build (see timeout_history.py), and every wait adds a sample; one that timed
+out counts as taking at least its timeout.
+"""
+import contextvars
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException
+
+# Defaults used when a wait does not pass its own timeout / poll interval.
+# Both can be changed at startup via configure().
+DEFAULT_TIMEOUT = 20.0
+DEFAULT_POLL_INTERVAL = 0.25
+
+# Per thread, and per asyncio task when scenarios run as coroutines
+_recorder: contextvars.ContextVar = contextvars.ContextVar("wait_recorder", default=None)
+
+# Source of adaptive timeouts, if any; see use_history()
+_history = None
+
+
+def configure(timeout: Optional[float] = None, poll_interval: Optional[float] = None):
+    """Override the default timeout and poll interval for all waits."""
+    global DEFAULT_TIMEOUT, DEFAULT_POLL_INTERVAL
+    if timeout is not None:
+        DEFAULT_TIMEOUT = timeout
+    if poll_interval is not None:
+        DEFAULT_POLL_INTERVAL = poll_interval
+
+
+def use_history(history):
+    """Take wait timeouts from a TimeoutHistory, or go back to fixed ones with None."""
+    global _history
+    _history = history
+
+
+class WaitRecorder:
+    """Collects the duration and outcome of every wait in a scenario on one device."""
+
+    def __init__(self, device: Optional[str] = None):
+        self.device = device
+        self.records: List[Dict[str, Any]] = []
+
+    def record(self, step: str, seconds: float, satisfied: bool, timeout: Optional[float] = None):
+        self.records.append({
+            "step": step,
+            "seconds": round(seconds, 3),
+            "satisfied": satisfied,
+            "timeout": None if timeout is None else round(timeout, 3),
+        })
+
+    def total_seconds(self) -> float:
+        return round(sum(r["seconds"] for r in self.records), 3)
+
+
+def start_recording(device: Optional[str] = None) -> WaitRecorder:
+    """Start a fresh wait recorder for the current thread or task and return it."""
+    recorder = WaitRecorder(device)
+    _recorder.set(recorder)
+    return recorder
+
+
+def current_recorder() -> Optional[WaitRecorder]:
+    """Return the recorder for the current thread or task, if one was started."""
+    return _recorder.get()
+
+
+def timeout_for(step: str, timeout: Optional[float] = None) -> float:
+    """
+    The timeout for a wait: learned from the history if there is enough, else `timeout` or the default.
+
+    A timeout of 0 asks for a single probe and is never replaced.
+    """
+    timeout = DEFAULT_TIMEOUT if timeout is None else timeout
+    if _history is None or timeout == 0:
+        return timeout
+    recorder = current_recorder()
+    return _history.timeout(recorder.device if recorder else None, step, timeout)
+
+
+def record(step: str, seconds: float, satisfied: bool, timeout: Optional[float] = None):
+    """Record a finished wait in the current recorder and, unless it was a single probe, the timeout history."""
+    recorder = current_recorder()
+    if recorder is not None:
+        recorder.record(step, seconds, satisfied, timeout)
+    if _history is not None and timeout != 0:
+        _history.record(recorder.device if recorder else None, step, seconds, satisfied, timeout)
+
+
+def wait_until(driver, condition: Callable[[Any], Any], step: str,
+               timeout: Optional[float] = None, poll_interval: Optional[float] = None):
+    """
+    Poll `condition(driver)` until it returns a truthy value or the timeout expires.
+
+    Returns the condition's value, or None on timeout. The time spent is recorded
+    under `step` in the current thread's recorder.
+    """
+    timeout = timeout_for(step, timeout)
+    poll_interval = DEFAULT_POLL_INTERVAL if poll_interval is None else poll_interval
+
+    started = time.monotonic()
+    try:
+        result = WebDriverWait(driver, timeout, poll_frequency=poll_interval).until(condition)
+    except TimeoutException:
+        result = None
+
+    record(step, time.monotonic() - started, bool(result), timeout)
+    return result
+
+
+def wait_for_any_xpath(driver, xpaths: List[str], step: str,
+                       timeout: Optional[float] = None, poll_interval: Optional[float] = None) -> Optional[str]:
+    """
+    Wait until any of the given XPaths matches, returning the first one that did.
+
+    Useful after actions whose outcome can be one of several screens, e.g. a
+    form submission that either shows a validation error or navigates away.
+    """
+    def any_present(d):
+        for xpath in xpaths:
+            if d.find_elements(By.XPATH, xpath):
+                return xpath
+        return False
+
+    return wait_until(driver, any_present, step, timeout=timeout, poll_interval=poll_interval)